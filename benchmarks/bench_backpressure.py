@@ -0,0 +1,91 @@
+"""
+Show that peak RSS of PaymentsEngine does not grow with input size when the
+consumer queues are bounded.
+
+Usage: python benchmarks/bench_backpressure.py [--rows N] [--capacity N] [--consumers N]
+
+The workload makes --clients deposits, then alternates dispute/resolve rows
+on those deposits. Account and history state therefore stays constant, and
+any RSS growth comes from ingest buffering. RSS is sampled while the file is
+processed and reported at each tenth of the run. Pass --capacity 0 for the
+unbounded queue; use a smaller --rows then, as it holds the file in memory.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from payments_engine import PaymentsEngine
+
+
+def write_churn_workload(path: str, num_rows: int, num_clients: int) -> None:
+    with open(path, "w") as f:
+        f.write("type, client, tx, amount\n")
+        f.writelines(f"deposit, {client_id}, {client_id}, 100.0\n" for client_id in range(1, num_clients + 1))
+        remaining = num_rows - num_clients
+        pairs = (f"dispute, {n % num_clients + 1}, {n % num_clients + 1},\nresolve, {n % num_clients + 1}, {n % num_clients + 1},\n" for n in range(remaining // 2))
+        chunk = []
+        for pair in pairs:
+            chunk.append(pair)
+            if len(chunk) >= 100_000:
+                f.writelines(chunk)
+                chunk = []
+        f.writelines(chunk)
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000_000)
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--capacity", type=int, default=PaymentsEngine.DEFAULT_QUEUE_CAPACITY)
+    parser.add_argument("--consumers", type=int, default=4)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "workload.csv")
+        write_churn_workload(path, args.rows, args.clients)
+        file_size = os.path.getsize(path)
+
+        engine = PaymentsEngine(num_consumers=args.consumers, queue_capacity=args.capacity or None)
+        samples = []
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(0.5):
+                consumed = sum(stats.consumed for stats in engine.queue_stats)
+                samples.append((consumed, rss_bytes()))
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        start = time.perf_counter()
+        engine.process_file(path)
+        elapsed = time.perf_counter() - start
+        done.set()
+        sampler.join()
+
+    print(f"rows={args.rows:,} file={file_size / 2**20:.0f} MiB capacity={args.capacity or 'unbounded'} "
+          f"{args.rows / elapsed:.0f} tx/s")
+    for tenth in range(1, 11):
+        threshold = args.rows * tenth / 10
+        reached = [rss for consumed, rss in samples if consumed <= threshold]
+        if reached:
+            print(f"  {tenth * 10:>3}% of rows  RSS {reached[-1] / 2**20:>8.1f} MiB")
+    print(f"  peak RSS {max(rss for _, rss in samples) / 2**20:.1f} MiB" if samples else "  (run too short to sample)")
+    for stats in engine.queue_stats:
+        print(f"  queue max_depth={stats.max_depth} backpressure_waits={stats.backpressure_waits} "
+              f"blocked={stats.backpressure_seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
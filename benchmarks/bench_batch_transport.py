@@ -0,0 +1,120 @@
+"""
+Measure the cost of moving transaction rows from one process to another.
+
+Usage: python benchmarks/bench_batch_transport.py [--rows N] [--batch-rows N]
+
+Three transports, each with a consumer process that reads every field of
+every row:
+    transactions  lists of Transaction objects through a multiprocessing.Queue (pickled)
+    lines         lists of raw CSV lines through a multiprocessing.Queue, as
+                  MultiProcessPaymentsEngine sends CSV input (the worker still has to parse them)
+    shared        TransactionBatch columns through a SharedBatchRing, as it sends binary input
+
+Reported per row: the consumer's time to receive batches (unpickling, or
+mapping and releasing a slot), excluding iterating their rows, and the wall
+time of the whole transfer. Batches are built before timing starts. Queue
+pickles in a feeder thread, so the producer's own time says little.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from models import Transaction, TransactionType
+from money import decimal_to_fixed
+from transaction_batch import SharedBatchRing, TransactionBatch
+
+TYPES = list(TransactionType)
+
+
+def make_rows(num_rows: int):
+    return [(row % 2, row % 65536, row, Decimal(f"{row % 1000}.25")) for row in range(num_rows)]
+
+
+def consume_queue(channel, results) -> None:
+    receive_ns = 0
+    checksum = 0
+    while True:
+        start = time.perf_counter_ns()
+        batch = channel.get()
+        receive_ns += time.perf_counter_ns() - start
+        if batch is None:
+            break
+        for item in batch:
+            checksum += len(item) if isinstance(item, str) else item.transaction_id
+    results.put((receive_ns, checksum))
+
+
+def consume_ring(channel, results) -> None:
+    receive_ns = 0
+    checksum = 0
+    while True:
+        start = time.perf_counter_ns()
+        batch = channel.get()
+        receive_ns += time.perf_counter_ns() - start
+        if batch is None:
+            break
+        for _, _, transaction_id, _ in batch.rows():
+            checksum += transaction_id
+        start = time.perf_counter_ns()
+        channel.release()
+        receive_ns += time.perf_counter_ns() - start
+    channel.close()
+    results.put((receive_ns, checksum))
+
+
+def run(label: str, context, channel, consumer, batches, send, send_end, num_rows: int) -> None:
+    results = context.Queue()
+    process = context.Process(target=consumer, args=(channel, results))
+    process.start()
+    start = time.perf_counter_ns()
+    for batch in batches:
+        send(batch)
+    send_end()
+    receive_ns, _ = results.get()
+    wall_ns = time.perf_counter_ns() - start
+    process.join()
+    print(f"{label:<14} receive {receive_ns / num_rows:>8.1f} ns/row  wall {wall_ns / num_rows:>8.1f} ns/row")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-rows", type=int, default=SharedBatchRing.DEFAULT_ROWS_PER_SLOT)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context()
+    rows = make_rows(args.rows)
+    chunks = [rows[start:start + args.batch_rows] for start in range(0, len(rows), args.batch_rows)]
+
+    transaction_batches = [[Transaction(TYPES[code], *fields) for code, *fields in chunk] for chunk in chunks]
+    queue = context.Queue(maxsize=8)
+    run("transactions", context, queue, consume_queue, transaction_batches, queue.put, lambda: queue.put(None), args.rows)
+
+    line_batches = [
+        [f"{TYPES[code].value},{client_id},{transaction_id},{amount}\n" for code, client_id, transaction_id, amount in chunk]
+        for chunk in chunks
+    ]
+    queue = context.Queue(maxsize=8)
+    run("lines", context, queue, consume_queue, line_batches, queue.put, lambda: queue.put(None), args.rows)
+
+    column_batches = []
+    for chunk in chunks:
+        batch = TransactionBatch()
+        for code, client_id, transaction_id, amount in chunk:
+            batch.append(code, client_id, transaction_id, decimal_to_fixed(amount))
+        column_batches.append(batch)
+    ring = SharedBatchRing(context, rows_per_slot=args.batch_rows)
+    try:
+        run("shared", context, ring, consume_ring, column_batches, ring.put, ring.put_end, args.rows)
+    finally:
+        ring.close()
+        ring.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Per-job latency of small batch files: a cold `python src/main.py` per file
+against jobs submitted to a running daemon (daemon.py), both from Python
+(daemon_client.submit) and through the daemon_client.py CLI, which still
+starts an interpreter but imports almost nothing.
+
+Usage: python benchmarks/bench_daemon.py [--jobs N] [--rows N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_dispatch import write_workload
+from daemon import PaymentsDaemon
+from daemon_client import submit
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+
+
+def report(label: str, latencies, baseline: float = None) -> float:
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    speedup = f"  x{baseline / p50:.1f}" if baseline else ""
+    print(f"{label:<20} p50 {p50 * 1000:>7.1f} ms  p95 {p95 * 1000:>7.1f} ms{speedup}")
+    return p50
+
+
+def timed(job, count: int):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        job()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bd-") as tmp_dir:
+        path = os.path.join(tmp_dir, "job.csv")
+        write_workload(path, args.rows, 100)
+        socket_path = os.path.join(tmp_dir, "daemon.sock")
+
+        cold = [sys.executable, os.path.join(SRC, "main.py"), path]
+        baseline = report("cold main.py", timed(lambda: subprocess.run(cold, capture_output=True, check=True), args.jobs))
+
+        daemon = PaymentsDaemon(socket_path)
+        threading.Thread(target=daemon.serve_forever, daemon=True).start()
+        try:
+            client = [sys.executable, os.path.join(SRC, "daemon_client.py"), "--socket", socket_path, path]
+            report("daemon, client CLI", timed(lambda: subprocess.run(client, capture_output=True, check=True), args.jobs), baseline)
+            report("daemon, submit()", timed(lambda: submit(socket_path, input_path=path), args.jobs), baseline)
+        finally:
+            daemon.shutdown()
+            daemon.server_close()
+
+
+if __name__ == "__main__":
+    main()
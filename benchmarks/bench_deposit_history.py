@@ -0,0 +1,67 @@
+"""
+Memory retained by transaction history when only deposits are kept for
+disputes and every tx id is a bit in a seen-id bitset, against keeping every
+deposit and withdrawal in full.
+
+Usage: python benchmarks/bench_deposit_history.py [--rows N] [--withdrawal-shares F ...] [--retention N]
+
+For each withdrawal share, stores --rows transactions and reports bytes per
+transaction measured with tracemalloc for: every transaction in a
+TransactionHistory (what StateManager kept before), StateManager, and
+StateManager with deposit_retention.
+"""
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from history_store import TransactionHistory
+from models import Transaction, TransactionType
+from state_manager import StateManager
+
+AMOUNTS = [Decimal(f"{value}.{cents:02d}") for value in range(1, 50) for cents in (0, 25, 50, 99)]
+
+
+def workload(rows: int, withdrawal_share: float):
+    rng = random.Random(7)
+    for transaction_id in range(1, rows + 1):
+        transaction_type = TransactionType.WITHDRAWAL if rng.random() < withdrawal_share else TransactionType.DEPOSIT
+        yield Transaction(transaction_type, rng.randint(1, 65535), transaction_id, rng.choice(AMOUNTS))
+
+
+def retained_bytes(store, transactions) -> int:
+    tracemalloc.start()
+    for transaction in transactions:
+        store(transaction)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--withdrawal-shares", type=float, nargs="+", default=[0.25, 0.75])
+    parser.add_argument("--retention", type=int, default=100_000)
+    args = parser.parse_args()
+
+    for share in args.withdrawal_shares:
+        everything = TransactionHistory()
+        baseline = retained_bytes(everything.put, workload(args.rows, share))
+        del everything
+        print(f"withdrawals {share:>4.0%}  all transactions       {baseline / args.rows:>6.1f} B/tx")
+        for label, state in (
+            ("deposits + seen bitset", StateManager()),
+            (f"retention {args.retention:,}", StateManager(deposit_retention=args.retention)),
+        ):
+            retained = retained_bytes(state.store_transaction, workload(args.rows, share))
+            print(f"                 {label:<22} {retained / args.rows:>6.1f} B/tx  x{baseline / retained:.1f} smaller")
+            del state
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Compare the SHARED, SHARDED and MAILBOX dispatch modes of PaymentsEngine.
+
+Usage: python benchmarks/bench_dispatch.py [--rows N] [--clients N] [--consumers N] [--profiles P ...]
+
+The uniform workload interleaves deposits, withdrawals, disputes and
+resolves of many clients, all in a valid per-client order. Any DLQ traffic
+is therefore caused by the engine reordering a client's transactions, not
+by the input. The zipf profile (see workloads.py) draws clients with Zipf
+skew, so a few hot clients take most rows. "tx max/mean" is the busiest
+consumer's share of the transactions against an even split: with static
+sharding a hot client's consumer does most of the work.
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from instrumentation import Instrumentation
+from models import DispatchMode
+from payments_engine import PaymentsEngine
+
+
+def write_workload(path: str, num_rows: int, num_clients: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    open_deposits = {client_id: [] for client_id in range(1, num_clients + 1)}
+    disputed = {client_id: [] for client_id in range(1, num_clients + 1)}
+    tx_id = 1
+    with open(path, "w") as f:
+        f.write("type, client, tx, amount\n")
+        for _ in range(num_rows):
+            client_id = rng.randint(1, num_clients)
+            roll = rng.random()
+            if disputed[client_id] and roll < 0.1:
+                f.write(f"resolve, {client_id}, {disputed[client_id].pop()},\n")
+            elif open_deposits[client_id] and roll < 0.2:
+                disputed_tx = open_deposits[client_id].pop()
+                disputed[client_id].append(disputed_tx)
+                f.write(f"dispute, {client_id}, {disputed_tx},\n")
+            elif roll < 0.4:
+                f.write(f"withdrawal, {client_id}, {tx_id}, 1.0\n")
+                tx_id += 1
+            else:
+                f.write(f"deposit, {client_id}, {tx_id}, 10.0\n")
+                open_deposits[client_id].append(tx_id)
+                tx_id += 1
+
+
+def run(path: str, num_rows: int, num_consumers: int, dispatch_mode: DispatchMode) -> None:
+    engine = PaymentsEngine(num_consumers=num_consumers, dispatch_mode=dispatch_mode)
+    start = time.perf_counter()
+    engine.process_file(path)
+    elapsed = time.perf_counter() - start
+
+    # Second, instrumented run for how work spread over consumers and client lock waits
+    instrumented = PaymentsEngine(num_consumers=num_consumers, dispatch_mode=dispatch_mode, instrumentation=Instrumentation())
+    instrumented.process_file(path)
+    report = instrumented.instrumentation_report
+    handled = [consumer["transactions"] for consumer in report["consumers"]]
+    print(
+        f"{dispatch_mode.value:>8} consumers={num_consumers:<3} "
+        f"{num_rows / elapsed:>10.0f} tx/s  {elapsed:>7.2f}s  "
+        f"tx max/mean={max(handled) / (sum(handled) / len(handled)):>5.2f}  "
+        f"lock wait={report['stages']['lock_wait']['total_seconds']:>6.2f}s  "
+        f"DLQ={engine.stats.dlq_retried:<7} failed={engine.stats.failed}"
+    )
+
+
+def main():
+    # workloads.py imports this module, so import it here rather than at the top
+    from workloads import PROFILES
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--consumers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--profiles", nargs="+", choices=["uniform", "zipf"], default=["uniform", "zipf"])
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for profile in args.profiles:
+            print(profile)
+            path = os.path.join(tmp_dir, f"{profile}.csv")
+            PROFILES[profile](path, args.rows, args.clients)
+            for num_consumers in args.consumers:
+                for dispatch_mode in DispatchMode:
+                    run(path, args.rows, num_consumers, dispatch_mode)
+
+
+if __name__ == "__main__":
+    main()
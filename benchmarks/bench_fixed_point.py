@@ -0,0 +1,54 @@
+"""
+Compare Decimal and fixed-point (int units of 1e-4) money representations.
+
+Usage: python benchmarks/bench_fixed_point.py [--rows N] [--clients N]
+
+Throughput is measured without tracing; retained memory (accounts plus
+transaction history after the run) is measured in a second, traced run.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_dispatch import write_workload
+from payments_engine import PaymentsEngine
+
+
+def run(path: str, num_rows: int, fixed_point: bool) -> None:
+    engine = PaymentsEngine(num_consumers=1, fixed_point=fixed_point)
+    start = time.perf_counter()
+    engine.process_file(path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    engine = PaymentsEngine(num_consumers=1, fixed_point=fixed_point)
+    engine.process_file(path)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    label = "fixed-point" if fixed_point else "Decimal"
+    print(f"{label:<12} {num_rows / elapsed:>10.0f} tx/s  {elapsed:>7.2f}s  retained={retained / num_rows:>6.1f} B/tx")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--clients", type=int, default=10_000)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "workload.csv")
+        write_workload(path, args.rows, args.clients)
+        run(path, args.rows, fixed_point=False)
+        run(path, args.rows, fixed_point=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Bytes per stored transaction of TransactionHistory (dict of Transaction
+objects) against CompactTransactionHistory (typed columns), and the memory
+and lookup rates of TieredTransactionHistory (bounded hot tier, mmapped cold file).
+
+Usage: python benchmarks/bench_history_memory.py [--sizes N ...] [--baseline-sample N] [--tiered-size N] [--hot-capacity N]
+
+The compact store is filled to each full size and measured from its column
+buffers. The dict baseline would need tens of GB at 100M, so it is measured
+with tracemalloc on --baseline-sample transactions and reported per tx.
+Amounts come from a small set of values, as parsed input amounts are shared
+by the CSV ingest cache.
+
+The tiered store reports its heap size from tracemalloc (the cold tier
+lives in the page cache, not the heap), which slows its fill, and lookup
+rates at recent ids, random ids and unknown ids.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from history_store import TransactionHistory, CompactTransactionHistory, TieredTransactionHistory
+from models import Transaction, TransactionType
+
+AMOUNTS = [Decimal(f"{value}.{cents:02d}") for value in range(1, 50) for cents in (0, 25, 50, 99)]
+
+
+def fill(history, size: int) -> float:
+    rng = random.Random(7)
+    deposit, withdrawal = TransactionType.DEPOSIT, TransactionType.WITHDRAWAL
+    start = time.perf_counter()
+    for transaction_id in range(1, size + 1):
+        transaction_type = withdrawal if transaction_id % 4 == 0 else deposit
+        history.put(Transaction(transaction_type, rng.randint(1, 65535), transaction_id, rng.choice(AMOUNTS)))
+    return time.perf_counter() - start
+
+
+def lookups_per_second(history, size: int, count: int = 200_000, low: int = 1) -> float:
+    rng = random.Random(11)
+    ids = [rng.randint(low, size) for _ in range(count)]
+    start = time.perf_counter()
+    for transaction_id in ids:
+        history.get(transaction_id)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000_000, 100_000_000])
+    parser.add_argument("--baseline-sample", type=int, default=1_000_000)
+    parser.add_argument("--tiered-size", type=int, default=2_000_000)
+    parser.add_argument("--hot-capacity", type=int, default=TieredTransactionHistory.DEFAULT_HOT_CAPACITY)
+    args = parser.parse_args()
+
+    sample = args.baseline_sample
+    tracemalloc.start()
+    baseline = TransactionHistory()
+    fill(baseline, sample)
+    baseline_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    baseline_per_tx = baseline_bytes / sample
+    print(
+        f"TransactionHistory         sample={sample:>11,}  {baseline_per_tx:>6.1f} B/tx  "
+        f"{lookups_per_second(baseline, sample):>10.0f} lookups/s"
+    )
+    del baseline
+
+    for size in args.sizes:
+        history = CompactTransactionHistory()
+        elapsed = fill(history, size)
+        per_tx = history.nbytes / size
+        print(
+            f"CompactTransactionHistory  size={size:>13,}  {per_tx:>6.1f} B/tx  "
+            f"{lookups_per_second(history, size):>10.0f} lookups/s  "
+            f"x{baseline_per_tx / per_tx:.1f} smaller  fill {elapsed:.0f}s"
+        )
+        del history
+
+    size = args.tiered_size
+    tracemalloc.start()
+    history = TieredTransactionHistory(hot_capacity=args.hot_capacity)
+    elapsed = fill(history, size)
+    heap_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"TieredTransactionHistory   size={size:>13,}  {heap_bytes / 2**20:.0f} MiB on heap  "
+        f"hot={history.hot_count:,} cold={history.cold_count:,}  fill {elapsed:.0f}s"
+    )
+    recent = lookups_per_second(history, size, low=size - args.hot_capacity // 2)
+    anywhere = lookups_per_second(history, size)
+    unknown = lookups_per_second(history, 2 * size, low=size + 1)
+    print(f"  lookups/s: recent {recent:.0f}  random {anywhere:.0f}  unknown {unknown:.0f}")
+    history.close()
+
+
+if __name__ == "__main__":
+    main()
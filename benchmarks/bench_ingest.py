@@ -0,0 +1,116 @@
+"""
+Compare CSV ingest throughput of the csv_ingest module against the previous
+csv.DictReader + per-row normalized dict path, and of parallel_ingest with
+--parse-workers worker processes (the parent still builds every Transaction,
+so the gain is bounded by that and by the number of cores), and of
+binary_ingest on the same rows converted to the binary format.
+
+For each of --compressions, the rows are also compressed and read through
+compressed_input (decompression in a background thread), against
+decompressing inline in the reading thread. The compressed runs are
+compared with reading the plain file.
+
+Usage: python benchmarks/bench_ingest.py [--rows N] [--clients N] [--parse-workers N ...] [--compressions gz|bz2|xz ...]
+"""
+import argparse
+import csv
+import logging
+import os
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_dispatch import write_workload
+from binary_ingest import convert_csv, iter_binary_chunks
+from compressed_input import OPENERS, open_input
+from csv_ingest import iter_transaction_batches, iter_transaction_chunks
+from parallel_ingest import iter_parallel_chunks
+from models import Transaction, TransactionType
+
+
+def dictreader_ingest(path: str) -> int:
+    """The pre-csv_ingest publisher path, kept here as the baseline."""
+    count = 0
+    with open(path, "r") as f:
+        for row in csv.DictReader(f):
+            normalized = {k.strip(): v.strip() for k, v in row.items()}
+            amount_str = normalized.get("amount", "")
+            Transaction(
+                transaction_type=TransactionType(normalized["type"].lower()),
+                client_id=int(normalized["client"]),
+                transaction_id=int(normalized["tx"]),
+                amount=Decimal(amount_str) if amount_str else None,
+            )
+            count += 1
+    return count
+
+
+def chunked_ingest(path: str) -> int:
+    count = 0
+    with open(path, "r") as f:
+        for batch in iter_transaction_batches(f):
+            count += len(batch)
+    return count
+
+
+def parallel_ingest(workers: int):
+    def ingest(path: str) -> int:
+        return sum(len(transactions) for _, _, transactions in iter_parallel_chunks(path, workers))
+    return ingest
+
+
+def binary_ingest(path: str) -> int:
+    with open(path, "rb") as f:
+        return sum(len(transactions) for _, _, transactions in iter_binary_chunks(f))
+
+
+def compressed_ingest(open_compressed):
+    def ingest(path: str) -> int:
+        with open_compressed(path) as f:
+            return sum(len(transactions) for _, _, transactions in iter_transaction_chunks(f))
+    return ingest
+
+
+def run(label: str, ingest, path: str, baseline: float = None) -> float:
+    start = time.perf_counter()
+    num_rows = ingest(path)
+    elapsed = time.perf_counter() - start
+    speedup = f"  x{baseline / elapsed:.2f}" if baseline else ""
+    print(f"{label:<12} {num_rows / elapsed:>12.0f} rows/s  {elapsed:>7.2f}s{speedup}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--parse-workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--compressions", nargs="+", choices=sorted(OPENERS), default=["gz", "bz2", "xz"])
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "workload.csv")
+        write_workload(path, args.rows, args.clients)
+        baseline = run("DictReader", dictreader_ingest, path)
+        run("csv_ingest", chunked_ingest, path, baseline)
+        for workers in args.parse_workers:
+            run(f"parallel x{workers}", parallel_ingest(workers), path, baseline)
+        binary_path = os.path.join(tmp_dir, "workload.bin")
+        convert_csv(path, binary_path)
+        run("binary", binary_ingest, binary_path, baseline)
+
+        plain = run("plain file", compressed_ingest(lambda path: open(path, "rb")), path)
+        for compression in args.compressions:
+            compressed_path = f"{path}.{compression}"
+            with open(path, "rb") as src, OPENERS[compression](compressed_path, "wb") as dst:
+                dst.write(src.read())
+            run(f"{compression} inline", compressed_ingest(lambda path: OPENERS[compression](path, "rb")), compressed_path, plain)
+            run(f"{compression} thread", compressed_ingest(open_input), compressed_path, plain)
+
+
+if __name__ == "__main__":
+    main()
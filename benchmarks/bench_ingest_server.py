@@ -0,0 +1,105 @@
+"""
+Load generator for ingest_server.py.
+
+Usage: python benchmarks/bench_ingest_server.py [--connections N] [--requests N] [--rows-per-request N] [--tcp-rows N]
+
+Starts the server in a subprocess, then from this process opens
+--connections concurrent keep-alive HTTP connections, each POSTing
+--requests batches of --rows-per-request rows, and reports requests/s,
+rows/s and request latency percentiles. It then streams --tcp-rows rows per
+connection over the TCP listener. Finally it reports the server's peak RSS
+(VmHWM) and checks the row count the server processed.
+"""
+import argparse
+import asyncio
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+
+
+def rows(connection: int, start: int, count: int) -> bytes:
+    client_id = connection % 65536
+    return "".join(f"deposit,{client_id},{connection * 10_000_000 + tx},1.5\n" for tx in range(start, start + count)).encode()
+
+
+async def http_client(address, connection: int, num_requests: int, rows_per_request: int, latencies) -> None:
+    reader, writer = await asyncio.open_connection(*address)
+    for request in range(num_requests):
+        body = rows(connection, request * rows_per_request, rows_per_request)
+        start = time.perf_counter()
+        writer.write(b"POST /transactions HTTP/1.1\r\nHost: bench\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = int(re.search(rb"Content-Length: (\d+)", head).group(1))
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def tcp_client(address, connection: int, num_rows: int) -> int:
+    reader, writer = await asyncio.open_connection(*address)
+    for start in range(0, num_rows, 1000):
+        writer.write(rows(connection, 5_000_000 + start, min(1000, num_rows - start)))
+        await writer.drain()
+    writer.write_eof()
+    accepted = int(await reader.readline())
+    writer.close()
+    return accepted
+
+
+async def load(http_address, tcp_address, args) -> None:
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(http_client(http_address, c, args.requests, args.rows_per_request, latencies) for c in range(args.connections))
+    )
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    total = len(latencies)
+    print(
+        f"HTTP  {args.connections} connections  {total / elapsed:>8.0f} req/s  "
+        f"{total * args.rows_per_request / elapsed:>9.0f} rows/s  "
+        f"p50 {latencies[total // 2] * 1000:.2f} ms  p99 {latencies[int(total * 0.99)] * 1000:.2f} ms"
+    )
+
+    start = time.perf_counter()
+    accepted = await asyncio.gather(*(tcp_client(tcp_address, c, args.tcp_rows) for c in range(args.connections)))
+    elapsed = time.perf_counter() - start
+    print(f"TCP   {args.connections} connections  {sum(accepted) / elapsed:>9.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--rows-per-request", type=int, default=1)
+    parser.add_argument("--tcp-rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(SRC, "ingest_server.py"), "--tcp-port", "0", "--http-port", "0"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        tcp_line = server.stderr.readline().decode()
+        http_line = server.stderr.readline().decode()
+        tcp_address = re.search(r"on (.+):(\d+)", tcp_line).groups()
+        http_address = re.search(r"on (.+):(\d+)", http_line).groups()
+        asyncio.run(load(http_address, tcp_address, args))
+        with open(f"/proc/{server.pid}/status") as f:
+            peak_rss = re.search(r"VmHWM:\s+(\d+) kB", f.read()).group(1)
+        print(f"server peak RSS {int(peak_rss) / 1024:.0f} MiB")
+    finally:
+        server.send_signal(signal.SIGINT)
+        output, _ = server.communicate()
+    processed = sum(1 for _ in output.splitlines()[1:])
+    print(f"server finished with {processed} client accounts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Measure journaling overhead and crash recovery time of PaymentsEngine.
+
+Usage: python benchmarks/bench_journal.py [--rows N] [--clients N] [--consumers N] [--snapshot-interval N]
+
+Runs the same workload without a journal and with journal_dir set, and
+reports tx/s, journal bytes and fsync time. Then it runs the journaled
+engine in a subprocess, kills it (SIGKILL) once it is about halfway through,
+and times the rerun that recovers from the snapshot and journal.
+"""
+import argparse
+import logging
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_dispatch import write_workload
+from payments_engine import PaymentsEngine
+
+
+class _MeasuredEngine(PaymentsEngine):
+    """Keeps journal counters around after the run."""
+
+    def _finish_journal(self):
+        self.journal_bytes = self._journal.bytes_written
+        self.journal_syncs = self._journal.syncs
+        super()._finish_journal()
+        self.journal_sync_seconds = self._journal.sync_seconds
+
+
+def run(label: str, engine: PaymentsEngine, path: str, num_rows: int, baseline: float = None) -> float:
+    start = time.perf_counter()
+    engine.process_file(path)
+    elapsed = time.perf_counter() - start
+    overhead = f"  overhead {elapsed / baseline - 1:+.1%}" if baseline else ""
+    print(f"{label:<24} {num_rows / elapsed:>10.0f} tx/s  {elapsed:>7.2f}s{overhead}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--consumers", type=int, default=4)
+    parser.add_argument("--snapshot-interval", type=int, default=PaymentsEngine.DEFAULT_SNAPSHOT_INTERVAL)
+    parser.add_argument("--child", nargs=2, metavar=("CSV", "JOURNAL_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    if args.child:
+        # Journaled run for the crash/recovery measurement
+        csv_path, journal_dir = args.child
+        PaymentsEngine(
+            num_consumers=args.consumers, journal_dir=journal_dir, snapshot_interval=args.snapshot_interval
+        ).process_file(csv_path)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "workload.csv")
+        journal_dir = os.path.join(tmp_dir, "journal")
+        write_workload(path, args.rows, args.clients)
+
+        baseline = run("no journal", PaymentsEngine(num_consumers=args.consumers), path, args.rows)
+        engine = _MeasuredEngine(
+            num_consumers=args.consumers, journal_dir=journal_dir, snapshot_interval=args.snapshot_interval
+        )
+        run(f"journal, snapshot/{args.snapshot_interval:,}", engine, path, args.rows, baseline)
+        print(f"  journal {engine.journal_bytes / 2**20:.1f} MiB written, "
+              f"{engine.journal_syncs} fsyncs, {engine.journal_sync_seconds:.2f}s in fsync")
+
+        # Crash halfway, then recover
+        command = [
+            sys.executable, __file__, "--child", path, journal_dir,
+            "--consumers", str(args.consumers), "--snapshot-interval", str(args.snapshot_interval),
+        ]
+        with open(os.devnull, "w") as devnull:
+            process = subprocess.Popen(command, stdout=devnull, stderr=devnull)
+            time.sleep(baseline / 2)
+            process.send_signal(signal.SIGKILL)
+            process.wait()
+            left_behind = {name: os.path.getsize(os.path.join(journal_dir, name)) for name in os.listdir(journal_dir)}
+            start = time.perf_counter()
+            subprocess.run(command, stdout=devnull, stderr=devnull, check=True)
+            recovery = time.perf_counter() - start
+
+    files = ", ".join(f"{name} {size / 2**20:.1f} MiB" for name, size in sorted(left_behind.items())) or "nothing"
+    print(f"killed at ~50%: left {files}")
+    print(f"rerun with recovery          {recovery:>7.2f}s  (full run {baseline:.2f}s, includes interpreter startup)")
+
+
+if __name__ == "__main__":
+    main()
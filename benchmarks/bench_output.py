@@ -0,0 +1,94 @@
+"""
+Compare writing the accounts CSV with output.write_accounts against the
+previous main.py loop (sort, then one print per account with
+Decimal.normalize()).
+
+Usage: python benchmarks/bench_output.py [--clients N] [--repeat N]
+
+Both write to a temporary file; the best of --repeat runs is reported.
+write() calls are counted by wrapping the underlying raw file, which is
+what reaches the OS.
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from models import ClientAccount
+from output import write_accounts
+
+
+class CountingRaw(io.FileIO):
+    writes = 0
+
+    def write(self, data):
+        CountingRaw.writes += 1
+        return super().write(data)
+
+
+def print_accounts(accounts, out) -> None:
+    """The pre-output.py main.py loop, kept here as the baseline."""
+    print("client,available,held,total,locked", file=out)
+    for client_id in sorted(accounts.keys()):
+        account = accounts[client_id]
+        print(
+            f"{client_id},"
+            f"{account.available.normalize():f},"
+            f"{account.held.normalize():f},"
+            f"{account.total.normalize():f},"
+            f"{str(account.locked).lower()}",
+            file=out,
+        )
+
+
+def make_accounts(num_clients: int, fixed_point: bool):
+    rng = random.Random(5)
+    accounts = {}
+    for client_id in rng.sample(range(1, 65536), num_clients):
+        available = rng.randint(0, 10**9)
+        held = rng.choice((0, rng.randint(0, 10**6)))
+        if not fixed_point:
+            available = Decimal(available).scaleb(-4)
+            held = Decimal(held).scaleb(-4)
+        accounts[client_id] = ClientAccount(client_id, available, held, locked=rng.random() < 0.01)
+    return accounts
+
+
+def run(label: str, write, path: str, repeat: int, baseline: float = None) -> float:
+    CountingRaw.writes = 0
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with io.TextIOWrapper(io.BufferedWriter(CountingRaw(path, "w"))) as out:
+            write(out)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    speedup = f"  x{baseline / elapsed:.2f}" if baseline else ""
+    print(f"{label:<24} {elapsed * 1000:>8.1f} ms  {CountingRaw.writes // repeat:>6} writes{speedup}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "accounts.csv")
+        accounts = make_accounts(args.clients, fixed_point=False)
+        baseline = run("print per account", lambda out: print_accounts(accounts, out), path, args.repeat)
+        run("write_accounts", lambda out: write_accounts(accounts, out.buffer), path, args.repeat, baseline)
+        ordered = dict(sorted(accounts.items()))
+        run("write_accounts, ordered", lambda out: write_accounts(ordered, out.buffer), path, args.repeat, baseline)
+        fixed = make_accounts(args.clients, fixed_point=True)
+        run("write_accounts, fixed", lambda out: write_accounts(fixed, out.buffer), path, args.repeat, baseline)
+
+
+if __name__ == "__main__":
+    main()
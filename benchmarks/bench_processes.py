@@ -0,0 +1,46 @@
+"""
+Measure MultiProcessPaymentsEngine scaling with the number of worker processes.
+
+Usage: python benchmarks/bench_processes.py [--rows N] [--clients N] [--workers N ...]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_dispatch import write_workload
+from payments_engine import PaymentsEngine
+from process_engine import MultiProcessPaymentsEngine
+
+
+def run(label: str, engine, path: str, num_rows: int, baseline: float = None) -> float:
+    start = time.perf_counter()
+    engine.process_file(path)
+    elapsed = time.perf_counter() - start
+    speedup = f"  x{baseline / elapsed:.2f}" if baseline else ""
+    print(f"{label:<22} {num_rows / elapsed:>10.0f} tx/s  {elapsed:>7.2f}s{speedup}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "workload.csv")
+        write_workload(path, args.rows, args.clients)
+        baseline = run("threaded (1 consumer)", PaymentsEngine(num_consumers=1), path, args.rows)
+        for num_workers in args.workers:
+            run(f"processes={num_workers}", MultiProcessPaymentsEngine(num_workers=num_workers), path, args.rows, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Compare InMemoryQueue throughput for the per-message and batch APIs.
+
+Usage: python benchmarks/bench_queue.py [--messages N] [--consumers N] [--batch-sizes N ...]
+
+One publisher thread pushes --messages transactions through the queue to
+--consumers consumer threads. The message API is publish_message/consume_message;
+the batch API is publish_batch/consume_batch at each batch size. Reports
+messages/s and queue lock acquisitions per message.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from message_queue import InMemoryQueue
+from models import Transaction, TransactionType
+
+
+def make_transactions(num_messages: int):
+    return [
+        Transaction(transaction_type=TransactionType.DEPOSIT, client_id=n % 1000, transaction_id=n, amount=Decimal("1"))
+        for n in range(num_messages)
+    ]
+
+
+def run_message_api(transactions, num_consumers: int, capacity: int) -> InMemoryQueue:
+    queue = InMemoryQueue(capacity=capacity)
+
+    def consume():
+        while True:
+            message = queue.consume_message()
+            if message is None and queue.is_shutdown() and queue.is_empty():
+                break
+
+    consumers = [threading.Thread(target=consume) for _ in range(num_consumers)]
+    for consumer in consumers:
+        consumer.start()
+    for transaction in transactions:
+        queue.publish_message(transaction)
+    queue.shutdown()
+    for consumer in consumers:
+        consumer.join()
+    return queue
+
+
+def run_batch_api(transactions, num_consumers: int, capacity: int, batch_size: int) -> InMemoryQueue:
+    queue = InMemoryQueue(capacity=capacity)
+
+    def consume():
+        while queue.consume_batch(batch_size):
+            pass
+
+    consumers = [threading.Thread(target=consume) for _ in range(num_consumers)]
+    for consumer in consumers:
+        consumer.start()
+    for start in range(0, len(transactions), batch_size):
+        queue.publish_batch(transactions[start:start + batch_size])
+    queue.shutdown()
+    for consumer in consumers:
+        consumer.join()
+    return queue
+
+
+def report(label: str, queue: InMemoryQueue, elapsed: float) -> None:
+    stats = queue.get_stats()
+    print(f"  {label:<14} {stats.consumed / elapsed:>12,.0f} msg/s  "
+          f"{stats.lock_acquisitions / stats.consumed:.4f} lock acquisitions/msg  ({elapsed:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--consumers", type=int, default=4)
+    parser.add_argument("--capacity", type=int, default=100_000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 256, 1024])
+    args = parser.parse_args()
+
+    transactions = make_transactions(args.messages)
+    print(f"messages={args.messages:,} consumers={args.consumers} capacity={args.capacity:,}")
+
+    start = time.perf_counter()
+    queue = run_message_api(transactions, args.consumers, args.capacity)
+    report("message API", queue, time.perf_counter() - start)
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        queue = run_batch_api(transactions, args.consumers, args.capacity, batch_size)
+        report(f"batch {batch_size}", queue, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare the state backends: dict-backed StateManager, preallocated
+DenseStateManager and SQLite-backed SqliteStateManager.
+
+Usage: python benchmarks/bench_state.py [--rows N] [--clients N] [--consumers N]
+
+Runs the per-transaction state calls in isolation (lock lookup plus account
+lookup, as a consumer does for every message), then the full engine with
+each backend and its throughput relative to StateManager.
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_dispatch import write_workload
+from payments_engine import PaymentsEngine
+from sqlite_state import SqliteStateManager
+from state_manager import StateManager, DenseStateManager
+
+BACKENDS = (StateManager, DenseStateManager, SqliteStateManager)
+
+
+def hot_path(state_factory, client_ids) -> float:
+    state = state_factory()
+    start = time.perf_counter()
+    for client_id in client_ids:
+        with state.get_client_lock(client_id):
+            state.get_or_create_account(client_id)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--clients", type=int, default=65_535)
+    parser.add_argument("--consumers", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    client_ids = [rng.randint(1, args.clients) for _ in range(args.rows)]
+    for state_factory in BACKENDS:
+        elapsed = hot_path(state_factory, client_ids)
+        print(f"hot path  {state_factory.__name__:<19} {elapsed / args.rows * 1e9:>8.0f} ns/tx")
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "workload.csv")
+        write_workload(path, args.rows, args.clients)
+        baseline = None
+        for state_factory in BACKENDS:
+            engine = PaymentsEngine(num_consumers=args.consumers, state_factory=state_factory)
+            start = time.perf_counter()
+            engine.process_file(path)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"engine    {state_factory.__name__:<19} {args.rows / elapsed:>8.0f} tx/s  {elapsed / baseline:>5.2f}x time")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Throughput and submit-to-processing latency of StreamingPaymentsEngine.
+
+Usage: python benchmarks/bench_streaming.py [--rows N] [--clients N] [--submit-size N] [--rate N]
+
+The workload is parsed up front, then submitted --submit-size transactions
+per submit() call: as fast as possible, and paced at --rate transactions per
+second, where latency is bounded by max_latency rather than by queueing. Each
+run uses a fresh engine and reports tx/s and latency percentiles (log2
+buckets, so within a factor of two) for several micro-batch settings.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_dispatch import write_workload
+from csv_ingest import iter_transactions
+from models import DispatchMode
+from streaming_engine import StreamingPaymentsEngine
+
+SETTINGS = [(256, 0.001), (1024, 0.005), (8192, 0.05)]
+
+
+def run(transactions, submit_size: int, rate: float, micro_batch_size: int, max_latency: float) -> None:
+    engine = StreamingPaymentsEngine(
+        micro_batch_size=micro_batch_size, max_latency=max_latency, num_consumers=4, dispatch_mode=DispatchMode.SHARDED
+    )
+    engine.start()
+    start = time.perf_counter()
+    for index in range(0, len(transactions), submit_size):
+        if rate:
+            # Pace against the schedule rather than sleeping a fixed amount per call
+            delay = start + index / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        engine.submit(transactions[index:index + submit_size])
+    engine.stop()
+    elapsed = time.perf_counter() - start
+    report = engine.latency_report()
+    mode = f"{rate:,.0f}/s" if rate else "max"
+    print(
+        f"rate {mode:<10} micro-batch {micro_batch_size:>5} max_latency {max_latency * 1000:>4.0f} ms  "
+        f"{len(transactions) / elapsed:>9.0f} tx/s  p50 {report['p50_us'] / 1000:>7.2f} ms  "
+        f"p99 {report['p99_us'] / 1000:>7.2f} ms  max {report['max_us'] / 1000:>7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--submit-size", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=20_000)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "workload.csv")
+        write_workload(path, args.rows, args.clients)
+        transactions = list(iter_transactions(path))
+    for rate in (0, args.rate):
+        for micro_batch_size, max_latency in SETTINGS:
+            run(transactions, args.submit_size, rate, micro_batch_size, max_latency)
+
+
+if __name__ == "__main__":
+    main()
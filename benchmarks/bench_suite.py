@@ -0,0 +1,189 @@
+"""
+Benchmark sweep of PaymentsEngine over workload profiles, with JSON output
+and regression checks between two runs.
+
+Usage:
+    python benchmarks/bench_suite.py run [--profiles P ...] [--rows N ...] [--consumers N ...]
+                                         [--clients N] [--repeat N] [-o results.json]
+    python benchmarks/bench_suite.py compare baseline.json candidate.json [--threshold 0.1]
+
+run generates each profile (see workloads.py) at each file size and runs
+PaymentsEngine.process_file for each consumer count. Every run happens in a
+fresh process so peak RSS is per run; with --repeat the fastest run is
+kept. Results (tx/s, wall time, peak RSS, processed/failed/parked/DLQ
+counts) are written as JSON.
+
+compare matches runs by profile, rows and consumers and flags a regression
+when tx/s drops or peak RSS grows by more than --threshold (a fraction).
+It exits with status 1 if any run regressed.
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from payments_engine import PaymentsEngine
+from workloads import PROFILES
+
+RESULTS_VERSION = 1
+
+
+def run_once(path: str, num_consumers: int) -> dict:
+    """Process path in this process and report timing, peak RSS and engine counters."""
+    logging.disable(logging.WARNING)
+    engine = PaymentsEngine(num_consumers=num_consumers)
+    with contextlib.redirect_stderr(io.StringIO()):
+        start = time.perf_counter()
+        engine.process_file(path)
+        elapsed = time.perf_counter() - start
+    stats = engine.stats
+    return {
+        "wall_seconds": elapsed,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "processed": stats.processed,
+        "failed": stats.failed,
+        "parked": stats.parked,
+        "dlq_retried": stats.dlq_retried,
+    }
+
+
+def run_isolated(path: str, num_consumers: int) -> dict:
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_once, path, num_consumers).result()
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def sweep(args) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for profile in args.profiles:
+            for num_rows in args.rows:
+                path = os.path.join(tmp_dir, f"{profile}-{num_rows}.csv")
+                PROFILES[profile](path, num_rows, args.clients, args.seed)
+                for num_consumers in args.consumers:
+                    runs = [run_isolated(path, num_consumers) for _ in range(args.repeat)]
+                    best = min(runs, key=lambda run: run["wall_seconds"])
+                    result = {
+                        "profile": profile,
+                        "rows": num_rows,
+                        "consumers": num_consumers,
+                        "tx_per_second": num_rows / best["wall_seconds"],
+                        **best,
+                    }
+                    results.append(result)
+                    print(
+                        f"{profile:<14} rows={num_rows:<9} consumers={num_consumers:<3} "
+                        f"{result['tx_per_second']:>10.0f} tx/s  {best['wall_seconds']:>7.2f}s  "
+                        f"RSS={best['peak_rss_mib']:>7.1f} MiB  DLQ={best['dlq_retried']}",
+                        file=sys.stderr,
+                    )
+                os.remove(path)
+    return {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {"clients": args.clients, "seed": args.seed, "repeat": args.repeat},
+        "results": results,
+    }
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> List[str]:
+    """Print a side-by-side table and return a description of each regression."""
+    def key(result: dict) -> Tuple[str, int, int]:
+        return result["profile"], result["rows"], result["consumers"]
+
+    baseline_runs: Dict[Tuple[str, int, int], dict] = {key(result): result for result in baseline["results"]}
+    regressions = []
+    print(f"{'profile':<14} {'rows':>9} {'cons':>4} {'base tx/s':>11} {'new tx/s':>11} {'change':>8} {'RSS change':>10}")
+    for result in candidate["results"]:
+        before = baseline_runs.get(key(result))
+        if before is None:
+            continue
+        speed_change = result["tx_per_second"] / before["tx_per_second"] - 1
+        rss_change = result["peak_rss_mib"] / before["peak_rss_mib"] - 1
+        flags = []
+        if speed_change < -threshold:
+            flags.append(f"tx/s {speed_change:+.1%}")
+        if rss_change > threshold:
+            flags.append(f"peak RSS {rss_change:+.1%}")
+        marker = "  REGRESSION" if flags else ""
+        print(
+            f"{result['profile']:<14} {result['rows']:>9} {result['consumers']:>4} "
+            f"{before['tx_per_second']:>11.0f} {result['tx_per_second']:>11.0f} "
+            f"{speed_change:>+8.1%} {rss_change:>+10.1%}{marker}"
+        )
+        if flags:
+            regressions.append(f"{'/'.join(map(str, key(result)))}: {', '.join(flags)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the sweep and write JSON results")
+    run_parser.add_argument("--profiles", nargs="+", choices=sorted(PROFILES), default=list(PROFILES))
+    run_parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    run_parser.add_argument("--consumers", type=int, nargs="+", default=[1, 4])
+    run_parser.add_argument("--clients", type=int, default=10_000)
+    run_parser.add_argument("--repeat", type=int, default=1)
+    run_parser.add_argument("--seed", type=int, default=7)
+    run_parser.add_argument("-o", "--output", help="JSON results path (default: stdout)")
+
+    compare_parser = commands.add_parser("compare", help="compare two JSON results and flag regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = sweep(args)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+        else:
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    regressions = compare(baseline, candidate, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Synthetic CSV workload profiles for the benchmarks.
+
+Every profile is a function write(path, num_rows, num_clients, seed) that
+writes exactly num_rows data rows after the header, and is deterministic for
+a given seed. PROFILES maps profile names to these functions.
+
+    uniform        clients picked uniformly, valid per-client order (bench_dispatch)
+    zipf           clients picked with Zipf skew (s=1.2): a few hot clients take most rows
+    dispute_heavy  half of the rows are disputes, resolves and chargebacks
+    out_of_order   half of the deposits and disputes are held back and written up to
+                   OUT_OF_ORDER_DELAY rows later, so disputes and resolves often
+                   arrive before what they reference
+    invalid        80% malformed rows: unknown types, bad amounts, missing fields
+"""
+import bisect
+import heapq
+import itertools
+import random
+from typing import Callable, Dict, Iterator
+
+from bench_dispatch import write_workload
+
+ZIPF_EXPONENT = 1.2
+OUT_OF_ORDER_DELAY = 5_000
+INVALID_FRACTION = 0.8
+
+
+def _write_rows(path: str, rows: Iterator[str]) -> None:
+    with open(path, "w") as f:
+        f.write("type, client, tx, amount\n")
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= 100_000:
+                f.writelines(chunk)
+                chunk = []
+        f.writelines(chunk)
+
+
+def _valid_rows(
+    rng: random.Random, num_rows: int, pick_client: Callable[[], int], dispute_rate: float, chargeback_rate: float = 0.0
+) -> Iterator[str]:
+    """
+    Deposits, withdrawals, disputes, resolves and chargebacks in a valid per-client order.
+    chargeback_rate is the share of settled disputes charged back; each one locks its client.
+    """
+    open_deposits: Dict[int, list] = {}
+    disputed: Dict[int, list] = {}
+    tx_id = 1
+    for _ in range(num_rows):
+        client_id = pick_client()
+        roll = rng.random()
+        client_disputed = disputed.get(client_id)
+        client_deposits = open_deposits.get(client_id)
+        if client_disputed and roll < dispute_rate / 2:
+            kind = "chargeback" if rng.random() < chargeback_rate else "resolve"
+            yield f"{kind}, {client_id}, {client_disputed.pop()},\n"
+        elif client_deposits and roll < dispute_rate:
+            disputed_tx = client_deposits.pop()
+            disputed.setdefault(client_id, []).append(disputed_tx)
+            yield f"dispute, {client_id}, {disputed_tx},\n"
+        elif roll < dispute_rate + (1 - dispute_rate) / 3:
+            yield f"withdrawal, {client_id}, {tx_id}, 1.0\n"
+            tx_id += 1
+        else:
+            yield f"deposit, {client_id}, {tx_id}, 10.0\n"
+            open_deposits.setdefault(client_id, []).append(tx_id)
+            tx_id += 1
+
+
+def write_uniform(path: str, num_rows: int, num_clients: int, seed: int = 7) -> None:
+    write_workload(path, num_rows, num_clients, seed)
+
+
+def write_zipf(path: str, num_rows: int, num_clients: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    cumulative = list(itertools.accumulate(1 / rank ** ZIPF_EXPONENT for rank in range(1, num_clients + 1)))
+    total = cumulative[-1]
+    # Hot ranks map to scattered client ids rather than 1, 2, 3...
+    client_ids = list(range(1, num_clients + 1))
+    rng.shuffle(client_ids)
+
+    def pick_client() -> int:
+        return client_ids[bisect.bisect_left(cumulative, rng.random() * total)]
+
+    _write_rows(path, _valid_rows(rng, num_rows, pick_client, dispute_rate=0.2))
+
+
+def write_dispute_heavy(path: str, num_rows: int, num_clients: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    _write_rows(path, _valid_rows(rng, num_rows, lambda: rng.randint(1, num_clients), dispute_rate=0.5, chargeback_rate=0.01))
+
+
+def write_out_of_order(path: str, num_rows: int, num_clients: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    rows = _valid_rows(rng, num_rows, lambda: rng.randint(1, num_clients), dispute_rate=0.3)
+
+    def delayed() -> Iterator[str]:
+        held = []
+        for position, row in enumerate(rows):
+            if row.startswith(("deposit", "dispute")) and rng.random() < 0.5:
+                heapq.heappush(held, (position + rng.randint(1, OUT_OF_ORDER_DELAY), position, row))
+            else:
+                yield row
+            while held and held[0][0] <= position:
+                yield heapq.heappop(held)[2]
+        while held:
+            yield heapq.heappop(held)[2]
+
+    # Held rows displace others, so trim back to num_rows
+    _write_rows(path, itertools.islice(delayed(), num_rows))
+
+
+def write_invalid(path: str, num_rows: int, num_clients: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    valid = _valid_rows(rng, num_rows, lambda: rng.randint(1, num_clients), dispute_rate=0.2)
+    malformed = (
+        "transfer, {client}, {tx}, 1.0\n",
+        "deposit, {client}, {tx}, abc\n",
+        "deposit, {client}, {tx}, -5.0\n",
+        "withdrawal, {client}, {tx}\n",
+        "deposit, x{client}, {tx}, 1.0\n",
+        "deposit, {client}\n",
+    )
+
+    def rows() -> Iterator[str]:
+        tx_id = 10 * num_rows
+        for _ in range(num_rows):
+            if rng.random() < INVALID_FRACTION:
+                tx_id += 1
+                yield rng.choice(malformed).format(client=rng.randint(1, num_clients), tx=tx_id)
+            else:
+                yield next(valid)
+
+    _write_rows(path, rows())
+
+
+PROFILES: Dict[str, Callable[..., None]] = {
+    "uniform": write_uniform,
+    "zipf": write_zipf,
+    "dispute_heavy": write_dispute_heavy,
+    "out_of_order": write_out_of_order,
+    "invalid": write_invalid,
+}
@@ -0,0 +1,121 @@
+import argparse
+import mmap
+import struct
+from decimal import Decimal
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from csv_ingest import READ_CHUNK_BYTES, iter_transaction_chunks
+from models import Transaction, TransactionType
+from money import fixed_to_decimal
+
+# File layout: MAGIC, then one fixed-width record per transaction:
+# u8 type code, u16 client, u32 tx, i64 amount in fixed-point units (money.py),
+# little-endian and unpadded (15 bytes). NO_AMOUNT marks a missing amount.
+MAGIC = b"TPBIN01\n"
+RECORD = struct.Struct("<BHIq")
+NO_AMOUNT = -(1 << 63)
+TYPES = list(TransactionType)
+TYPE_CODES = {transaction_type: code for code, transaction_type in enumerate(TYPES)}
+MAX_CLIENT_ID = (1 << 16) - 1
+MAX_TRANSACTION_ID = (1 << 32) - 1
+MAX_CACHED_AMOUNTS = 1 << 16
+
+
+def is_binary_file(filepath: str) -> bool:
+    """True if the file starts with the binary transaction format's magic."""
+    with open(filepath, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def convert_csv(csv_path: str, binary_path: str) -> int:
+    """
+    Convert a transactions CSV to the binary format; returns the number of records.
+
+    Rows are parsed as in fixed-point mode, so malformed rows (including amounts
+    with more than four decimals) are logged and dropped. Ids that do not fit
+    u16/u32 raise ValueError.
+    """
+    count = 0
+    with open(csv_path, "rb") as src, open(binary_path, "wb") as dst:
+        dst.write(MAGIC)
+        pack = RECORD.pack
+        for _, _, transactions in iter_transaction_chunks(src, fixed_point=True):
+            records = []
+            for transaction in transactions:
+                if not (0 <= transaction.client_id <= MAX_CLIENT_ID and 0 <= transaction.transaction_id <= MAX_TRANSACTION_ID):
+                    raise ValueError(f"{transaction} does not fit the binary format (u16 client, u32 tx)")
+                amount = NO_AMOUNT if transaction.amount is None else transaction.amount
+                records.append(
+                    pack(TYPE_CODES[transaction.transaction_type], transaction.client_id, transaction.transaction_id, amount)
+                )
+            dst.write(b"".join(records))
+            count += len(records)
+    return count
+
+
+def iter_binary_chunks(
+    f: BinaryIO, start_offset: Optional[int] = None, read_chunk_bytes: int = READ_CHUNK_BYTES, fixed_point: bool = False
+) -> Iterator[Tuple[int, int, List[Transaction]]]:
+    """
+    Yield (start_offset, end_offset, transactions) per chunk of a binary
+    transactions file opened in binary mode, like csv_ingest.iter_transaction_chunks.
+
+    The file is memory-mapped and records are unpacked straight from the
+    mapping with struct; there is no text decoding or splitting. Chunks hold
+    whole records, about read_chunk_bytes each. Amounts are Decimals, or ints
+    with fixed_point=True. A start_offset must fall on a record boundary.
+    """
+    start = len(MAGIC) if start_offset is None else start_offset
+    if (start - len(MAGIC)) % RECORD.size:
+        raise ValueError(f"offset {start} is not on a record boundary")
+    f.seek(0, 2)
+    size = f.tell()
+    if size <= start:
+        return
+    f.seek(0)
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a binary transactions file")
+    if (size - len(MAGIC)) % RECORD.size:
+        raise ValueError(f"truncated binary transactions file ({size} bytes)")
+
+    chunk_bytes = max(1, read_chunk_bytes // RECORD.size) * RECORD.size
+    decimals: Dict[int, Decimal] = {}
+    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        while start < size:
+            end = min(start + chunk_bytes, size)
+            with memoryview(data)[start:end] as view:
+                if fixed_point:
+                    transactions = [
+                        Transaction(TYPES[code], client_id, transaction_id, None if amount == NO_AMOUNT else amount)
+                        for code, client_id, transaction_id, amount in RECORD.iter_unpack(view)
+                    ]
+                else:
+                    transactions = []
+                    append = transactions.append
+                    for code, client_id, transaction_id, amount in RECORD.iter_unpack(view):
+                        if amount == NO_AMOUNT:
+                            value = None
+                        else:
+                            value = decimals.get(amount)
+                            if value is None:
+                                if len(decimals) >= MAX_CACHED_AMOUNTS:
+                                    decimals.clear()
+                                value = decimals[amount] = fixed_to_decimal(amount)
+                        append(Transaction(TYPES[code], client_id, transaction_id, value))
+            yield start, end, transactions
+            start = end
+    finally:
+        data.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a transactions CSV to the binary input format.")
+    parser.add_argument("input", help="transactions CSV file")
+    parser.add_argument("output", help="binary file to write")
+    args = parser.parse_args()
+    print(f"Wrote {convert_csv(args.input, args.output)} records to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import bz2
+import gzip
+import io
+import lzma
+import queue
+import threading
+from typing import BinaryIO, Optional, Union
+
+from csv_ingest import READ_CHUNK_BYTES
+
+# Leading bytes of each supported compressed format
+COMPRESSION_MAGIC = {
+    "gz": b"\x1f\x8b",
+    "bz2": b"BZh",
+    "xz": b"\xfd7zXZ\x00",
+}
+OPENERS = {"gz": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+
+
+def compression_of(filepath: str) -> Optional[str]:
+    """The compression format of a file ("gz", "bz2" or "xz"), detected by magic, or None."""
+    with open(filepath, "rb") as f:
+        head = f.read(max(len(magic) for magic in COMPRESSION_MAGIC.values()))
+    for compression, magic in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def open_input(filepath: str, buffer_bytes: int = READ_CHUNK_BYTES) -> BinaryIO:
+    """
+    Open an input file for binary reading, decompressing it on the fly if it
+    is gzip, bzip2 or xz compressed (see DecompressingReader).
+    """
+    compression = compression_of(filepath)
+    if compression is None:
+        return open(filepath, "rb")
+    return io.BufferedReader(DecompressingReader(filepath, compression, buffer_bytes), buffer_size=buffer_bytes)
+
+
+class DecompressingReader(io.RawIOBase):
+    """
+    Read-only raw stream of the decompressed contents of a compressed file.
+
+    A background thread decompresses buffer_bytes at a time into a queue of
+    at most max_buffers blocks, so decompression overlaps with parsing and
+    processing and memory stays bounded. zlib, bz2 and lzma release the GIL
+    while they work, so the thread does not compete with the reader for it.
+
+    tell() is the position in the decompressed stream. seek() only moves
+    forward, by reading and discarding, which is enough to resume at a
+    journaled offset.
+    """
+
+    def __init__(self, filepath: str, compression: str, buffer_bytes: int = READ_CHUNK_BYTES, max_buffers: int = 4):
+        super().__init__()
+        self._blocks: "queue.Queue[Union[bytes, BaseException]]" = queue.Queue(maxsize=max_buffers)
+        self._stop = threading.Event()
+        self._block = memoryview(b"")
+        self._position = 0
+        self._eof = False
+        self._thread = threading.Thread(
+            target=self._decompress, args=(filepath, compression, buffer_bytes), name="decompress", daemon=True
+        )
+        self._thread.start()
+
+    def _decompress(self, filepath: str, compression: str, buffer_bytes: int) -> None:
+        try:
+            with OPENERS[compression](filepath, "rb") as f:
+                while True:
+                    block = f.read(buffer_bytes)
+                    # An empty block marks the end of the stream
+                    if not self._put(block) or not block:
+                        return
+        except Exception as error:
+            self._put(error)
+
+    def _put(self, item: Union[bytes, BaseException]) -> bool:
+        """Queue an item unless the reader was closed first."""
+        while not self._stop.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self._block:
+            if self._eof:
+                return 0
+            item = self._blocks.get()
+            if isinstance(item, BaseException):
+                self._eof = True
+                raise item
+            if not item:
+                self._eof = True
+                return 0
+            self._block = memoryview(item)
+        size = min(len(buffer), len(self._block))
+        buffer[:size] = self._block[:size]
+        self._block = self._block[size:]
+        self._position += size
+        return size
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("compressed input can only seek forward from the start or current position")
+        if offset < self._position:
+            raise io.UnsupportedOperation("compressed input can only seek forward")
+        scratch = bytearray(min(offset - self._position, 1 << 20))
+        while self._position < offset:
+            if not self.readinto(memoryview(scratch)[:offset - self._position]):
+                break
+        return self._position
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+        super().close()
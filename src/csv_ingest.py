@@ -0,0 +1,217 @@
+import csv
+import logging
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from models import Transaction, TransactionType
+from money import Amount, parse_fixed
+
+logger = logging.getLogger(__name__)
+
+# Bytes requested per readlines() call. Large reads amortize I/O and decoding.
+READ_CHUNK_BYTES = 1 << 20
+
+REQUIRED_COLUMNS = ("type", "client", "tx")
+
+
+class CsvTransactionParser:
+    """
+    Parses raw CSV lines into Transactions by position.
+
+    The header is resolved to column indices once, so rows are split with
+    str.split instead of going through csv.DictReader and a normalized dict.
+    Lines containing quotes fall back to the csv module.
+
+    Raw type and amount fields are cached: inputs use a handful of type
+    spellings and typically repeat amounts, so most rows reuse an existing
+    TransactionType and Decimal (both immutable) instead of building new ones.
+
+    With fixed_point=True amounts are parsed straight to int units of 1e-4
+    (money.parse_fixed); amounts with more than four decimals are malformed.
+    """
+
+    MAX_CACHED_AMOUNTS = 1 << 16
+    MAX_CACHED_TYPES = 1 << 10
+
+    def __init__(self, fieldnames: List[str], fixed_point: bool = False):
+        self._fieldnames = fieldnames
+        self._fixed_point = fixed_point
+        columns = {name.strip(): index for index, name in enumerate(fieldnames)}
+        self._type_column = columns.get("type")
+        self._client_column = columns.get("client")
+        self._tx_column = columns.get("tx")
+        self._amount_column = columns.get("amount")
+        self._missing_column = next((name for name in REQUIRED_COLUMNS if name not in columns), None)
+        self._type_cache: Dict[str, TransactionType] = {}
+        self._amount_cache: Dict[str, Optional[Amount]] = {}
+
+    @property
+    def client_column(self) -> Optional[int]:
+        return self._client_column
+
+    def parse_line(self, line: str) -> Optional[Transaction]:
+        """Parse one raw line. Returns None for blank lines and malformed rows (logged)."""
+        line = line.rstrip("\r\n")
+        if not line:
+            return None
+
+        if '"' in line:
+            fields = next(csv.reader([line]), [])
+        else:
+            fields = line.split(",")
+
+        try:
+            if self._missing_column is not None:
+                raise KeyError(self._missing_column)
+
+            transaction_type = self._type_cache.get(fields[self._type_column])
+            if transaction_type is None:
+                transaction_type = self._parse_type(fields[self._type_column])
+            client_id = int(fields[self._client_column])
+            transaction_id = int(fields[self._tx_column])
+
+            amount = None
+            if self._amount_column is not None and self._amount_column < len(fields):
+                amount_str = fields[self._amount_column]
+                if amount_str in self._amount_cache:
+                    amount = self._amount_cache[amount_str]
+                else:
+                    amount = self._parse_amount(amount_str)
+
+            return Transaction(
+                transaction_type=transaction_type,
+                client_id=client_id,
+                transaction_id=transaction_id,
+                amount=amount,
+            )
+        except IndexError:
+            row = dict(zip(self._fieldnames, fields))
+            logger.warning(f"Failed to parse row {row}: missing fields")
+            return None
+        except (KeyError, ValueError) as e:
+            row = dict(zip(self._fieldnames, fields))
+            logger.warning(f"Failed to parse row {row}: {e}")
+            return None
+
+    def parse_lines(self, lines: List[str]) -> List[Transaction]:
+        """
+        Parse a chunk of raw lines, dropping blank and malformed ones.
+
+        Well-formed unquoted rows are handled inline; anything else (blank,
+        quoted, short or malformed) goes through parse_line, which owns the
+        error reporting.
+        """
+        parse_line = self.parse_line
+        transactions = []
+        append = transactions.append
+
+        if self._missing_column is not None or self._amount_column is None:
+            for line in lines:
+                transaction = parse_line(line)
+                if transaction is not None:
+                    append(transaction)
+            return transactions
+
+        type_column = self._type_column
+        client_column = self._client_column
+        tx_column = self._tx_column
+        amount_column = self._amount_column
+        min_fields = max(type_column, client_column, tx_column, amount_column) + 1
+        type_cache = self._type_cache
+        amount_cache = self._amount_cache
+        parse_type = self._parse_type
+        parse_amount = self._parse_amount
+
+        for line in lines:
+            fields = line.split(",")
+            if len(fields) >= min_fields and '"' not in line:
+                try:
+                    transaction_type = type_cache.get(fields[type_column]) or parse_type(fields[type_column])
+                    amount_str = fields[amount_column]
+                    amount = amount_cache[amount_str] if amount_str in amount_cache else parse_amount(amount_str)
+                    append(Transaction(transaction_type, int(fields[client_column]), int(fields[tx_column]), amount))
+                    continue
+                except (KeyError, ValueError):
+                    pass
+            transaction = parse_line(line)
+            if transaction is not None:
+                append(transaction)
+        return transactions
+
+    def _parse_type(self, raw: str) -> TransactionType:
+        transaction_type = TransactionType(raw.strip().lower())
+        if len(self._type_cache) < self.MAX_CACHED_TYPES:
+            self._type_cache[raw] = transaction_type
+        return transaction_type
+
+    def _parse_amount(self, raw: str) -> Optional[Amount]:
+        amount_str = raw.strip()
+        if not amount_str:
+            amount = None
+        elif self._fixed_point:
+            amount = parse_fixed(amount_str)
+        else:
+            try:
+                amount = Decimal(amount_str)
+            except InvalidOperation:
+                raise ValueError(f"invalid amount {amount_str!r}")
+
+        if len(self._amount_cache) >= self.MAX_CACHED_AMOUNTS:
+            self._amount_cache.clear()
+        self._amount_cache[raw] = amount
+        return amount
+
+
+def read_header(f: TextIO) -> Optional[List[str]]:
+    """Read the header line. Returns None for an empty file."""
+    header_line = f.readline()
+    if not header_line:
+        return None
+    return next(csv.reader([header_line]), [])
+
+
+def iter_transaction_batches(
+    f: TextIO, read_chunk_bytes: int = READ_CHUNK_BYTES, fixed_point: bool = False
+) -> Iterator[List[Transaction]]:
+    """Yield lists of Transactions parsed from an open CSV file, one list per read chunk."""
+    fieldnames = read_header(f)
+    if fieldnames is None:
+        return
+    parser = CsvTransactionParser(fieldnames, fixed_point=fixed_point)
+    while True:
+        lines = f.readlines(read_chunk_bytes)
+        if not lines:
+            return
+        transactions = parser.parse_lines(lines)
+        if transactions:
+            yield transactions
+
+
+def iter_transaction_chunks(
+    f: BinaryIO, start_offset: Optional[int] = None, read_chunk_bytes: int = READ_CHUNK_BYTES, fixed_point: bool = False
+) -> Iterator[Tuple[int, int, List[Transaction]]]:
+    """
+    Yield (start_offset, end_offset, transactions) per read chunk of a CSV file
+    opened in binary mode. Offsets are byte positions in the file, so reading
+    can later resume at a chunk's end_offset (pass it as start_offset; the
+    header is still read from the top). Chunks without valid rows are yielded too.
+    """
+    header_line = f.readline()
+    if not header_line:
+        return
+    parser = CsvTransactionParser(next(csv.reader([header_line.decode()]), []), fixed_point=fixed_point)
+    if start_offset is not None:
+        f.seek(start_offset)
+    while True:
+        start = f.tell()
+        lines = f.readlines(read_chunk_bytes)
+        if not lines:
+            return
+        yield start, f.tell(), parser.parse_lines([line.decode() for line in lines])
+
+
+def iter_transactions(filepath: str, fixed_point: bool = False) -> Iterator[Transaction]:
+    """Yield Transactions from a CSV file in file order."""
+    with open(filepath, "r") as f:
+        for batch in iter_transaction_batches(f, fixed_point=fixed_point):
+            yield from batch
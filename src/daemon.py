@@ -0,0 +1,136 @@
+import argparse
+import io
+import json
+import logging
+import os
+import shutil
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from models import ClientAccount
+from output import write_accounts
+from payments_engine import PaymentsEngine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_JOBS = 4
+
+
+class PaymentsDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Long-lived server that runs payment jobs submitted over a Unix socket.
+
+    The interpreter, imports and allocator stay warm between jobs, so a small
+    job costs its processing time instead of a Python startup. Every job gets
+    a fresh engine from engine_factory (called with fixed_point), so jobs run
+    concurrently in isolated state. At most max_jobs run at a time; further
+    jobs wait for a slot.
+
+    Protocol, one job per connection. The client sends a JSON header line:
+        {"input": "/abs/path.csv"}  process a file the daemon can read
+        {"rows": true}              process the CSV bytes that follow, until EOF
+    plus optional "fixed_point": true. The daemon answers with a JSON status
+    line, {"status": "ok", "processed": .., "failed": .., "parked": ..} followed
+    by the accounts CSV, or {"status": "error", "error": "..."}.
+
+    Streamed rows are spooled to a temporary file before the job takes a
+    slot, since the engine reads its input from a file.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: str,
+        max_jobs: int = DEFAULT_MAX_JOBS,
+        engine_factory: Callable[..., PaymentsEngine] = PaymentsEngine,
+    ):
+        self._slots = threading.BoundedSemaphore(max_jobs)
+        self._engine_factory = engine_factory
+        _remove_stale_socket(socket_path)
+        super().__init__(socket_path, _JobHandler)
+
+    def run_job(self, request: dict, rows: Optional[io.BufferedIOBase]) -> Tuple[dict, Dict[int, ClientAccount]]:
+        """Run one job; rows is the connection's input stream for {"rows": true} jobs."""
+        fixed_point = bool(request.get("fixed_point", False))
+        if request.get("rows"):
+            with tempfile.NamedTemporaryFile(prefix="payments-job-", suffix=".csv") as spool:
+                shutil.copyfileobj(rows, spool, 1 << 20)
+                spool.flush()
+                return self._process(spool.name, fixed_point)
+        if "input" in request:
+            return self._process(request["input"], fixed_point)
+        raise ValueError('job needs "input" or "rows"')
+
+    def _process(self, filepath: str, fixed_point: bool) -> Tuple[dict, Dict[int, ClientAccount]]:
+        if not os.path.isfile(filepath):
+            raise FileNotFoundError(f"no such input file: {filepath}")
+        with self._slots:
+            engine = self._engine_factory(fixed_point=fixed_point)
+            accounts = engine.process_file(filepath)
+        stats = engine.stats
+        return {"status": "ok", "processed": stats.processed, "failed": stats.failed, "parked": stats.parked}, accounts
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except FileNotFoundError:
+            pass
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+            if not isinstance(request, dict):
+                raise ValueError("job header must be a JSON object")
+            status, accounts = self.server.run_job(request, self.rfile)
+        except (OSError, ValueError) as error:
+            self._reply({"status": "error", "error": str(error)})
+            return
+        except Exception as error:
+            logger.exception("Job failed")
+            self._reply({"status": "error", "error": f"{type(error).__name__}: {error}"})
+            return
+        self._reply(status)
+        write_accounts(accounts, self.wfile)
+
+    def _reply(self, status: dict) -> None:
+        self.wfile.write(json.dumps(status).encode() + b"\n")
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """Remove a socket file left by a daemon that is gone; refuse to replace a live one."""
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except ConnectionRefusedError:
+            os.unlink(socket_path)
+            return
+    raise OSError(f"a daemon is already listening on {socket_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="daemon.py", description="Serve payment jobs over a Unix socket.")
+    parser.add_argument("--socket", required=True, metavar="PATH", help="Unix socket to listen on")
+    parser.add_argument("--max-jobs", type=int, default=DEFAULT_MAX_JOBS, help="jobs run at the same time (default: %(default)s)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s", stream=sys.stderr)
+    with PaymentsDaemon(args.socket, max_jobs=args.max_jobs) as daemon:
+        print(f"Listening on {args.socket}", file=sys.stderr)
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import json
+import os
+import shutil
+import socket
+import sys
+from typing import BinaryIO, Optional, Tuple
+
+
+def submit(
+    socket_path: str, input_path: Optional[str] = None, rows: Optional[BinaryIO] = None, fixed_point: bool = False
+) -> Tuple[dict, bytes]:
+    """
+    Submit a job to a running daemon (daemon.py) and wait for it.
+    Pass input_path to have the daemon read a file, or rows to stream CSV bytes.
+    Returns the status and the accounts CSV (empty on error).
+    """
+    if (input_path is None) == (rows is None):
+        raise ValueError("pass exactly one of input_path and rows")
+    request = {"fixed_point": fixed_point}
+    if input_path is not None:
+        request["input"] = os.path.abspath(input_path)
+    else:
+        request["rows"] = True
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        with sock.makefile("wb") as out:
+            out.write(json.dumps(request).encode() + b"\n")
+            if rows is not None:
+                shutil.copyfileobj(rows, out, 1 << 20)
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile("rb") as response:
+            status = json.loads(response.readline())
+            return status, response.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="daemon_client.py", description="Submit a payments job to daemon.py.")
+    parser.add_argument("input", help="transactions file for the daemon to read, or - to stream stdin")
+    parser.add_argument("--socket", required=True, metavar="PATH", help="the daemon's Unix socket")
+    parser.add_argument("--fixed-point", action="store_true", help="process with fixed-point amounts")
+    parser.add_argument("-o", "--output", metavar="PATH", help="write the accounts CSV to PATH instead of stdout")
+    args = parser.parse_args()
+
+    if args.input == "-":
+        status, accounts_csv = submit(args.socket, rows=sys.stdin.buffer, fixed_point=args.fixed_point)
+    else:
+        status, accounts_csv = submit(args.socket, input_path=args.input, fixed_point=args.fixed_point)
+    if status["status"] != "ok":
+        print(f"error: {status['error']}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Processed: {status['processed']}, Failed: {status['failed']}, Parked: {status['parked']}", file=sys.stderr)
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(accounts_csv)
+    else:
+        sys.stdout.buffer.write(accounts_csv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,611 @@
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import weakref
+from array import array
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, Iterator, Optional, Set
+
+from models import Transaction, TransactionType
+from money import decimal_to_fixed, fixed_to_decimal
+
+# Column limits of CompactTransactionHistory. Anything outside them is kept as a full Transaction.
+MAX_TRANSACTION_ID = (1 << 32) - 1
+MAX_CLIENT_ID = (1 << 16) - 1
+MAX_AMOUNT_UNITS = (1 << 63) - 1
+
+
+class TransactionHistory:
+    """
+    Dict-backed transaction history: full Transaction objects keyed by tx id,
+    disputed tx ids in a set. Not locked; relies on the GIL for dict/set ops.
+    """
+
+    def __init__(self, fixed_point: bool = False):
+        self._transactions: Dict[int, Transaction] = {}
+        self._disputed_transaction_ids: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._transactions)
+
+    def put(self, transaction: Transaction) -> None:
+        self._transactions[transaction.transaction_id] = transaction
+
+    def get(self, transaction_id: int) -> Optional[Transaction]:
+        return self._transactions.get(transaction_id)
+
+    def mark_disputed(self, transaction_id: int) -> None:
+        self._disputed_transaction_ids.add(transaction_id)
+
+    def is_disputed(self, transaction_id: int) -> bool:
+        return transaction_id in self._disputed_transaction_ids
+
+    def clear_disputed(self, transaction_id: int) -> None:
+        self._disputed_transaction_ids.discard(transaction_id)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        return iter(list(self._transactions.values()))
+
+
+def _amount_units(amount) -> Optional[int]:
+    """Amount as i64 fixed-point units, or None if it has none or doesn't fit."""
+    if amount is None:
+        return None
+    if isinstance(amount, Decimal):
+        try:
+            amount = decimal_to_fixed(amount)
+        except ValueError:
+            return None
+    if not -MAX_AMOUNT_UNITS <= amount <= MAX_AMOUNT_UNITS:
+        return None
+    return amount
+
+
+# Kind codes of the compact table. 0 marks an empty slot.
+_EMPTY = 0
+_KIND_CODES = {TransactionType.DEPOSIT: 1, TransactionType.WITHDRAWAL: 2}
+_KIND_TYPES = {code: transaction_type for transaction_type, code in _KIND_CODES.items()}
+
+# Fibonacci hashing spreads sequential tx ids across the table
+_HASH_MULTIPLIER = 0x9E3779B1
+
+
+class CompactTransactionHistory:
+    """
+    Transaction history keeping only what disputes need, in typed columns.
+
+    An open-addressing table (linear probing) keyed by u32 tx id with parallel
+    columns: u32 tx id, u8 kind, u16 client id, i64 fixed-point amount, plus a
+    bitmap of disputed slots. That is 15 bytes and one bit per slot, against a
+    dict entry plus a Transaction object per stored transaction in
+    TransactionHistory. get() rebuilds a Transaction on demand, which only
+    happens for disputes, resolves and chargebacks (and idempotency checks).
+
+    Transactions that don't fit the columns (tx id beyond u32, client beyond
+    u16, Decimal amounts with more than four decimals, other kinds) are kept
+    whole in a small side dict, so lookups stay exact for any input.
+
+    Writers serialize on a lock. Readers don't lock: a resize builds new
+    columns and publishes them with a single attribute assignment, and an
+    insert writes the kind column last, so a reader never sees a half-written slot.
+    """
+
+    INITIAL_CAPACITY = 1 << 10
+    MAX_LOAD_FACTOR = 0.75
+
+    def __init__(self, fixed_point: bool = False, initial_capacity: int = INITIAL_CAPACITY):
+        self._fixed_point = fixed_point
+        self._lock = threading.Lock()
+        self._count = 0
+        self._table = self._new_table(max(initial_capacity, 8))
+        self._spilled: Dict[int, Transaction] = {}
+        self._spilled_disputes: Set[int] = set()
+
+    @staticmethod
+    def _new_table(capacity: int):
+        capacity = 1 << (capacity - 1).bit_length()
+        return (
+            capacity - 1,
+            array("I", bytes(4 * capacity)),
+            bytearray(capacity),
+            array("H", bytes(2 * capacity)),
+            array("q", bytes(8 * capacity)),
+            bytearray(capacity // 8 or 1),
+        )
+
+    def __len__(self) -> int:
+        return self._count + len(self._spilled)
+
+    @property
+    def capacity(self) -> int:
+        return self._table[0] + 1
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the table columns (the spill dict is not counted)."""
+        _, keys, kinds, clients, amounts, disputed = self._table
+        return sum(column.itemsize * len(column) for column in (keys, clients, amounts)) + len(kinds) + len(disputed)
+
+    def put(self, transaction: Transaction) -> None:
+        units = _amount_units(transaction.amount)
+        kind = _KIND_CODES.get(transaction.transaction_type)
+        if (
+            units is None
+            or kind is None
+            or not 0 <= transaction.transaction_id <= MAX_TRANSACTION_ID
+            or not 0 <= transaction.client_id <= MAX_CLIENT_ID
+        ):
+            with self._lock:
+                self._spilled[transaction.transaction_id] = transaction
+            return
+
+        with self._lock:
+            if (self._count + 1) > self.capacity * self.MAX_LOAD_FACTOR:
+                self._resize(self.capacity * 2)
+            _, keys, kinds, clients, amounts, _ = self._table
+            slot = self._find_slot(transaction.transaction_id)
+            if kinds[slot] == _EMPTY:
+                self._count += 1
+            keys[slot] = transaction.transaction_id
+            clients[slot] = transaction.client_id
+            amounts[slot] = units
+            kinds[slot] = kind
+
+    def get(self, transaction_id: int) -> Optional[Transaction]:
+        mask, keys, kinds, clients, amounts, _ = self._table
+        slot = self._lookup(transaction_id, mask, keys, kinds)
+        if slot is None:
+            return self._spilled.get(transaction_id)
+        units = amounts[slot]
+        return Transaction(
+            transaction_type=_KIND_TYPES[kinds[slot]],
+            client_id=clients[slot],
+            transaction_id=transaction_id,
+            amount=units if self._fixed_point else fixed_to_decimal(units),
+        )
+
+    def mark_disputed(self, transaction_id: int) -> None:
+        with self._lock:
+            mask, keys, kinds, _, _, disputed = self._table
+            slot = self._lookup(transaction_id, mask, keys, kinds)
+            if slot is None:
+                self._spilled_disputes.add(transaction_id)
+            else:
+                disputed[slot >> 3] |= 1 << (slot & 7)
+
+    def is_disputed(self, transaction_id: int) -> bool:
+        mask, keys, kinds, _, _, disputed = self._table
+        slot = self._lookup(transaction_id, mask, keys, kinds)
+        if slot is None:
+            return transaction_id in self._spilled_disputes
+        return bool(disputed[slot >> 3] & (1 << (slot & 7)))
+
+    def clear_disputed(self, transaction_id: int) -> None:
+        with self._lock:
+            mask, keys, kinds, _, _, disputed = self._table
+            slot = self._lookup(transaction_id, mask, keys, kinds)
+            if slot is None:
+                self._spilled_disputes.discard(transaction_id)
+            else:
+                disputed[slot >> 3] &= ~(1 << (slot & 7)) & 0xFF
+
+    def __iter__(self) -> Iterator[Transaction]:
+        _, keys, kinds, _, _, _ = self._table
+        for slot, kind in enumerate(kinds):
+            if kind != _EMPTY:
+                yield self.get(keys[slot])
+        yield from list(self._spilled.values())
+
+    @staticmethod
+    def _lookup(transaction_id: int, mask: int, keys: array, kinds: bytearray) -> Optional[int]:
+        if not 0 <= transaction_id <= MAX_TRANSACTION_ID:
+            return None
+        slot = (transaction_id * _HASH_MULTIPLIER) & mask
+        while kinds[slot] != _EMPTY:
+            if keys[slot] == transaction_id:
+                return slot
+            slot = (slot + 1) & mask
+        return None
+
+    def _find_slot(self, transaction_id: int) -> int:
+        """Slot holding transaction_id, or the empty slot it would go in. Caller holds the lock."""
+        mask, keys, kinds, _, _, _ = self._table
+        slot = (transaction_id * _HASH_MULTIPLIER) & mask
+        while kinds[slot] != _EMPTY and keys[slot] != transaction_id:
+            slot = (slot + 1) & mask
+        return slot
+
+    def _resize(self, capacity: int) -> None:
+        """Rehash into new columns and publish them at once. Caller holds the lock."""
+        _, old_keys, old_kinds, old_clients, old_amounts, old_disputed = self._table
+        table = self._new_table(capacity)
+        mask, keys, kinds, clients, amounts, disputed = table
+        for old_slot, kind in enumerate(old_kinds):
+            if kind == _EMPTY:
+                continue
+            transaction_id = old_keys[old_slot]
+            slot = (transaction_id * _HASH_MULTIPLIER) & mask
+            while kinds[slot] != _EMPTY:
+                slot = (slot + 1) & mask
+            keys[slot] = transaction_id
+            clients[slot] = old_clients[old_slot]
+            amounts[slot] = old_amounts[old_slot]
+            kinds[slot] = kind
+            if old_disputed[old_slot >> 3] & (1 << (old_slot & 7)):
+                disputed[slot >> 3] |= 1 << (slot & 7)
+        self._table = table
+
+
+class SeenTransactionIds:
+    """
+    Set of tx ids, for idempotency checks of transactions whose full record
+    isn't kept. Ids in the u32 range are bits of a bitset over that space,
+    allocated in 64 KiB pages (524,288 ids each) on first use, so sequential
+    ids cost one bit each. Other ids go to a side set.
+
+    Writers serialize on a lock, since setting a bit is a read-modify-write
+    of a shared byte. Readers don't lock.
+    """
+
+    PAGE_SHIFT = 19
+    _PAGE_BYTES = (1 << PAGE_SHIFT) // 8
+    _OFFSET_MASK = (1 << PAGE_SHIFT) - 1
+    # Serialized form: page count u32, then (page index u32, page bytes) per
+    # page, then overflow count u32 and the overflow ids as i64
+    _COUNT = struct.Struct("<I")
+    _OVERFLOW_ID = struct.Struct("<q")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pages: Dict[int, bytearray] = {}
+        self._overflow: Set[int] = set()
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the bitset pages (the side set is not counted)."""
+        return len(self._pages) * self._PAGE_BYTES
+
+    def add(self, transaction_id: int) -> None:
+        with self._lock:
+            if not 0 <= transaction_id <= MAX_TRANSACTION_ID:
+                self._overflow.add(transaction_id)
+                return
+            page = self._pages.get(transaction_id >> self.PAGE_SHIFT)
+            if page is None:
+                page = self._pages[transaction_id >> self.PAGE_SHIFT] = bytearray(self._PAGE_BYTES)
+            offset = transaction_id & self._OFFSET_MASK
+            page[offset >> 3] |= 1 << (offset & 7)
+
+    def __contains__(self, transaction_id: int) -> bool:
+        if not 0 <= transaction_id <= MAX_TRANSACTION_ID:
+            return transaction_id in self._overflow
+        page = self._pages.get(transaction_id >> self.PAGE_SHIFT)
+        if page is None:
+            return False
+        offset = transaction_id & self._OFFSET_MASK
+        return bool(page[offset >> 3] & (1 << (offset & 7)))
+
+    def to_bytes(self) -> bytes:
+        with self._lock:
+            out = bytearray(self._COUNT.pack(len(self._pages)))
+            for index, page in self._pages.items():
+                out += self._COUNT.pack(index)
+                out += page
+            out += self._COUNT.pack(len(self._overflow))
+            for transaction_id in self._overflow:
+                out += self._OVERFLOW_ID.pack(transaction_id)
+        return bytes(out)
+
+    def update_from_bytes(self, data: bytes) -> None:
+        """Add every id of a set serialized by to_bytes."""
+        if not data:
+            return
+        with self._lock:
+            (count,) = self._COUNT.unpack_from(data)
+            offset = self._COUNT.size
+            for _ in range(count):
+                (index,) = self._COUNT.unpack_from(data, offset)
+                offset += self._COUNT.size
+                loaded = data[offset:offset + self._PAGE_BYTES]
+                offset += self._PAGE_BYTES
+                page = self._pages.get(index)
+                if page is None:
+                    self._pages[index] = bytearray(loaded)
+                else:
+                    merged = int.from_bytes(page, "little") | int.from_bytes(loaded, "little")
+                    self._pages[index] = bytearray(merged.to_bytes(self._PAGE_BYTES, "little"))
+            (count,) = self._COUNT.unpack_from(data, offset)
+            offset += self._COUNT.size
+            for _ in range(count):
+                self._overflow.add(self._OVERFLOW_ID.unpack_from(data, offset)[0])
+                offset += self._OVERFLOW_ID.size
+
+
+# Cold tier record: tx id i64, client id i64, type code u8, amount in fixed-point units i64
+_COLD_RECORD = struct.Struct("<qqBq")
+# Cold tier index slot: tx id i64, record number + 1 (0 marks an empty slot)
+_INDEX_SLOT = struct.Struct("<qQ")
+_COLD_TYPE_CODES = {transaction_type: code for code, transaction_type in enumerate(TransactionType, 1)}
+_COLD_CODE_TYPES = {code: transaction_type for transaction_type, code in _COLD_TYPE_CODES.items()}
+_I64_MIN, _I64_MAX = -(1 << 63), (1 << 63) - 1
+_HASH_MASK_64 = (1 << 64) - 1
+_BLOOM_MULTIPLIER = 0x9E3779B97F4A7C15
+
+
+class BloomFilter:
+    """
+    Bit array answering "maybe present" or "definitely absent" for int keys.
+    The three bit positions of a key come from one 64-bit multiplicative
+    hash split in two (h1, h1 + h2, h1 + 2 * h2), so a lookup costs one
+    multiply and three bit tests. At 10 bits per key (rounded up to a power
+    of two) at most about 1.7% of absent keys pass.
+    """
+
+    def __init__(self, capacity: int, bits_per_key: int = 10):
+        bits = 1 << max(capacity * bits_per_key - 1, 63).bit_length()
+        self._mask = bits - 1
+        self._array = bytearray(bits // 8)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._array)
+
+    def add(self, key: int) -> None:
+        h = (key * _BLOOM_MULTIPLIER) & _HASH_MASK_64
+        h1, h2, mask, array_ = h & 0xFFFFFFFF, (h >> 32) | 1, self._mask, self._array
+        for position in (h1 & mask, (h1 + h2) & mask, (h1 + 2 * h2) & mask):
+            array_[position >> 3] |= 1 << (position & 7)
+
+    def might_contain(self, key: int) -> bool:
+        h = (key * _BLOOM_MULTIPLIER) & _HASH_MASK_64
+        h1, h2, mask, array_ = h & 0xFFFFFFFF, (h >> 32) | 1, self._mask, self._array
+        position = h1 & mask
+        if not array_[position >> 3] & (1 << (position & 7)):
+            return False
+        position = (h1 + h2) & mask
+        if not array_[position >> 3] & (1 << (position & 7)):
+            return False
+        position = (h1 + 2 * h2) & mask
+        return bool(array_[position >> 3] & (1 << (position & 7)))
+
+
+class _ColdTier:
+    """
+    Append-only file of fixed-size transaction records, read through mmap,
+    with an mmapped open-addressing index file from tx id to record number
+    and a Bloom filter in front of the index. The index (and the filter,
+    sized to it) is rebuilt from the records at twice the size when it
+    passes MAX_LOAD_FACTOR. Not locked; TieredTransactionHistory serializes access.
+    """
+
+    INITIAL_SLOTS = 1 << 16
+    MAX_LOAD_FACTOR = 0.5
+
+    def __init__(self, directory: str, fixed_point: bool):
+        self._fixed_point = fixed_point
+        self._data = open(os.path.join(directory, "cold.dat"), "w+b")
+        self._data_map: Optional[mmap.mmap] = None
+        self._mapped_records = 0
+        self._index_file = open(os.path.join(directory, "cold.idx"), "w+b")
+        self._index_map: Optional[mmap.mmap] = None
+        self.count = 0
+        self._build_index(self.INITIAL_SLOTS)
+
+    @property
+    def filter_bytes(self) -> int:
+        return self._bloom.nbytes
+
+    def append(self, transaction: Transaction) -> bool:
+        """Append a transaction. False if it doesn't fit a cold record (the caller keeps it)."""
+        units = _amount_units(transaction.amount)
+        if (
+            units is None
+            or not _I64_MIN <= transaction.transaction_id <= _I64_MAX
+            or not _I64_MIN <= transaction.client_id <= _I64_MAX
+        ):
+            return False
+        self._data.write(_COLD_RECORD.pack(
+            transaction.transaction_id, transaction.client_id, _COLD_TYPE_CODES[transaction.transaction_type], units
+        ))
+        self.count += 1
+        if self.count > self._slots * self.MAX_LOAD_FACTOR:
+            self._build_index(self._slots * 2)
+        else:
+            self._index(transaction.transaction_id, self.count - 1)
+        return True
+
+    def get(self, transaction_id: int) -> Optional[Transaction]:
+        if not self._bloom.might_contain(transaction_id):
+            return None
+        slot = (transaction_id * _HASH_MULTIPLIER) & self._mask
+        index_map = self._index_map
+        while True:
+            key, record = _INDEX_SLOT.unpack_from(index_map, slot * _INDEX_SLOT.size)
+            if record == 0:
+                return None
+            if key == transaction_id:
+                return self._read(record - 1)
+            slot = (slot + 1) & self._mask
+
+    def read(self, record: int) -> Transaction:
+        """The transaction in a record, numbered in append order from 0."""
+        return self._read(record)
+
+    def close(self) -> None:
+        for mapped in (self._data_map, self._index_map):
+            if mapped is not None:
+                mapped.close()
+        self._data.close()
+        self._index_file.close()
+
+    def _read(self, record: int) -> Transaction:
+        if record >= self._mapped_records:
+            self._remap()
+        transaction_id, client_id, code, units = _COLD_RECORD.unpack_from(self._data_map, record * _COLD_RECORD.size)
+        return Transaction(
+            transaction_type=_COLD_CODE_TYPES[code],
+            client_id=client_id,
+            transaction_id=transaction_id,
+            amount=units if self._fixed_point else fixed_to_decimal(units),
+        )
+
+    def _remap(self) -> None:
+        """Map the data file again to cover records appended since the last mapping."""
+        self._data.flush()
+        if self._data_map is not None:
+            self._data_map.close()
+        self._data_map = mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mapped_records = len(self._data_map) // _COLD_RECORD.size
+
+    def _index(self, transaction_id: int, record: int) -> None:
+        slot = (transaction_id * _HASH_MULTIPLIER) & self._mask
+        index_map = self._index_map
+        while _INDEX_SLOT.unpack_from(index_map, slot * _INDEX_SLOT.size)[1] != 0:
+            slot = (slot + 1) & self._mask
+        _INDEX_SLOT.pack_into(index_map, slot * _INDEX_SLOT.size, transaction_id, record + 1)
+        self._bloom.add(transaction_id)
+
+    def _build_index(self, slots: int) -> None:
+        if self._index_map is not None:
+            self._index_map.close()
+        self._slots = slots
+        self._mask = slots - 1
+        self._bloom = BloomFilter(int(slots * self.MAX_LOAD_FACTOR))
+        self._index_file.truncate(0)
+        self._index_file.truncate(slots * _INDEX_SLOT.size)
+        self._index_map = mmap.mmap(self._index_file.fileno(), 0)
+        if self.count:
+            self._remap()
+            for record, (transaction_id, _, _, _) in enumerate(_COLD_RECORD.iter_unpack(self._data_map)):
+                self._index(transaction_id, record)
+
+
+class TieredTransactionHistory:
+    """
+    Transaction history with a bounded in-memory hot tier and a disk-backed
+    cold tier, for runs whose history outgrows memory.
+
+    The hot tier holds up to hot_capacity Transactions in LRU order: puts and
+    lookups move an entry to the back, and the entry at the front (least
+    recently used, or oldest if never looked up) is evicted to the cold tier
+    once the tier is full. The cold tier is an append-only file of fixed-size
+    records under directory (a temporary directory by default), read through
+    mmap and indexed by tx id in an mmapped hash table. A Bloom filter in
+    front of the index answers most lookups of unknown ids, such as the
+    idempotency check of every new deposit, without touching disk. A cold hit
+    is promoted back to the hot tier, since disputes come in sequences.
+
+    Memory is bounded by hot_capacity plus about 1.25 bytes of filter per cold
+    entry. Disputed tx ids are kept in a set, as few are open at a time.
+    Transactions whose amount doesn't fit i64 fixed-point units stay in
+    memory in a side dict, as in CompactTransactionHistory.
+
+    A tx id is stored once (TransactionProcessor looks it up before storing),
+    so put() doesn't check the cold tier for an older copy.
+
+    Files are removed by close() or when the history is garbage collected.
+    All operations serialize on one lock, since lookups reorder the LRU.
+    """
+
+    DEFAULT_HOT_CAPACITY = 1_000_000
+
+    def __init__(self, fixed_point: bool = False, hot_capacity: int = DEFAULT_HOT_CAPACITY, directory: Optional[str] = None):
+        self._hot_capacity = hot_capacity
+        self._lock = threading.Lock()
+        self._hot: "OrderedDict[int, Transaction]" = OrderedDict()
+        # Hot entries also in the cold tier (promoted by a lookup), not appended again on eviction
+        self._promoted: Set[int] = set()
+        self._spilled: Dict[int, Transaction] = {}
+        self._disputed_transaction_ids: Set[int] = set()
+        self._directory = tempfile.mkdtemp(prefix="toy-payments-history-", dir=directory)
+        self._cold = _ColdTier(self._directory, fixed_point)
+        self._closer = weakref.finalize(self, _close_cold_tier, self._cold, self._directory)
+
+    def __len__(self) -> int:
+        return len(self._hot) - len(self._promoted) + len(self._spilled) + self._cold.count
+
+    @property
+    def hot_count(self) -> int:
+        return len(self._hot)
+
+    @property
+    def cold_count(self) -> int:
+        return self._cold.count
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def put(self, transaction: Transaction) -> None:
+        transaction_id = transaction.transaction_id
+        with self._lock:
+            hot = self._hot
+            if transaction_id in hot:
+                hot.move_to_end(transaction_id)
+            hot[transaction_id] = transaction
+            if len(hot) > self._hot_capacity:
+                self._evict()
+
+    def get(self, transaction_id: int) -> Optional[Transaction]:
+        with self._lock:
+            hot = self._hot
+            transaction = hot.get(transaction_id)
+            if transaction is not None:
+                hot.move_to_end(transaction_id)
+                return transaction
+            transaction = self._spilled.get(transaction_id)
+            if transaction is not None:
+                return transaction
+            transaction = self._cold.get(transaction_id)
+            if transaction is not None:
+                hot[transaction_id] = transaction
+                self._promoted.add(transaction_id)
+                if len(hot) > self._hot_capacity:
+                    self._evict()
+            return transaction
+
+    def mark_disputed(self, transaction_id: int) -> None:
+        self._disputed_transaction_ids.add(transaction_id)
+
+    def is_disputed(self, transaction_id: int) -> bool:
+        return transaction_id in self._disputed_transaction_ids
+
+    def clear_disputed(self, transaction_id: int) -> None:
+        self._disputed_transaction_ids.discard(transaction_id)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        with self._lock:
+            hot = list(self._hot.values())
+            promoted = set(self._promoted)
+            spilled = list(self._spilled.values())
+            cold_count = self._cold.count
+        yield from hot
+        yield from spilled
+        # The cold tier is streamed from disk, one record per lock acquisition
+        for record in range(cold_count):
+            with self._lock:
+                transaction = self._cold.read(record)
+            if transaction.transaction_id not in promoted:
+                yield transaction
+
+    def close(self) -> None:
+        """Close and remove the cold tier files."""
+        with self._lock:
+            self._closer()
+
+    def _evict(self) -> None:
+        """Move the least recently used hot entry to the cold tier. Caller holds the lock."""
+        transaction_id, transaction = self._hot.popitem(last=False)
+        if transaction_id in self._promoted:
+            self._promoted.discard(transaction_id)
+        elif not self._cold.append(transaction):
+            self._spilled[transaction_id] = transaction
+
+
+def _close_cold_tier(cold: _ColdTier, directory: str) -> None:
+    cold.close()
+    shutil.rmtree(directory, ignore_errors=True)
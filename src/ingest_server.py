@@ -0,0 +1,293 @@
+import argparse
+import asyncio
+import io
+import json
+import logging
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from csv_ingest import CsvTransactionParser
+from models import DispatchMode
+from output import write_accounts, write_accounts_to_path
+from streaming_engine import StreamingPaymentsEngine
+
+logger = logging.getLogger(__name__)
+
+# Column order of rows sent to the server (no header line)
+FIELDNAMES = ["type", "client", "tx", "amount"]
+
+HTTP_REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    411: "Length Required",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+}
+
+
+class IngestServer:
+    """
+    Asyncio server feeding transactions into a running StreamingPaymentsEngine.
+
+    Two listeners, both taking CSV rows without a header (type, client, tx, amount):
+        TCP: newline-delimited rows on a raw connection. The client half-closes
+            when done and the server answers with the number of rows accepted.
+        HTTP/1.1: POST /transactions with a batch of rows as the body answers
+            202 {"accepted": n}; GET /accounts answers a snapshot of the
+            accounts as CSV. Connections are kept alive.
+
+    The event loop only moves bytes. Parsing and engine.submit() run on a
+    parse thread, and a connection waits for its chunk to be handed to the
+    engine before it reads more. Chunks that arrive while the parse thread is
+    busy are handed over together as the next batch, so under load one
+    thread hop and one submit() serve many requests. When the engine's queues
+    are full, submit() blocks, connections stop reading, and the kernel's
+    socket buffers push back on the clients. At most max_inflight_chunks
+    chunks (of up to chunk_bytes, or max_body_bytes for HTTP) are parsed or
+    waiting at once, which bounds memory regardless of connection count.
+    Rows of one connection are submitted in order.
+    """
+
+    DEFAULT_CHUNK_BYTES = 1 << 16
+    DEFAULT_MAX_BODY_BYTES = 1 << 20
+    DEFAULT_MAX_INFLIGHT_CHUNKS = 64
+
+    def __init__(
+        self,
+        engine: StreamingPaymentsEngine,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+        max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+        max_inflight_chunks: int = DEFAULT_MAX_INFLIGHT_CHUNKS,
+    ):
+        self._engine = engine
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-parse")
+        self._chunk_bytes = chunk_bytes
+        self._max_body_bytes = max_body_bytes
+        self._max_inflight_chunks = max_inflight_chunks
+        self._inflight: Optional[asyncio.Semaphore] = None
+        # Chunks waiting for the parse thread, with the futures their connections await
+        self._waiting: List[Tuple[CsvTransactionParser, bytes, asyncio.Future]] = []
+        self._dispatching = False
+        self._servers: List[asyncio.AbstractServer] = []
+        self.rows_accepted = 0
+        self.requests = 0
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0) -> Tuple[str, int]:
+        """Listen for newline-delimited rows; returns the bound address."""
+        return await self._listen(self._handle_tcp, host, port)
+
+    async def start_http(self, host: str = "127.0.0.1", port: int = 0) -> Tuple[str, int]:
+        """Listen for HTTP requests; returns the bound address."""
+        return await self._listen(self._handle_http, host, port)
+
+    async def close(self) -> None:
+        """Stop listening and wait for open connections to finish. The engine keeps running."""
+        for server in self._servers:
+            server.close()
+        for server in self._servers:
+            await server.wait_closed()
+        self._executor.shutdown()
+
+    async def _listen(self, handler, host: str, port: int) -> Tuple[str, int]:
+        if self._inflight is None:
+            self._inflight = asyncio.Semaphore(self._max_inflight_chunks)
+        server = await asyncio.start_server(handler, host, port, limit=self._chunk_bytes)
+        self._servers.append(server)
+        return server.sockets[0].getsockname()[:2]
+
+    def _new_parser(self) -> CsvTransactionParser:
+        return CsvTransactionParser(FIELDNAMES, fixed_point=self._engine.fixed_point)
+
+    async def _ingest(self, parser: CsvTransactionParser, data: bytes) -> int:
+        """Parse and submit a chunk of whole lines off the event loop; returns the valid rows."""
+        async with self._inflight:
+            future = asyncio.get_running_loop().create_future()
+            self._waiting.append((parser, data, future))
+            if not self._dispatching:
+                self._dispatching = True
+                asyncio.create_task(self._dispatch())
+            count = await future
+        self.rows_accepted += count
+        return count
+
+    async def _dispatch(self) -> None:
+        """Hand waiting chunks to the parse thread, one batch at a time, until none are left."""
+        loop = asyncio.get_running_loop()
+        try:
+            while self._waiting:
+                batch, self._waiting = self._waiting, []
+                try:
+                    counts = await loop.run_in_executor(self._executor, self._parse_and_submit, batch)
+                except Exception as error:
+                    for _, _, future in batch:
+                        future.set_exception(error)
+                    continue
+                for (_, _, future), count in zip(batch, counts):
+                    future.set_result(count)
+        finally:
+            self._dispatching = False
+
+    def _parse_and_submit(self, batch: List[Tuple[CsvTransactionParser, bytes, asyncio.Future]]) -> List[int]:
+        counts = []
+        transactions = []
+        for parser, data, _ in batch:
+            parsed = parser.parse_lines(data.decode(errors="replace").split("\n"))
+            counts.append(len(parsed))
+            transactions.extend(parsed)
+        if transactions:
+            self._engine.submit(transactions)
+        return counts
+
+    async def _handle_tcp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        parser = self._new_parser()
+        count = 0
+        buffer = b""
+        try:
+            while True:
+                data = await reader.read(self._chunk_bytes)
+                if not data:
+                    break
+                buffer += data
+                cut = buffer.rfind(b"\n") + 1
+                if cut == 0:
+                    if len(buffer) > self._chunk_bytes:
+                        raise ValueError(f"line longer than {self._chunk_bytes} bytes")
+                    continue
+                chunk, buffer = buffer[:cut], buffer[cut:]
+                count += await self._ingest(parser, chunk)
+            if buffer:
+                count += await self._ingest(parser, buffer)
+            writer.write(f"{count}\n".encode())
+            await writer.drain()
+        except (ConnectionError, ValueError) as error:
+            logger.warning(f"Closing TCP connection: {error}")
+        finally:
+            writer.close()
+
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        parser = self._new_parser()
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 431, b"", keep_alive=False)
+                    break
+                request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, 400, b"", keep_alive=False)
+                    break
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                self.requests += 1
+
+                if method == "POST" and target == "/transactions":
+                    length = headers.get("content-length")
+                    if length is None or not length.isdigit():
+                        await self._respond(writer, 411, b"", keep_alive=False)
+                        break
+                    if int(length) > self._max_body_bytes:
+                        await self._respond(writer, 413, b"", keep_alive=False)
+                        break
+                    body = await reader.readexactly(int(length))
+                    count = await self._ingest(parser, body)
+                    await self._respond(writer, 202, json.dumps({"accepted": count}).encode(), keep_alive)
+                elif method == "GET" and target == "/accounts":
+                    keep_alive = await self._skip_body(reader, headers) and keep_alive
+                    accounts = await asyncio.get_running_loop().run_in_executor(self._executor, self._engine.snapshot)
+                    out = io.BytesIO()
+                    write_accounts(accounts, out)
+                    await self._respond(writer, 200, out.getvalue(), keep_alive, content_type="text/csv")
+                else:
+                    keep_alive = await self._skip_body(reader, headers) and keep_alive
+                    await self._respond(writer, 404, b"", keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError) as error:
+            logger.warning(f"Closing HTTP connection: {error}")
+        finally:
+            writer.close()
+
+    async def _skip_body(self, reader: asyncio.StreamReader, headers: dict) -> bool:
+        """
+        Read and drop the body of a request whose route takes none, so the next
+        request starts in the right place. False if the connection must close
+        instead: a chunked, malformed or over-limit body is not read.
+        """
+        length = headers.get("content-length", "0")
+        if "transfer-encoding" in headers or not length.isdigit() or int(length) > self._max_body_bytes:
+            return False
+        if int(length):
+            await reader.readexactly(int(length))
+        return True
+
+    async def _respond(
+        self, writer: asyncio.StreamWriter, status: int, body: bytes, keep_alive: bool, content_type: str = "application/json"
+    ) -> None:
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode() + body)
+        await writer.drain()
+
+
+async def serve(args) -> StreamingPaymentsEngine:
+    engine = StreamingPaymentsEngine(
+        num_consumers=args.consumers, dispatch_mode=DispatchMode.SHARDED, fixed_point=args.fixed_point
+    )
+    engine.start()
+    server = IngestServer(engine)
+    if args.tcp_port is not None:
+        host, port = await server.start_tcp(args.host, args.tcp_port)
+        print(f"TCP on {host}:{port}", file=sys.stderr, flush=True)
+    if args.http_port is not None:
+        host, port = await server.start_http(args.host, args.http_port)
+        print(f"HTTP on {host}:{port}", file=sys.stderr, flush=True)
+
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopped.set)
+    await stopped.wait()
+    await server.close()
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="ingest_server.py", description="Ingest transactions over TCP and HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--tcp-port", type=int, help="port for newline-delimited rows")
+    parser.add_argument("--http-port", type=int, help="port for HTTP POST /transactions and GET /accounts")
+    parser.add_argument("--consumers", type=int, default=4)
+    parser.add_argument("--fixed-point", action="store_true")
+    parser.add_argument("-o", "--output", metavar="PATH", help="write the final accounts CSV to PATH instead of stdout")
+    args = parser.parse_args()
+    if args.tcp_port is None and args.http_port is None:
+        parser.error("pass --tcp-port and/or --http-port")
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s", stream=sys.stderr)
+    engine = asyncio.run(serve(args))
+    accounts = engine.stop()
+    if args.output:
+        write_accounts_to_path(accounts, args.output)
+    else:
+        write_accounts(accounts, sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import heapq
+import time
+from typing import Dict, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Clients listed in the report's lock wait table
+HOT_CLIENTS_REPORTED = 10
+
+
+class LatencyHistogram:
+    """
+    Log2-bucketed histogram of durations in nanoseconds.
+    Bucket b counts durations in [2**(b-1), 2**b), so percentiles are
+    upper bounds within a factor of two. Not thread-safe: each thread
+    records into its own histograms and they are merged for the report.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * 64
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, duration_ns: int) -> None:
+        self.buckets[duration_ns.bit_length()] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for bucket, count in enumerate(other.buckets):
+            self.buckets[bucket] += count
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def percentile_ns(self, fraction: float) -> int:
+        """Upper bound of the bucket holding the given fraction of samples."""
+        if not self.count:
+            return 0
+        threshold = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= threshold:
+                return min(1 << bucket, self.max_ns)
+        return self.max_ns
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total_seconds": self.total_ns / 1e9,
+            "mean_us": self.total_ns / self.count / 1e3 if self.count else 0.0,
+            "p50_us": self.percentile_ns(0.5) / 1e3,
+            "p99_us": self.percentile_ns(0.99) / 1e3,
+            "max_us": self.max_ns / 1e3,
+        }
+
+
+class PublisherTimings:
+    """Time spent by the publisher reading and parsing, and handing batches to the queues."""
+
+    def __init__(self):
+        self.parse = LatencyHistogram()
+        self.publish = LatencyHistogram()
+
+    def timed(self, batches: Iterator[T]) -> Iterator[T]:
+        """Yield from batches, recording the time each one took to produce as parse time."""
+        clock = time.perf_counter_ns
+        parse = self.parse
+        while True:
+            start = clock()
+            try:
+                batch = next(batches)
+            except StopIteration:
+                return
+            parse.record(clock() - start)
+            yield batch
+
+
+class ConsumerTimings:
+    """Timings of one consumer thread. Only that thread writes to it."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.queue_wait = LatencyHistogram()
+        self.lock_wait = LatencyHistogram()
+        self.apply = LatencyHistogram()
+        self.busy_ns = 0
+        self.batches = 0
+        self.transactions = 0
+        # client_id -> [total lock wait ns, acquisitions]
+        self.client_lock_wait: Dict[int, List[int]] = {}
+
+    def record_lock_wait(self, client_id: int, wait_ns: int) -> None:
+        self.lock_wait.record(wait_ns)
+        entry = self.client_lock_wait.get(client_id)
+        if entry is None:
+            self.client_lock_wait[client_id] = [wait_ns, 1]
+        else:
+            entry[0] += wait_ns
+            entry[1] += 1
+
+
+class Instrumentation:
+    """
+    Per-stage timings of one PaymentsEngine run.
+
+    Stages: parse (reading and parsing a chunk), publish (handing batches to
+    the queues, including backpressure), queue_wait (a consumer blocked
+    waiting for a batch), lock_wait (acquiring a client lock) and apply
+    (TransactionProcessor plus parking). Each consumer also reports busy
+    time (processing batches) against idle time (queue wait), and the
+    clients with the most lock wait are listed.
+
+    The engine only takes the instrumented code paths when an Instrumentation
+    is attached, so a run without one pays nothing for it.
+    """
+
+    def __init__(self):
+        self.publisher = PublisherTimings()
+        self._consumers: List[ConsumerTimings] = []
+        self._started_ns: Optional[int] = None
+        self._finished_ns: Optional[int] = None
+
+    def start(self) -> None:
+        self._started_ns = time.perf_counter_ns()
+
+    def finish(self) -> None:
+        self._finished_ns = time.perf_counter_ns()
+
+    def consumer(self, index: int) -> ConsumerTimings:
+        """Timings for a new consumer thread."""
+        timings = ConsumerTimings(index)
+        self._consumers.append(timings)
+        return timings
+
+    def report(self) -> dict:
+        """Machine-readable summary. Call once the consumers have finished."""
+        queue_wait = LatencyHistogram()
+        lock_wait = LatencyHistogram()
+        apply = LatencyHistogram()
+        client_lock_wait: Dict[int, List[int]] = {}
+        for timings in self._consumers:
+            queue_wait.merge(timings.queue_wait)
+            lock_wait.merge(timings.lock_wait)
+            apply.merge(timings.apply)
+            for client_id, (wait_ns, acquisitions) in timings.client_lock_wait.items():
+                entry = client_lock_wait.setdefault(client_id, [0, 0])
+                entry[0] += wait_ns
+                entry[1] += acquisitions
+
+        hot_clients = heapq.nlargest(HOT_CLIENTS_REPORTED, client_lock_wait.items(), key=lambda item: item[1][0])
+        wall_ns = (self._finished_ns or time.perf_counter_ns()) - (self._started_ns or 0)
+        return {
+            "wall_seconds": wall_ns / 1e9,
+            "stages": {
+                "parse": self.publisher.parse.to_dict(),
+                "publish": self.publisher.publish.to_dict(),
+                "queue_wait": queue_wait.to_dict(),
+                "lock_wait": lock_wait.to_dict(),
+                "apply": apply.to_dict(),
+            },
+            "consumers": [
+                {
+                    "consumer": timings.index,
+                    "busy_seconds": timings.busy_ns / 1e9,
+                    "idle_seconds": timings.queue_wait.total_ns / 1e9,
+                    "batches": timings.batches,
+                    "transactions": timings.transactions,
+                }
+                for timings in self._consumers
+            ],
+            "hot_clients": [
+                {"client_id": client_id, "lock_wait_seconds": wait_ns / 1e9, "acquisitions": acquisitions}
+                for client_id, (wait_ns, acquisitions) in hot_clients
+            ],
+        }
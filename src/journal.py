@@ -0,0 +1,170 @@
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterator, List, Optional, Tuple
+
+from models import Transaction, TransactionType
+from money import Amount, fixed_to_decimal, parse_fixed
+
+# Binary transaction encoding shared by the journal and snapshots:
+# type code u8, client i64, tx i64, then a tagged amount.
+_TRANSACTION = struct.Struct("<Bqq")
+_TYPE_CODES = {transaction_type: code for code, transaction_type in enumerate(TransactionType, 1)}
+_CODE_TYPES = {code: transaction_type for transaction_type, code in _TYPE_CODES.items()}
+
+_AMOUNT_NONE = 0
+_AMOUNT_UNITS = 1  # fixed-point int units, i64
+_AMOUNT_TEXT = 2  # Decimal as text, u16 length prefix
+_AMOUNT_BIG_UNITS = 3  # int units beyond i64 as text, u16 length prefix
+_UNITS = struct.Struct("<q")
+_TEXT_LENGTH = struct.Struct("<H")
+_I64_MIN, _I64_MAX = -(1 << 63), (1 << 63) - 1
+
+# Journal record: payload length u32, crc32 of payload u32, then the payload:
+# chunk start offset u64, end offset u64, transaction count u32, transactions.
+_RECORD_HEADER = struct.Struct("<II")
+_CHUNK_HEADER = struct.Struct("<QQI")
+
+
+def encode_amount(amount: Optional[Amount], out: bytearray) -> None:
+    if amount is None:
+        out.append(_AMOUNT_NONE)
+    elif isinstance(amount, int) and _I64_MIN <= amount <= _I64_MAX:
+        out.append(_AMOUNT_UNITS)
+        out += _UNITS.pack(amount)
+    else:
+        # Decimals keep their exact text
+        text = str(amount).encode()
+        out.append(_AMOUNT_BIG_UNITS if isinstance(amount, int) else _AMOUNT_TEXT)
+        out += _TEXT_LENGTH.pack(len(text))
+        out += text
+
+
+def decode_amount(data: bytes, offset: int, fixed_point: bool) -> Tuple[Optional[Amount], int]:
+    """Decode an amount at offset into the engine's representation. Returns (amount, next offset)."""
+    tag = data[offset]
+    offset += 1
+    if tag == _AMOUNT_NONE:
+        return None, offset
+    if tag == _AMOUNT_UNITS:
+        (units,) = _UNITS.unpack_from(data, offset)
+        return (units if fixed_point else fixed_to_decimal(units)), offset + _UNITS.size
+    (length,) = _TEXT_LENGTH.unpack_from(data, offset)
+    offset += _TEXT_LENGTH.size
+    text = data[offset:offset + length].decode()
+    if tag == _AMOUNT_BIG_UNITS:
+        units = int(text)
+        return (units if fixed_point else fixed_to_decimal(units)), offset + length
+    return (parse_fixed(text) if fixed_point else Decimal(text)), offset + length
+
+
+def encode_transaction(transaction: Transaction, out: bytearray) -> None:
+    out += _TRANSACTION.pack(_TYPE_CODES[transaction.transaction_type], transaction.client_id, transaction.transaction_id)
+    encode_amount(transaction.amount, out)
+
+
+def decode_transaction(data: bytes, offset: int, fixed_point: bool) -> Tuple[Transaction, int]:
+    code, client_id, transaction_id = _TRANSACTION.unpack_from(data, offset)
+    amount, offset = decode_amount(data, offset + _TRANSACTION.size, fixed_point)
+    return Transaction(_CODE_TYPES[code], client_id, transaction_id, amount), offset
+
+
+@dataclass
+class JournalRecord:
+    """One journaled input chunk: its byte range in the input file and its parsed transactions."""
+    start_offset: int
+    end_offset: int
+    transactions: List[Transaction]
+    # Byte position in the journal just past this record
+    journal_end: int
+
+
+class Journal:
+    """
+    Append-only write-ahead journal of input chunks.
+
+    The publisher appends every chunk it reads before publishing it, so any
+    transaction the engine may have applied is in the journal, together with
+    the input byte offset where reading can resume. fsync is group-committed:
+    appends are buffered and synced once group_commit_rows transactions have
+    accumulated (and on sync()/close()). A crash loses at most the unsynced
+    tail, which recovery simply reads again from the input file.
+
+    Every record carries a crc32, so a torn write at the end of the journal is
+    detected and ignored by read_journal.
+    """
+
+    DEFAULT_GROUP_COMMIT_ROWS = 50_000
+
+    def __init__(self, path: str, group_commit_rows: int = DEFAULT_GROUP_COMMIT_ROWS, valid_length: Optional[int] = None):
+        self._path = path
+        self._group_commit_rows = group_commit_rows
+        self._file = open(path, "ab")
+        if valid_length is not None:
+            # Drop a torn tail left by a crash before appending after it
+            self._file.truncate(valid_length)
+        self._unsynced_rows = 0
+        self.bytes_written = 0
+        self.syncs = 0
+        self.sync_seconds = 0.0
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def append(self, start_offset: int, end_offset: int, transactions: List[Transaction]) -> None:
+        payload = bytearray(_CHUNK_HEADER.pack(start_offset, end_offset, len(transactions)))
+        for transaction in transactions:
+            encode_transaction(transaction, payload)
+        self._file.write(_RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+        self._file.write(payload)
+        self.bytes_written += _RECORD_HEADER.size + len(payload)
+        self._unsynced_rows += len(transactions)
+        if self._unsynced_rows >= self._group_commit_rows:
+            self.sync()
+
+    def sync(self) -> None:
+        """Flush and fsync everything appended so far."""
+        start = time.perf_counter()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.sync_seconds += time.perf_counter() - start
+        self.syncs += 1
+        self._unsynced_rows = 0
+
+    def truncate(self) -> None:
+        """Discard all records, once a snapshot covers them."""
+        self._file.flush()
+        self._file.truncate(0)
+        os.fsync(self._file.fileno())
+        self._unsynced_rows = 0
+
+    def close(self) -> None:
+        self.sync()
+        self._file.close()
+
+
+def read_journal(path: str, fixed_point: bool = False) -> Iterator[JournalRecord]:
+    """Yield the records of a journal in order, stopping at the first torn or corrupt record."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        data = f.read()
+    position = 0
+    while position + _RECORD_HEADER.size <= len(data):
+        length, checksum = _RECORD_HEADER.unpack_from(data, position)
+        payload_start = position + _RECORD_HEADER.size
+        payload = data[payload_start:payload_start + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            return
+        start_offset, end_offset, count = _CHUNK_HEADER.unpack_from(payload)
+        offset = _CHUNK_HEADER.size
+        transactions = []
+        for _ in range(count):
+            transaction, offset = decode_transaction(payload, offset, fixed_point)
+            transactions.append(transaction)
+        position = payload_start + length
+        yield JournalRecord(start_offset, end_offset, transactions, position)
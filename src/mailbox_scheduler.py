@@ -0,0 +1,250 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from message_queue import QueueStats
+from models import Transaction
+
+
+class Mailbox:
+    """FIFO of one client's published transactions, as the batches they were published in."""
+
+    __slots__ = ("client_id", "batches", "scheduled")
+
+    def __init__(self, client_id: int):
+        self.client_id = client_id
+        self.batches: Deque[List[Transaction]] = deque()
+        # On a run queue or held by a consumer; never both, never twice
+        self.scheduled = False
+
+
+class MailboxScheduler:
+    """
+    Per-client mailboxes scheduled onto consumer threads with work stealing.
+
+    publish_batch() appends each client's transactions to that client's
+    mailbox. A mailbox that gets work while idle goes on the run queue of its
+    home consumer (client_id % num_workers). consume_batch() takes whole
+    mailbox batches from the front of the calling consumer's run queue, up to
+    max_messages over one or more mailboxes. A consumer whose run queue is
+    empty steals the back half of the longest other run queue, so a few hot
+    clients do not leave the other consumers idle.
+
+    A consumer holds the mailboxes it took until its next consume_batch()
+    call, which puts the ones with new work back on its own run queue. A
+    mailbox is on at most one run queue or held by at most one consumer, so
+    each client's transactions are handed out in publish order and never
+    processed by two consumers at once. No client lock is needed. An idle
+    mailbox is kept for the client's next transactions; client ids are u16,
+    so there are at most 65,536 of them.
+
+    Each consumer thread gets its own run queue on its first consume_batch()
+    call. Capacity and watermarks, task_done()/join(), shutdown() and
+    get_stats() work as in InMemoryQueue, so the engine drives it the same
+    way; depth counts messages not yet taken by a consumer.
+    """
+
+    def __init__(self, num_workers: int, capacity: Optional[int] = None, low_watermark: Optional[int] = None):
+        if num_workers < 1:
+            raise ValueError(f"num_workers must be positive, got {num_workers}")
+        if capacity is not None and capacity < 1:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+        if low_watermark is None and capacity is not None:
+            low_watermark = capacity // 2
+        if capacity is not None and not 0 <= low_watermark < capacity:
+            raise ValueError(f"low_watermark must be in [0, capacity), got {low_watermark}")
+
+        self._capacity = capacity
+        self._low_watermark = low_watermark
+        self._mailboxes: Dict[int, Mailbox] = {}
+        self._run_queues: List[Deque[Mailbox]] = [deque() for _ in range(num_workers)]
+        # Per consumer thread: index of its run queue and the mailboxes it holds
+        self._local = threading.local()
+        self._next_worker = 0
+        self._depth = 0
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._all_done = threading.Condition(self._lock)
+        self._unfinished = 0
+        self._paused = False
+        self._shutdown = False
+
+        self._max_depth = 0
+        self._published = 0
+        self._consumed = 0
+        self._backpressure_waits = 0
+        self._backpressure_seconds = 0.0
+        self._lock_acquisitions = 0
+        self.steals = 0
+
+    def publish_batch(self, messages: List[Transaction]) -> None:
+        """Append messages to their clients' mailboxes in order, under one lock acquisition. Thread-safe."""
+        self._publish(messages, wait=True)
+
+    def hand_off(self, messages: List[Transaction]) -> None:
+        """publish_batch without waiting for backpressure, for consumers passing work to one another. Thread-safe."""
+        self._publish(messages, wait=False)
+
+    def _publish(self, messages: List[Transaction], wait: bool) -> None:
+        if not messages:
+            return
+        groups: Dict[int, List[Transaction]] = {}
+        for message in messages:
+            group = groups.get(message.client_id)
+            if group is None:
+                groups[message.client_id] = [message]
+            else:
+                group.append(message)
+
+        with self._not_full:
+            self._lock_acquisitions += 1
+            if wait and self._paused:
+                self._wait_for_drain()
+            mailboxes = self._mailboxes
+            run_queues = self._run_queues
+            num_workers = len(run_queues)
+            ready = 0
+            for client_id, group in groups.items():
+                mailbox = mailboxes.get(client_id)
+                if mailbox is None:
+                    mailbox = mailboxes[client_id] = Mailbox(client_id)
+                mailbox.batches.append(group)
+                if not mailbox.scheduled:
+                    mailbox.scheduled = True
+                    run_queues[client_id % num_workers].append(mailbox)
+                    ready += 1
+            self._depth += len(messages)
+            self._unfinished += len(messages)
+            self._published += len(messages)
+            if self._depth > self._max_depth:
+                self._max_depth = self._depth
+            if self._capacity is not None and self._depth >= self._capacity:
+                self._paused = True
+            if ready:
+                self._not_empty.notify(ready)
+
+    def _wait_for_drain(self) -> None:
+        """Block until consumers bring depth down to the low watermark. Caller holds the lock."""
+        self._backpressure_waits += 1
+        start = time.perf_counter()
+        while self._paused:
+            self._not_full.wait()
+        self._backpressure_seconds += time.perf_counter() - start
+
+    def consume_batch(self, max_messages: int) -> List[Transaction]:
+        """
+        Release the mailboxes this consumer took last time, then take whole
+        mailbox batches, up to max_messages in total, blocking until there is
+        work. A batch larger than max_messages is returned on its own rather
+        than split. Returns an empty list only once the scheduler is shut down
+        and every message has been taken.
+        Thread-safe; call it from the consumer threads only.
+        """
+        local = self._local
+        if not hasattr(local, "held"):
+            with self._lock:
+                local.worker = self._next_worker % len(self._run_queues)
+                self._next_worker += 1
+            local.held = []
+        run_queue = self._run_queues[local.worker]
+        held: List[Mailbox] = local.held
+
+        with self._not_empty:
+            self._lock_acquisitions += 1
+            for mailbox in held:
+                if mailbox.batches:
+                    run_queue.append(mailbox)
+                else:
+                    mailbox.scheduled = False
+            held.clear()
+
+            while not run_queue:
+                if self._steal(run_queue):
+                    break
+                if self._shutdown and self._depth == 0:
+                    return []
+                self._not_empty.wait()
+
+            # The first mailbox batch is taken even if larger than max_messages
+            mailbox = run_queue.popleft()
+            held.append(mailbox)
+            batch = mailbox.batches.popleft()
+            taken = len(batch)
+            while True:
+                batches = mailbox.batches
+                while batches and taken + len(batches[0]) <= max_messages:
+                    more = batches.popleft()
+                    batch += more
+                    taken += len(more)
+                if batches or not run_queue or taken + len(run_queue[0].batches[0]) > max_messages:
+                    break
+                mailbox = run_queue.popleft()
+                held.append(mailbox)
+                more = mailbox.batches.popleft()
+                batch += more
+                taken += len(more)
+            if run_queue:
+                # Leftover work another idle consumer can steal
+                self._not_empty.notify()
+            elif self._shutdown and self._depth == taken:
+                # Last messages taken: let waiting consumers see the end of the stream
+                self._not_empty.notify_all()
+
+            self._depth -= taken
+            self._consumed += taken
+            if self._paused and self._depth <= self._low_watermark:
+                self._paused = False
+                self._not_full.notify_all()
+            return batch
+
+    def _steal(self, run_queue: Deque[Mailbox]) -> bool:
+        """Move the back half of the longest other run queue to run_queue. Caller holds the lock."""
+        victim = max(self._run_queues, key=len)
+        if not victim:
+            return False
+        for _ in range((len(victim) + 1) // 2):
+            run_queue.appendleft(victim.pop())
+        self.steals += 1
+        return True
+
+    def task_done(self, count: int = 1) -> None:
+        """Mark count consumed messages as handled. Thread-safe."""
+        with self._all_done:
+            self._unfinished -= count
+            if self._unfinished <= 0:
+                self._all_done.notify_all()
+
+    def join(self) -> None:
+        """Block until every published message has been marked handled with task_done()."""
+        with self._all_done:
+            while self._unfinished > 0:
+                self._all_done.wait()
+
+    def is_empty(self) -> bool:
+        """Check if no message is waiting to be taken."""
+        return self._depth == 0
+
+    def get_stats(self) -> QueueStats:
+        """Snapshot of depth and backpressure counters."""
+        with self._lock:
+            return QueueStats(
+                depth=self._depth,
+                max_depth=self._max_depth,
+                published=self._published,
+                consumed=self._consumed,
+                backpressure_waits=self._backpressure_waits,
+                backpressure_seconds=self._backpressure_seconds,
+                lock_acquisitions=self._lock_acquisitions,
+            )
+
+    def shutdown(self) -> None:
+        """Signal no more messages will be published. Wakes consumers blocked in consume_batch."""
+        with self._not_empty:
+            self._shutdown = True
+            self._not_empty.notify_all()
+
+    def is_shutdown(self) -> bool:
+        """Check if shutdown has been signaled."""
+        return self._shutdown
@@ -1,7 +1,14 @@
+import argparse
+import json
+import os
 import sys
 import logging
 
+from compressed_input import compression_of
+from instrumentation import Instrumentation
+from output import write_accounts, write_accounts_to_path
 from payments_engine import PaymentsEngine
+from process_engine import MultiProcessPaymentsEngine
 
 logging.basicConfig(
     level=logging.WARNING,
@@ -10,31 +17,75 @@ logging.basicConfig(
 )
 
 
-def format_decimal(value) -> str:
-    """Format decimal with up to 4 decimal places, removing trailing zeros."""
-    normalized = value.normalize()
-    return f"{normalized:f}"
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="main.py", usage="python main.py <input> [--processes N] [--fixed-point] [--stats-json PATH] [--journal-dir DIR] [--parse-workers N] [-o PATH]")
+    parser.add_argument("input", help="transactions file: CSV (optionally gzip, bzip2 or xz compressed) or the binary format written by binary_ingest.py")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=0,
+        help="partition clients across N worker processes (default: threaded engine in one process)",
+    )
+    parser.add_argument(
+        "--fixed-point",
+        action="store_true",
+        help="keep amounts as integer units of 0.0001 instead of Decimal (same output, less CPU and memory)",
+    )
+    parser.add_argument(
+        "--stats-json",
+        metavar="PATH",
+        help="time each processing stage and write the report to PATH as JSON (threaded engine only)",
+    )
+    parser.add_argument(
+        "--journal-dir",
+        metavar="DIR",
+        help="journal and snapshot progress in DIR; rerunning after a crash resumes from it (threaded engine only)",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        metavar="N",
+        help="parse the CSV in N worker processes; same results, for large files on many cores (threaded engine only)",
+    )
+    parser.add_argument("-o", "--output", metavar="PATH", help="write the accounts CSV to PATH instead of stdout")
+    args = parser.parse_args(argv)
+    if args.stats_json and args.processes > 0:
+        parser.error("--stats-json is not supported with --processes")
+    if args.journal_dir and args.processes > 0:
+        parser.error("--journal-dir is not supported with --processes")
+    if args.parse_workers and args.processes > 0:
+        parser.error("--parse-workers is not supported with --processes")
+    if args.processes > 0 and os.path.exists(args.input):
+        if compression_of(args.input) is not None:
+            parser.error("compressed input is not supported with --processes")
+    return args
 
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python main.py <input.csv>", file=sys.stderr)
-        sys.exit(1)
-
-    filepath = sys.argv[1]
-    engine = PaymentsEngine()
-    accounts = engine.process_file(filepath)
-
-    print("client,available,held,total,locked")
-    for client_id in sorted(accounts.keys()):
-        account = accounts[client_id]
-        print(
-            f"{client_id},"
-            f"{format_decimal(account.available)},"
-            f"{format_decimal(account.held)},"
-            f"{format_decimal(account.total)},"
-            f"{str(account.locked).lower()}"
+    args = parse_args(sys.argv[1:])
+
+    if args.processes > 0:
+        engine = MultiProcessPaymentsEngine(num_workers=args.processes, fixed_point=args.fixed_point)
+    else:
+        instrumentation = Instrumentation() if args.stats_json else None
+        engine = PaymentsEngine(
+            fixed_point=args.fixed_point,
+            instrumentation=instrumentation,
+            journal_dir=args.journal_dir,
+            parse_workers=args.parse_workers,
         )
+    accounts = engine.process_file(args.input)
+    if args.stats_json:
+        with open(args.stats_json, "w") as f:
+            json.dump(engine.instrumentation_report, f, indent=2)
+
+    if args.output:
+        write_accounts_to_path(accounts, args.output)
+    else:
+        sys.stdout.flush()
+        write_accounts(accounts, sys.stdout.buffer)
+        sys.stdout.buffer.flush()
 
 
 if __name__ == "__main__":
@@ -1,26 +1,133 @@
 import threading
+import time
+from collections import deque
+from dataclasses import dataclass
 from queue import Queue, Empty
-from typing import Optional, List
+from typing import Deque, Optional, List
 
 from models import Transaction
 
 
+@dataclass
+class QueueStats:
+    depth: int
+    max_depth: int
+    published: int
+    consumed: int
+    backpressure_waits: int
+    backpressure_seconds: float
+    lock_acquisitions: int
+
+
 class InMemoryQueue:
     """
     Thread-safe message queue with Dead Letter Queue support.
     All synchronization is internal - callers never need to lock.
+
+    With a capacity the main queue applies backpressure: once depth reaches
+    capacity (the high watermark) publishers block until consumers drain it
+    down to low_watermark (default capacity // 2). Resuming at the low
+    watermark instead of on every freed slot keeps publishers and consumers
+    from handing off one message at a time.
+
+    publish_batch/consume_batch move many messages per lock acquisition and
+    condition handoff. A published batch is kept together and handed whole to
+    a single consumer, so messages that must be applied in order can travel in
+    one batch. consume_batch blocks without a timeout and returns an empty
+    batch as the end-of-stream marker once shutdown() has been called and the
+    queue is drained. A batch is admitted whole, so depth can exceed capacity
+    by at most one batch.
+
+    Like queue.Queue, consumers may call task_done() once they have handled
+    consumed messages, and join() waits until every published message has
+    been handled.
     """
 
     DEFAULT_TIMEOUT = 0.1
 
-    def __init__(self):
-        self._main_queue: Queue[Transaction] = Queue()
+    def __init__(self, capacity: Optional[int] = None, low_watermark: Optional[int] = None):
+        if capacity is not None and capacity < 1:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+        if low_watermark is None and capacity is not None:
+            low_watermark = capacity // 2
+        if capacity is not None and not 0 <= low_watermark < capacity:
+            raise ValueError(f"low_watermark must be in [0, capacity), got {low_watermark}")
+
+        self._capacity = capacity
+        self._low_watermark = low_watermark
+        # Published batches in order; publish_message adds a batch of one
+        self._main_queue: Deque[List[Transaction]] = deque()
+        self._depth = 0
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._all_done = threading.Condition(self._lock)
+        self._unfinished = 0
+        self._paused = False
         self._dead_letter_queue: Queue[Transaction] = Queue()
-        self._shutdown_event = threading.Event()
+        self._shutdown = False
+
+        self._max_depth = 0
+        self._published = 0
+        self._consumed = 0
+        self._backpressure_waits = 0
+        self._backpressure_seconds = 0.0
+        self._lock_acquisitions = 0
 
     def publish_message(self, message: Transaction) -> None:
-        """Add message to main queue. Thread-safe."""
-        self._main_queue.put(message)
+        """Add message to main queue. Blocks while the queue is above its watermarks. Thread-safe."""
+        with self._not_full:
+            self._lock_acquisitions += 1
+            if self._paused:
+                self._wait_for_drain()
+            self._main_queue.append([message])
+            self._depth += 1
+            self._unfinished += 1
+            self._published += 1
+            self._after_publish()
+            self._not_empty.notify()
+
+    def publish_batch(self, messages: List[Transaction]) -> None:
+        """Add messages to main queue in order, under one lock acquisition. Thread-safe."""
+        self._publish(messages, wait=True)
+
+    def hand_off(self, messages: List[Transaction]) -> None:
+        """
+        publish_batch without waiting for backpressure, for consumers passing
+        work to one another: two consumers blocked on each other's full
+        queues would deadlock. Thread-safe.
+        """
+        self._publish(messages, wait=False)
+
+    def _publish(self, messages: List[Transaction], wait: bool) -> None:
+        if not messages:
+            return
+        with self._not_full:
+            self._lock_acquisitions += 1
+            if wait and self._paused:
+                self._wait_for_drain()
+            self._main_queue.append(list(messages))
+            self._depth += len(messages)
+            self._unfinished += len(messages)
+            self._published += len(messages)
+            self._after_publish()
+            self._not_empty.notify()
+
+    def _after_publish(self) -> None:
+        """Update depth stats and engage backpressure. Caller holds the lock."""
+        depth = self._depth
+        if depth > self._max_depth:
+            self._max_depth = depth
+        if self._capacity is not None and depth >= self._capacity:
+            self._paused = True
+
+    def _wait_for_drain(self) -> None:
+        """Block until consumers bring depth down to the low watermark. Caller holds the lock."""
+        self._backpressure_waits += 1
+        start = time.perf_counter()
+        while self._paused:
+            self._not_full.wait()
+        self._backpressure_seconds += time.perf_counter() - start
 
     def consume_message(self) -> Optional[Transaction]:
         """
@@ -28,14 +135,79 @@ class InMemoryQueue:
         Returns None if queue is empty after timeout.
         Thread-safe.
         """
-        try:
-            return self._main_queue.get(timeout=self.DEFAULT_TIMEOUT)
-        except Empty:
-            return None
+        with self._not_empty:
+            self._lock_acquisitions += 1
+            if not self._main_queue:
+                self._not_empty.wait(self.DEFAULT_TIMEOUT)
+                if not self._main_queue:
+                    return None
+            head = self._main_queue[0]
+            message = head.pop(0)
+            if not head:
+                self._main_queue.popleft()
+            self._depth -= 1
+            self._consumed += 1
+            self._after_consume()
+            return message
+
+    def consume_batch(self, max_messages: int) -> List[Transaction]:
+        """
+        Get whole published batches in order, up to max_messages in total, blocking
+        until at least one is available. A batch larger than max_messages is
+        returned on its own rather than split.
+        Returns an empty list only once the queue is shut down and drained.
+        Thread-safe.
+        """
+        with self._not_empty:
+            self._lock_acquisitions += 1
+            while not self._main_queue:
+                if self._shutdown:
+                    return []
+                self._not_empty.wait()
+            queue = self._main_queue
+            batch = queue.popleft()
+            while queue and len(batch) + len(queue[0]) <= max_messages:
+                batch.extend(queue.popleft())
+            self._depth -= len(batch)
+            self._consumed += len(batch)
+            self._after_consume()
+            return batch
+
+    def _after_consume(self) -> None:
+        """Release blocked publishers at the low watermark. Caller holds the lock."""
+        if self._paused and self._depth <= self._low_watermark:
+            self._paused = False
+            self._not_full.notify_all()
+
+    def task_done(self, count: int = 1) -> None:
+        """Mark count consumed messages as handled. Thread-safe."""
+        with self._all_done:
+            self._unfinished -= count
+            if self._unfinished <= 0:
+                self._all_done.notify_all()
+
+    def join(self) -> None:
+        """Block until every published message has been marked handled with task_done()."""
+        with self._all_done:
+            while self._unfinished > 0:
+                self._all_done.wait()
 
     def is_empty(self) -> bool:
         """Check if main queue is empty."""
-        return self._main_queue.empty()
+        return not self._main_queue
+
+    def get_stats(self) -> QueueStats:
+        """Snapshot of main queue depth and backpressure counters."""
+        with self._lock:
+            return QueueStats(
+                depth=self._depth,
+                max_depth=self._max_depth,
+                published=self._published,
+                consumed=self._consumed,
+                backpressure_waits=self._backpressure_waits,
+                backpressure_seconds=self._backpressure_seconds,
+                lock_acquisitions=self._lock_acquisitions,
+            )
 
     def send_to_dead_letter_queue(self, message: Transaction) -> None:
         """Send failed message to dead letter queue for later retry. Thread-safe."""
@@ -49,7 +221,7 @@ class InMemoryQueue:
         messages = []
         while True:
             try:
-                messages.append(self._dead_letter_queue.get(timeout=self.DEFAULT_TIMEOUT))
+                messages.append(self._dead_letter_queue.get_nowait())
             except Empty:
                 break
         return messages
@@ -59,9 +231,11 @@ class InMemoryQueue:
         return self._dead_letter_queue.qsize()
 
     def shutdown(self) -> None:
-        """Signal no more messages will be published."""
-        self._shutdown_event.set()
+        """Signal no more messages will be published. Wakes consumers blocked in consume_batch."""
+        with self._not_empty:
+            self._shutdown = True
+            self._not_empty.notify_all()
 
     def is_shutdown(self) -> bool:
         """Check if shutdown has been signaled."""
-        return self._shutdown_event.is_set()
+        return self._shutdown
@@ -1,8 +1,10 @@
 import threading
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from decimal import Decimal
 from enum import Enum
-from typing import Optional
+from typing import Dict, List, Optional
+
+from money import Amount
 
 
 class TransactionType(Enum):
@@ -19,63 +21,219 @@ class ProcessingResult(Enum):
     FAILED_PERMANENT = "failed_permanent"
 
 
-@dataclass
+class RejectionReason(Enum):
+    # Permanent
+    ACCOUNT_LOCKED = "account_locked"
+    INVALID_AMOUNT = "invalid_amount"
+    INSUFFICIENT_FUNDS = "insufficient_funds"
+    CLIENT_MISMATCH = "client_mismatch"
+    ALREADY_DISPUTED = "already_disputed"
+    NOT_DISPUTABLE = "not_disputable"
+    UNSUPPORTED_TYPE = "unsupported_type"
+    # Retriable: the referenced transaction or dispute may still arrive
+    TRANSACTION_NOT_FOUND = "transaction_not_found"
+    NOT_DISPUTED = "not_disputed"
+
+
+class DispatchMode(Enum):
+    SHARED = "shared"  # One queue for all consumers, per-client locks serialize access
+    SHARDED = "sharded"  # One queue per consumer, clients routed by client_id
+    MAILBOX = "mailbox"  # One mailbox per active client, scheduled onto consumers with work stealing
+
+
+@dataclass(slots=True)
 class Transaction:
     transaction_type: TransactionType
     client_id: int
     transaction_id: int
-    amount: Optional[Decimal] = None
+    # Decimal, or int units of 1e-4 in fixed-point mode (see money.py)
+    amount: Optional[Amount] = None
 
     def __repr__(self) -> str:
         return f"Transaction({self.transaction_type.value}, client={self.client_id}, tx={self.transaction_id}, amount={self.amount})"
 
 
-@dataclass
+@dataclass(slots=True)
 class ClientAccount:
     client_id: int
-    available: Decimal = Decimal("0")
-    held: Decimal = Decimal("0")
+    # Balances share the representation of transaction amounts: Decimal, or int in fixed-point mode
+    available: Amount = Decimal("0")
+    held: Amount = Decimal("0")
     locked: bool = False
 
     @property
-    def total(self) -> Decimal:
+    def total(self) -> Amount:
         return self.available + self.held
 
-    def credit(self, amount: Decimal) -> None:
+    def credit(self, amount: Amount) -> None:
         self.available += amount
 
-    def debit(self, amount: Decimal) -> None:
+    def debit(self, amount: Amount) -> None:
         self.available -= amount
 
-    def hold(self, amount: Decimal) -> None:
+    def hold(self, amount: Amount) -> None:
         self.available -= amount
         self.held += amount
 
-    def release_hold(self, amount: Decimal) -> None:
+    def release_hold(self, amount: Amount) -> None:
         self.held -= amount
         self.available += amount
 
-    def remove_held(self, amount: Decimal) -> None:
+    def remove_held(self, amount: Amount) -> None:
         self.held -= amount
 
 
-class ProcessingStats:
-    """Thread-safe counters for tracking processing statistics."""
+class _StatsShard:
+    """Counters of one thread. Only that thread writes to it."""
+
+    __slots__ = ("processed", "failed", "parked", "dlq_retried", "processed_by_type", "failed_by_type", "rejected_by_reason")
 
     def __init__(self):
-        self._lock = threading.Lock()
         self.processed = 0
         self.failed = 0
+        self.parked = 0
         self.dlq_retried = 0
+        # Prefilled with every key, so readers can iterate while the owner increments
+        self.processed_by_type: Dict[TransactionType, int] = dict.fromkeys(TransactionType, 0)
+        self.failed_by_type: Dict[TransactionType, int] = dict.fromkeys(TransactionType, 0)
+        self.rejected_by_reason: Dict[RejectionReason, int] = dict.fromkeys(RejectionReason, 0)
 
-    def record_success(self):
-        with self._lock:
-            self.processed += 1
 
-    def record_failure(self):
-        with self._lock:
-            self.failed += 1
+@dataclass
+class StatsSnapshot:
+    """Point-in-time totals of ProcessingStats. Picklable, so workers can send it back."""
+    processed: int = 0
+    failed: int = 0
+    parked: int = 0
+    dlq_retried: int = 0
+    processed_by_type: Dict[TransactionType, int] = field(default_factory=dict)
+    failed_by_type: Dict[TransactionType, int] = field(default_factory=dict)
+    rejected_by_reason: Dict[RejectionReason, int] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        """Totals with enum keys turned into their values, omitting zero breakdown entries."""
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "parked": self.parked,
+            "dlq_retried": self.dlq_retried,
+            "processed_by_type": {key.value: count for key, count in self.processed_by_type.items() if count},
+            "failed_by_type": {key.value: count for key, count in self.failed_by_type.items() if count},
+            "rejected_by_reason": {key.value: count for key, count in self.rejected_by_reason.items() if count},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StatsSnapshot":
+        """Inverse of to_dict."""
+        return cls(
+            processed=data["processed"],
+            failed=data["failed"],
+            parked=data["parked"],
+            dlq_retried=data["dlq_retried"],
+            processed_by_type={TransactionType(key): count for key, count in data["processed_by_type"].items()},
+            failed_by_type={TransactionType(key): count for key, count in data["failed_by_type"].items()},
+            rejected_by_reason={RejectionReason(key): count for key, count in data["rejected_by_reason"].items()},
+        )
+
+
+class ProcessingStats:
+    """
+    Processing counters sharded per thread.
+
+    Each thread increments its own shard without locking; reads sum all
+    shards, so contention is only paid when stats are read. The lock only
+    guards registering a thread's first shard. Besides the totals, successes
+    and permanent failures are broken down by transaction type, and permanent
+    failures and parks by RejectionReason.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards: List[_StatsShard] = []
+
+    def _shard(self) -> _StatsShard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _StatsShard()
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def record_success(self, transaction_type: Optional[TransactionType] = None):
+        shard = self._shard()
+        shard.processed += 1
+        if transaction_type is not None:
+            shard.processed_by_type[transaction_type] += 1
+
+    def record_failure(self, transaction_type: Optional[TransactionType] = None, reason: Optional[RejectionReason] = None):
+        shard = self._shard()
+        shard.failed += 1
+        if transaction_type is not None:
+            shard.failed_by_type[transaction_type] += 1
+        if reason is not None:
+            shard.rejected_by_reason[reason] += 1
+
+    def record_park(self, reason: Optional[RejectionReason] = None):
+        shard = self._shard()
+        shard.parked += 1
+        if reason is not None:
+            shard.rejected_by_reason[reason] += 1
 
     def record_dlq_retry(self):
+        self._shard().dlq_retried += 1
+
+    def merge(self, snapshot: StatsSnapshot) -> None:
+        """Add totals from elsewhere (e.g. a worker process) to the calling thread's shard."""
+        shard = self._shard()
+        shard.processed += snapshot.processed
+        shard.failed += snapshot.failed
+        shard.parked += snapshot.parked
+        shard.dlq_retried += snapshot.dlq_retried
+        for key, count in snapshot.processed_by_type.items():
+            shard.processed_by_type[key] += count
+        for key, count in snapshot.failed_by_type.items():
+            shard.failed_by_type[key] += count
+        for key, count in snapshot.rejected_by_reason.items():
+            shard.rejected_by_reason[key] += count
+
+    def _all_shards(self) -> List[_StatsShard]:
         with self._lock:
-            self.dlq_retried += 1
+            return list(self._shards)
+
+    @property
+    def processed(self) -> int:
+        return sum(shard.processed for shard in self._all_shards())
+
+    @property
+    def failed(self) -> int:
+        return sum(shard.failed for shard in self._all_shards())
+
+    @property
+    def parked(self) -> int:
+        return sum(shard.parked for shard in self._all_shards())
+
+    @property
+    def dlq_retried(self) -> int:
+        return sum(shard.dlq_retried for shard in self._all_shards())
+
+    def snapshot(self) -> StatsSnapshot:
+        """Sum of all shards, including the per-type and per-reason breakdowns."""
+        snapshot = StatsSnapshot(
+            processed_by_type=dict.fromkeys(TransactionType, 0),
+            failed_by_type=dict.fromkeys(TransactionType, 0),
+            rejected_by_reason=dict.fromkeys(RejectionReason, 0),
+        )
+        for shard in self._all_shards():
+            snapshot.processed += shard.processed
+            snapshot.failed += shard.failed
+            snapshot.parked += shard.parked
+            snapshot.dlq_retried += shard.dlq_retried
+            for key, count in shard.processed_by_type.items():
+                snapshot.processed_by_type[key] += count
+            for key, count in shard.failed_by_type.items():
+                snapshot.failed_by_type[key] += count
+            for key, count in shard.rejected_by_reason.items():
+                snapshot.rejected_by_reason[key] += count
+        return snapshot
@@ -0,0 +1,71 @@
+from decimal import Decimal, InvalidOperation
+from typing import Union
+
+# Fixed-point representation: integer count of 1e-4 units.
+# The input spec caps amounts at four decimal places, so this is exact.
+DECIMAL_PLACES = 4
+SCALE = 10 ** DECIMAL_PLACES
+
+Amount = Union[Decimal, int]
+
+
+def parse_fixed(amount_str: str) -> int:
+    """
+    Parse an amount string straight to fixed-point units without building a Decimal.
+    Raises ValueError for malformed amounts and for more than four decimal places.
+    """
+    text = amount_str.strip()
+    sign = 1
+    if text[:1] in ("-", "+"):
+        if text[0] == "-":
+            sign = -1
+        text = text[1:]
+
+    whole, _, fraction = text.partition(".")
+    fraction = fraction.rstrip("0")
+    if (
+        (whole or fraction)
+        and (not whole or (whole.isascii() and whole.isdigit()))
+        and (not fraction or (fraction.isascii() and fraction.isdigit()))
+    ):
+        if len(fraction) > DECIMAL_PLACES:
+            raise ValueError(f"amount {amount_str.strip()!r} has more than {DECIMAL_PLACES} decimal places")
+        units = int(whole or "0") * SCALE + int(fraction.ljust(DECIMAL_PLACES, "0"))
+        return sign * units
+
+    # Exponents, underscores and other spellings Decimal accepts
+    return decimal_to_fixed(_parse_decimal(amount_str))
+
+
+def _parse_decimal(amount_str: str) -> Decimal:
+    try:
+        return Decimal(amount_str.strip())
+    except InvalidOperation:
+        raise ValueError(f"invalid amount {amount_str.strip()!r}")
+
+
+def decimal_to_fixed(value: Decimal) -> int:
+    """Convert a Decimal to fixed-point units. Raises ValueError if it is not representable."""
+    if not value.is_finite():
+        raise ValueError(f"invalid amount {value}")
+    scaled = value.scaleb(DECIMAL_PLACES)
+    if scaled != scaled.to_integral_value():
+        raise ValueError(f"amount {value} has more than {DECIMAL_PLACES} decimal places")
+    return int(scaled)
+
+
+def fixed_to_decimal(units: int) -> Decimal:
+    """Convert fixed-point units back to a Decimal."""
+    return Decimal(units).scaleb(-DECIMAL_PLACES)
+
+
+def format_fixed(units: int) -> str:
+    """Format fixed-point units like a normalized Decimal: no exponent, no trailing zeros."""
+    if units < 0:
+        return "-" + format_fixed(-units)
+    # Slicing the digit string is cheaper than divmod plus formatting both parts
+    digits = str(units)
+    if len(digits) <= DECIMAL_PLACES:
+        digits = digits.rjust(DECIMAL_PLACES + 1, "0")
+    fraction = digits[-DECIMAL_PLACES:].rstrip("0")
+    return f"{digits[:-DECIMAL_PLACES]}.{fraction}" if fraction else digits[:-DECIMAL_PLACES]
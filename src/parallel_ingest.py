@@ -0,0 +1,115 @@
+import csv
+import mmap
+import multiprocessing
+import os
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from csv_ingest import READ_CHUNK_BYTES, CsvTransactionParser
+from models import Transaction, TransactionType
+
+# A parsed range as sent back by a worker: type codes (indices into _TYPES),
+# client ids, tx ids and amounts. Arrays pickle as raw bytes, and amounts
+# come from the parser's cache, so pickle memoizes repeated ones.
+Columns = Tuple[bytes, array, array, list]
+_TYPES = list(TransactionType)
+_TYPE_CODES = {transaction_type: code for code, transaction_type in enumerate(_TYPES)}
+
+# Worker process state, set by _init_worker
+_data: Optional[mmap.mmap] = None
+_parser: Optional[CsvTransactionParser] = None
+
+
+def split_ranges(data: mmap.mmap, start: int, range_bytes: int = READ_CHUNK_BYTES) -> Iterator[Tuple[int, int]]:
+    """
+    Cut data[start:] into (start, end) byte ranges of whole lines, each ending
+    with the line that contains byte start + range_bytes. That is where a
+    file's readlines(range_bytes) stops (once the lines read exceed the hint),
+    so the ranges are the sequential reader's chunks.
+    """
+    size = len(data)
+    while start < size:
+        newline = data.find(b"\n", start + range_bytes)
+        end = size if newline < 0 else newline + 1
+        yield start, end
+        start = end
+
+
+def iter_parallel_chunks(
+    filepath: str,
+    workers: int,
+    start_offset: Optional[int] = None,
+    range_bytes: int = READ_CHUNK_BYTES,
+    fixed_point: bool = False,
+) -> Iterator[Tuple[int, int, List[Transaction]]]:
+    """
+    Yield (start_offset, end_offset, transactions) like
+    csv_ingest.iter_transaction_chunks, with the parsing done in a pool of
+    worker processes.
+
+    The file is memory-mapped and cut at newlines into ranges of about
+    range_bytes. Each worker maps the file too and parses the ranges it is
+    given with CsvTransactionParser, so rows, malformed-row handling and
+    chunk boundaries are exactly those of the sequential reader. Results are
+    yielded in file order, with up to two ranges per worker in flight.
+    """
+    with open(filepath, "rb") as f:
+        header_line = f.readline()
+        if not header_line:
+            return
+        fieldnames = next(csv.reader([header_line.decode()]), [])
+        start = f.tell() if start_offset is None else start_offset
+        if os.fstat(f.fileno()).st_size <= start:
+            return
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    # Workers must not be forked from a process whose other threads may hold locks
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(filepath, fieldnames, fixed_point)
+        ) as pool:
+            in_flight = deque()
+            for range_start, range_end in split_ranges(data, start, range_bytes):
+                in_flight.append((range_start, range_end, pool.submit(_parse_range, range_start, range_end)))
+                if len(in_flight) >= 2 * workers:
+                    range_start, range_end, future = in_flight.popleft()
+                    yield range_start, range_end, _to_transactions(future.result())
+            while in_flight:
+                range_start, range_end, future = in_flight.popleft()
+                yield range_start, range_end, _to_transactions(future.result())
+    finally:
+        data.close()
+
+
+def _init_worker(filepath: str, fieldnames: List[str], fixed_point: bool) -> None:
+    global _data, _parser
+    with open(filepath, "rb") as f:
+        _data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    _parser = CsvTransactionParser(fieldnames, fixed_point=fixed_point)
+
+
+def _parse_range(start: int, end: int) -> Columns:
+    # Split on b"\\n" like readlines; the parser strips the line ends
+    lines = _data[start:end].decode().split("\n")
+    transactions = _parser.parse_lines(lines)
+    types = bytes(_TYPE_CODES[transaction.transaction_type] for transaction in transactions)
+    try:
+        clients = array("q", [transaction.client_id for transaction in transactions])
+        transaction_ids = array("q", [transaction.transaction_id for transaction in transactions])
+    except OverflowError:
+        # Ids beyond i64: send them as a plain list
+        clients = [transaction.client_id for transaction in transactions]
+        transaction_ids = [transaction.transaction_id for transaction in transactions]
+    return types, clients, transaction_ids, [transaction.amount for transaction in transactions]
+
+
+def _to_transactions(columns: Columns) -> List[Transaction]:
+    types, clients, transaction_ids, amounts = columns
+    return [
+        Transaction(_TYPES[code], client_id, transaction_id, amount)
+        for code, client_id, transaction_id, amount in zip(types, clients, transaction_ids, amounts)
+    ]
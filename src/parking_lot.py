@@ -0,0 +1,64 @@
+import threading
+from typing import Dict, List
+
+from models import Transaction
+
+
+class ParkingLot:
+    """
+    Retriable transactions parked by the tx id they are waiting on.
+
+    Disputes wait for their deposit, resolves and chargebacks for their
+    dispute; all of them reference that tx id. When a transaction with that
+    id succeeds, release() hands back everything waiting on it in arrival
+    order, so it can be retried right away instead of at the end of the run.
+
+    Bounded by max_parked: park() returns False when full and the caller falls
+    back to the dead letter queue.
+
+    park() and release() both check and update the waiters under one lock, so
+    a transaction parked by one consumer while another releases its tx id
+    is either handed back by that release or still waits for the next one.
+    Waiters need not belong to the releasing client, and a client's parks
+    and releases may happen on different consumers.
+    """
+
+    DEFAULT_MAX_PARKED = 1_000_000
+
+    def __init__(self, max_parked: int = DEFAULT_MAX_PARKED):
+        self._max_parked = max_parked
+        self._lock = threading.Lock()
+        self._waiting: Dict[int, List[Transaction]] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def park(self, transaction: Transaction) -> bool:
+        """Park a transaction until its tx id next succeeds. Returns False if the lot is full."""
+        with self._lock:
+            if self._count >= self._max_parked:
+                return False
+            self._waiting.setdefault(transaction.transaction_id, []).append(transaction)
+            self._count += 1
+            return True
+
+    def release(self, transaction_id: int) -> List[Transaction]:
+        """Remove and return the transactions waiting on transaction_id, oldest first."""
+        with self._lock:
+            released = self._waiting.pop(transaction_id, [])
+            self._count -= len(released)
+            return released
+
+    def parked(self) -> List[Transaction]:
+        """Everything currently parked, without removing it."""
+        with self._lock:
+            return [transaction for waiting in self._waiting.values() for transaction in waiting]
+
+    def drain(self) -> List[Transaction]:
+        """Remove and return everything still parked."""
+        with self._lock:
+            remaining = [transaction for waiting in self._waiting.values() for transaction in waiting]
+            self._waiting.clear()
+            self._count = 0
+            return remaining
@@ -1,13 +1,23 @@
-import csv
 import logging
+import os
 import sys
 import threading
-from decimal import Decimal
-from typing import Dict, Optional, List
+import time
+from collections import deque
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
 
-from models import Transaction, TransactionType, ClientAccount, ProcessingResult, ProcessingStats
-from message_queue import InMemoryQueue
-from state_manager import StateManager
+from binary_ingest import is_binary_file, iter_binary_chunks
+from compressed_input import compression_of, open_input
+from csv_ingest import READ_CHUNK_BYTES, iter_transaction_batches, iter_transaction_chunks
+from instrumentation import ConsumerTimings, Instrumentation
+from journal import Journal, read_journal
+from mailbox_scheduler import MailboxScheduler
+from models import Transaction, ClientAccount, ProcessingResult, ProcessingStats, DispatchMode
+from message_queue import InMemoryQueue, QueueStats
+from parallel_ingest import iter_parallel_chunks
+from parking_lot import ParkingLot
+from snapshot import Snapshot, read_snapshot, write_snapshot
+from state_manager import StateBackend, StateManager
 from transaction_processor import TransactionProcessor
 
 logger = logging.getLogger(__name__)
@@ -16,130 +26,550 @@ logger = logging.getLogger(__name__)
 class PaymentsEngine:
     """
     Orchestrates transaction processing with publisher-consumer pattern.
-    Supports DLQ for handling out-of-order transactions.
+
+    Out-of-order transactions (a dispute before its deposit, a resolve before
+    its dispute) are parked on the tx id they wait for and retried as soon as
+    a transaction with that id succeeds. The DLQ only takes what doesn't fit
+    in the parking lot (max_parked) and is retried after main processing.
+
+    Dispatch modes:
+        SHARED: all consumers pull from one queue and take a per-client lock
+            for every message. Transactions of one client may be applied out of
+            file order when several consumers race on them.
+        SHARDED: the publisher routes each transaction to the queue of the
+            consumer that owns its client (client_id % num_consumers). A shard
+            owns its clients outright, so no client lock is taken and
+            per-client order matches file order. A parked transaction released
+            by another client's transaction is handed back to its owner's queue.
+        MAILBOX: every active client has a FIFO mailbox, and consumers take
+            whole mailbox batches from their own run queue, stealing from the
+            longest other run queue when idle (see mailbox_scheduler.py). A
+            mailbox runs on one consumer at a time, so per-client order
+            matches file order and no client lock is taken, while hot clients
+            no longer pin one consumer's shard under skewed load. As in
+            SHARDED mode, a parked transaction released by another client's
+            transaction goes back to its own client's mailbox.
+
+    With fixed_point=True amounts and balances are ints in units of 1e-4
+    (see money.py) instead of Decimals.
+
+    state_factory builds the state backend, called with fixed_point
+    (any StateBackend, e.g. StateManager, DenseStateManager or SqliteStateManager).
+
+    queue_capacity bounds each consumer queue (None for unbounded). The
+    publisher blocks when a queue fills up and resumes once consumers drain it
+    to half, so ingest memory stays flat regardless of input size.
+
+    batch_size is the number of transactions moved per queue operation:
+    the publisher publishes and consumers consume whole batches.
+
+    With an Instrumentation attached, publisher and consumers time each stage
+    (parse, publish, queue wait, client lock wait, apply) and
+    instrumentation_report holds the result after process_file. Without one
+    the uninstrumented code paths run unchanged.
+
+    With a journal_dir the run survives a crash. The publisher appends every
+    read chunk to a write-ahead journal (group-committed fsync) before
+    publishing it. Every snapshot_interval rows it waits for the consumers to
+    apply everything published so far, writes a snapshot of accounts,
+    history, disputes, seen tx ids and parked transactions, and truncates the journal.
+    process_file on a journal_dir left by a crashed run loads the snapshot,
+    replays the journal tail and resumes reading the input where the journal
+    ends, so recovery costs the work since the last snapshot. The files are
+    removed once a run completes. A journal_dir belongs to one input file.
+
+    With parse_workers > 0 the publisher hands CSV parsing to that many worker
+    processes (see parallel_ingest.py). They parse the same read chunks the
+    sequential reader would and the publisher gets them back in file order,
+    so dispatch, ordering and journaling are unchanged.
+
+    process_file also reads the binary input format (binary_ingest.py),
+    detected by its magic. Records are unpacked from a memory map without
+    parsing, so parse_workers does not apply to it.
+
+    gzip, bzip2 and xz compressed CSV input is read as a stream and
+    decompressed in a background thread (compressed_input.py). Journal
+    offsets are positions in the decompressed stream. parse_workers does not
+    apply to compressed input either: the workers need the plain file to map.
     """
 
-    def __init__(self, num_consumers: int = 4):
+    DEFAULT_QUEUE_CAPACITY = 100_000
+    DEFAULT_BATCH_SIZE = 256
+    DEFAULT_SNAPSHOT_INTERVAL = 1_000_000
+    READ_CHUNK_BYTES = READ_CHUNK_BYTES
+    JOURNAL_FILE = "journal.bin"
+    SNAPSHOT_FILE = "snapshot.bin"
+
+    def __init__(
+        self,
+        num_consumers: int = 4,
+        dispatch_mode: DispatchMode = DispatchMode.SHARED,
+        fixed_point: bool = False,
+        state_factory: Callable[..., StateBackend] = StateManager,
+        max_parked: int = ParkingLot.DEFAULT_MAX_PARKED,
+        queue_capacity: Optional[int] = DEFAULT_QUEUE_CAPACITY,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        instrumentation: Optional[Instrumentation] = None,
+        journal_dir: Optional[str] = None,
+        snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL,
+        parse_workers: int = 0,
+    ):
         self._num_consumers = num_consumers
-        self._queue = InMemoryQueue()
-        self._state = StateManager()
+        self._batch_size = batch_size
+        self._dispatch_mode = dispatch_mode
+        self._fixed_point = fixed_point
+        # Shared queue also owns the DLQ in both modes
+        self._queue = InMemoryQueue(capacity=queue_capacity)
+        if dispatch_mode == DispatchMode.SHARDED:
+            self._consumer_queues = [InMemoryQueue(capacity=queue_capacity) for _ in range(num_consumers)]
+        elif dispatch_mode == DispatchMode.MAILBOX:
+            self._consumer_queues = [MailboxScheduler(num_consumers, capacity=queue_capacity)] * num_consumers
+        else:
+            self._consumer_queues = [self._queue] * num_consumers
+        self._state = state_factory(fixed_point=fixed_point)
         self._processor = TransactionProcessor(self._state)
+        self._parking_lot = ParkingLot(max_parked)
         self._stats = ProcessingStats()
+        self._instrumentation = instrumentation
+        self._instrumentation_report: Optional[dict] = None
+        self._journal_dir = journal_dir
+        self._snapshot_interval = snapshot_interval
+        self._journal: Optional[Journal] = None
+        self._parse_workers = parse_workers
+        # Raised by the publisher thread, re-raised by process_file
+        self._publisher_error: Optional[BaseException] = None
+
+    @property
+    def stats(self) -> ProcessingStats:
+        return self._stats
+
+    @property
+    def fixed_point(self) -> bool:
+        return self._fixed_point
+
+    @property
+    def queue_stats(self) -> List[QueueStats]:
+        """Depth and backpressure stats of each distinct consumer queue."""
+        return [queue.get_stats() for queue in dict.fromkeys(self._consumer_queues)]
+
+    @property
+    def instrumentation_report(self) -> Optional[dict]:
+        """Stage timings and counters of the last process_file run, if instrumented."""
+        return self._instrumentation_report
 
     def process_file(self, filepath: str) -> Dict[int, ClientAccount]:
-        """Process CSV file and return final account states."""
+        """
+        Process a CSV or binary transactions file and return final account states.
+        An error reading the input (e.g. a truncated binary or compressed file)
+        is raised once the consumers have stopped.
+        """
 
         # Phase 1: Main Processing (1 publisher thread, N consumer threads)
         logger.info("Starting main processing phase")
+        instrumentation = self._instrumentation
+        if instrumentation is not None:
+            instrumentation.start()
+        resume_offset = self._recover() if self._journal_dir is not None else None
 
-        publisher_thread = threading.Thread(target=self._publish_transactions, args=(filepath,))
+        publisher_thread = threading.Thread(target=self._publish_transactions, args=(filepath, resume_offset))
         publisher_thread.start()
 
         consumer_threads = []
-        for _ in range(self._num_consumers):
-            consumer_thread = threading.Thread(target=self._consume_transactions)
+        for index, consumer_queue in enumerate(self._consumer_queues):
+            if instrumentation is None:
+                consumer_thread = threading.Thread(target=self._consume_transactions, args=(consumer_queue,))
+            else:
+                consumer_thread = threading.Thread(
+                    target=self._consume_transactions_instrumented,
+                    args=(consumer_queue, instrumentation.consumer(index)),
+                )
             consumer_thread.start()
             consumer_threads.append(consumer_thread)
 
         publisher_thread.join()
-        self._queue.shutdown()
+        # Consumers may still hand released transactions to each other until all are idle
+        self._join_consumer_queues()
+        for consumer_queue in dict.fromkeys(self._consumer_queues):
+            consumer_queue.shutdown()
         for consumer_thread in consumer_threads:
             consumer_thread.join()
 
+        if self._publisher_error is not None:
+            error, self._publisher_error = self._publisher_error, None
+            if self._journal is not None:
+                # Keep the journal and snapshot: the run did not complete
+                self._journal.close()
+            raise error
+
         logger.info("Main processing phase complete")
 
-        # Phase 2: DLQ Retry (single-threaded)
+        # Phase 2: DLQ Retry (single-threaded), only for parking lot overflow
         dead_letter_queue_messages = self._queue.get_dead_letter_queue_messages()
         if dead_letter_queue_messages:
             logger.info(f"Retrying {len(dead_letter_queue_messages)} messages from dead letter queue")
             self._process_dead_letter_queue(dead_letter_queue_messages)
+        self._discard_unreleased()
+        if self._journal is not None:
+            self._finish_journal()
+
+        if instrumentation is not None:
+            instrumentation.finish()
+            self._instrumentation_report = instrumentation.report()
+            self._instrumentation_report["counters"] = self._stats.snapshot().to_dict()
 
         # Print final processing report to stderr
         print(
             f"Processed: {self._stats.processed}, "
             f"Failed: {self._stats.failed}, "
+            f"Parked: {self._stats.parked}, "
             f"DLQ retried: {self._stats.dlq_retried}",
             file=sys.stderr
         )
 
         return self._state.get_all_accounts()
 
-    def _publish_transactions(self, filepath: str) -> None:
-        """Read CSV and publish transactions to queue."""
-        with open(filepath, "r") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                transaction = self._parse_csv_row(row)
-                if transaction:
-                    self._queue.publish_message(transaction)
-
-    def _consume_transactions(self) -> None:
-        """Consumer loop: pull from queue, process, send failures to DLQ."""
+    def _publish_transactions(self, filepath: str, resume_offset: Optional[int] = None) -> None:
+        """
+        Read the input and publish transactions to the queues in batches.
+        Runs on the publisher thread: an error is kept for process_file to raise.
+        """
+        try:
+            self._publish_input(filepath, resume_offset)
+        except BaseException as error:
+            self._publisher_error = error
+
+    def _publish_input(self, filepath: str, resume_offset: Optional[int]) -> None:
+        if self._journal is not None:
+            self._publish_journaled(filepath, resume_offset)
+            return
+        if self._parse_workers == 0 and compression_of(filepath) is None and not is_binary_file(filepath):
+            with open(filepath, "r") as f:
+                batches = iter_transaction_batches(f, read_chunk_bytes=self.READ_CHUNK_BYTES, fixed_point=self._fixed_point)
+                if self._instrumentation is not None:
+                    batches = self._instrumentation.publisher.timed(batches)
+                for transactions in batches:
+                    self._publish_chunk(transactions)
+            return
+        with open_input(filepath, self.READ_CHUNK_BYTES) as f:
+            chunks = self._read_chunks(f, filepath, resume_offset)
+            if self._instrumentation is not None:
+                chunks = self._instrumentation.publisher.timed(chunks)
+            for _, _, transactions in chunks:
+                self._publish_chunk(transactions)
+
+    def _publish_journaled(self, filepath: str, resume_offset: Optional[int]) -> None:
+        """Journal each read chunk, then publish it; snapshot every snapshot_interval rows."""
+        rows_since_snapshot = 0
+        with open_input(filepath, self.READ_CHUNK_BYTES) as f:
+            chunks = self._read_chunks(f, filepath, resume_offset)
+            if self._instrumentation is not None:
+                chunks = self._instrumentation.publisher.timed(chunks)
+            for start_offset, end_offset, transactions in chunks:
+                self._journal.append(start_offset, end_offset, transactions)
+                self._publish_chunk(transactions)
+                rows_since_snapshot += len(transactions)
+                if rows_since_snapshot >= self._snapshot_interval:
+                    self._checkpoint(end_offset)
+                    rows_since_snapshot = 0
+        self._journal.sync()
+
+    def _read_chunks(
+        self, f: BinaryIO, filepath: str, resume_offset: Optional[int]
+    ) -> Iterator[Tuple[int, int, List[Transaction]]]:
+        """
+        (start_offset, end_offset, transactions) per read chunk of the input:
+        CSV, compressed CSV (f decompresses it, offsets are into the decompressed
+        stream) or binary.
+        """
+        if is_binary_file(filepath):
+            return iter_binary_chunks(
+                f, resume_offset, read_chunk_bytes=self.READ_CHUNK_BYTES, fixed_point=self._fixed_point
+            )
+        if self._parse_workers > 0 and compression_of(filepath) is None:
+            return iter_parallel_chunks(
+                filepath,
+                self._parse_workers,
+                start_offset=resume_offset,
+                range_bytes=self.READ_CHUNK_BYTES,
+                fixed_point=self._fixed_point,
+            )
+        return iter_transaction_chunks(
+            f, resume_offset, read_chunk_bytes=self.READ_CHUNK_BYTES, fixed_point=self._fixed_point
+        )
+
+    def _publish_chunk(self, transactions: List[Transaction]) -> None:
+        if self._instrumentation is not None:
+            start = time.perf_counter_ns()
+        if self._dispatch_mode == DispatchMode.SHARDED:
+            self._publish_sharded(transactions)
+        elif self._dispatch_mode == DispatchMode.MAILBOX:
+            # The scheduler groups by client itself; slicing keeps admission under capacity
+            scheduler = self._consumer_queues[0]
+            batch_size = self._batch_size
+            for start in range(0, len(transactions), batch_size):
+                scheduler.publish_batch(transactions[start:start + batch_size])
+        else:
+            self._publish_grouped(transactions)
+        if self._instrumentation is not None:
+            self._instrumentation.publisher.publish.record(time.perf_counter_ns() - start)
+
+    def _publish_grouped(self, transactions: List[Transaction]) -> None:
+        """
+        Publish a read chunk to the shared queue in batches of whole client groups.
+
+        All of a client's transactions in the chunk travel in one batch, which
+        the queue hands whole to a single consumer, so they are applied in file
+        order. Batches are cut at batch_size between groups; a group larger
+        than that goes out as one batch. Only a client whose transactions span
+        two read chunks can still have them applied out of order by two
+        consumers; SHARDED mode rules that out entirely.
+        """
+        groups: Dict[int, List[Transaction]] = {}
+        for transaction in transactions:
+            group = groups.get(transaction.client_id)
+            if group is None:
+                groups[transaction.client_id] = [transaction]
+            else:
+                group.append(transaction)
+
+        batch_size = self._batch_size
+        batch: List[Transaction] = []
+        for group in groups.values():
+            if batch and len(batch) + len(group) > batch_size:
+                self._queue.publish_batch(batch)
+                batch = []
+            batch.extend(group)
+        self._queue.publish_batch(batch)
+
+    def _publish_sharded(self, transactions: List[Transaction]) -> None:
+        """Split transactions by owning shard, keeping file order within each shard."""
+        num_consumers = self._num_consumers
+        shards: List[List[Transaction]] = [[] for _ in range(num_consumers)]
+        for transaction in transactions:
+            shards[transaction.client_id % num_consumers].append(transaction)
+        batch_size = self._batch_size
+        for consumer_queue, shard in zip(self._consumer_queues, shards):
+            for start in range(0, len(shard), batch_size):
+                consumer_queue.publish_batch(shard[start:start + batch_size])
+
+    def _consume_transactions(self, queue: InMemoryQueue) -> None:
+        """Consumer loop: pull batches from queue, process, park retriable failures."""
+        hand_off = self._dispatch_mode != DispatchMode.SHARED
+        while True:
+            batch = queue.consume_batch(self._batch_size)
+            if not batch:
+                # Empty batch: queue shut down and drained
+                break
+            for transaction in batch:
+                self._apply(transaction, hand_off)
+            queue.task_done(len(batch))
+
+    def _consume_transactions_instrumented(self, queue: InMemoryQueue, timings: ConsumerTimings) -> None:
+        """_consume_transactions, recording queue wait and busy time."""
+        clock = time.perf_counter_ns
+        hand_off = self._dispatch_mode != DispatchMode.SHARED
         while True:
-            transaction = self._queue.consume_message()
-            if transaction is None:
-                if self._queue.is_shutdown() and self._queue.is_empty():
-                    break
+            start = clock()
+            batch = queue.consume_batch(self._batch_size)
+            received = clock()
+            timings.queue_wait.record(received - start)
+            if not batch:
+                break
+            for transaction in batch:
+                self._apply_instrumented(transaction, timings, hand_off)
+            timings.busy_ns += clock() - received
+            queue.task_done(len(batch))
+            timings.batches += 1
+            timings.transactions += len(batch)
+
+    def _apply_instrumented(self, transaction: Transaction, timings: ConsumerTimings, hand_off: bool = False) -> None:
+        """_apply, recording client lock wait and apply time."""
+        clock = time.perf_counter_ns
+        client_id = transaction.client_id
+        pending = deque([transaction])
+        while pending:
+            transaction = pending.popleft()
+            if hand_off and transaction.client_id != client_id:
+                self._hand_off(transaction)
+                continue
+            if self._dispatch_mode != DispatchMode.SHARED:
+                start = clock()
+                released = self._process(transaction)
+                timings.apply.record(clock() - start)
+            else:
+                lock = self._state.get_client_lock(transaction.client_id)
+                start = clock()
+                with lock:
+                    acquired = clock()
+                    released = self._process(transaction)
+                    timings.apply.record(clock() - acquired)
+                timings.record_lock_wait(transaction.client_id, acquired - start)
+            pending.extend(released)
+
+    def _apply(self, transaction: Transaction, hand_off: bool = False) -> None:
+        """
+        Process a transaction, then every parked transaction its success releases.
+
+        hand_off is set by consumers that own the client of the transaction
+        without locking it (SHARDED and MAILBOX modes). They own no other
+        client, so a released transaction of another client is handed to
+        that client's queue or mailbox instead of being processed here.
+        """
+        client_id = transaction.client_id
+        pending = deque([transaction])
+        while pending:
+            transaction = pending.popleft()
+            if hand_off and transaction.client_id != client_id:
+                self._hand_off(transaction)
                 continue
+            if self._dispatch_mode != DispatchMode.SHARED:
+                # This consumer owns the client's shard or holds its mailbox, no lock needed
+                released = self._process(transaction)
+            else:
+                lock = self._state.get_client_lock(transaction.client_id)
+                with lock:
+                    released = self._process(transaction)
+            pending.extend(released)
+
+    def _hand_off(self, transaction: Transaction) -> None:
+        """Queue a released transaction for the consumer owning its client."""
+        if self._dispatch_mode == DispatchMode.SHARDED:
+            self._consumer_queues[transaction.client_id % self._num_consumers].hand_off([transaction])
+        else:
+            self._consumer_queues[0].hand_off([transaction])
 
-            lock = self._state.get_client_lock(transaction.client_id)
-            with lock:
-                result = self._processor.process_transaction(transaction)
+    def _join_consumer_queues(self) -> None:
+        """
+        Block until consumers have processed everything published so far.
+        A consumer can hand work to a queue that was already joined, so the
+        queues are joined again until a pass publishes nothing new.
+        """
+        queues = list(dict.fromkeys(self._consumer_queues))
+        while True:
+            published = [queue.get_stats().published for queue in queues]
+            for queue in queues:
+                queue.join()
+            if [queue.get_stats().published for queue in queues] == published:
+                return
+
+    def _process(self, transaction: Transaction) -> List[Transaction]:
+        """
+        Process one transaction and record the outcome. Caller holds the client lock.
+        Retriable failures are parked on the tx id they wait for (DLQ if the lot is full).
+        Returns the parked transactions released by a success.
+        """
+        result, reason = self._processor.process_with_reason(transaction)
 
-            if result == ProcessingResult.SUCCESS:
-                self._stats.record_success()
-            elif result == ProcessingResult.FAILED_PERMANENT:
-                self._stats.record_failure()
-            elif result == ProcessingResult.FAILED_RETRIABLE:
+        if result == ProcessingResult.SUCCESS:
+            self._stats.record_success(transaction.transaction_type)
+            return self._parking_lot.release(transaction.transaction_id)
+        if result == ProcessingResult.FAILED_PERMANENT:
+            self._stats.record_failure(transaction.transaction_type, reason)
+        elif result == ProcessingResult.FAILED_RETRIABLE:
+            if self._parking_lot.park(transaction):
+                self._stats.record_park(reason)
+            else:
                 self._queue.send_to_dead_letter_queue(transaction)
+        return []
 
     def _process_dead_letter_queue(self, messages: List[Transaction]) -> None:
         """
         Process dead letter queue messages synchronously (single-threaded).
         This runs after main processing, so no race conditions.
+        The DLQ only holds transactions that didn't fit in the parking lot.
         """
-        still_failed = []
-
         for transaction in messages:
             self._stats.record_dlq_retry()
+            self._apply(transaction)
 
-            lock = self._state.get_client_lock(transaction.client_id)
-            with lock:
-                result = self._processor.process_transaction(transaction)
-
-            if result == ProcessingResult.SUCCESS:
-                self._stats.record_success()
-            elif result == ProcessingResult.FAILED_PERMANENT:
-                self._stats.record_failure()
-                logger.warning(f"Dead letter queue message permanently failed: {transaction}")
-            elif result == ProcessingResult.FAILED_RETRIABLE:
-                still_failed.append(transaction)
-
+    def _discard_unreleased(self) -> None:
+        """Log transactions whose dependency never arrived."""
+        still_failed = self._parking_lot.drain() + self._queue.get_dead_letter_queue_messages()
         if still_failed:
-            logger.warning(f"{len(still_failed)} messages still failed after dead letter queue retry")
+            logger.warning(f"{len(still_failed)} messages still waiting on a transaction that never succeeded")
             for transaction in still_failed:
                 logger.warning(f"  Discarding: {transaction}")
 
-    def _parse_csv_row(self, row: Dict[str, str]) -> Optional[Transaction]:
-        """Parse CSV row into Transaction."""
-        try:
-            normalized = {k.strip(): v.strip() for k, v in row.items()}
-
-            transaction_type_str = normalized["type"].lower()
-            client_id = int(normalized["client"])
-            transaction_id = int(normalized["tx"])
-
-            amount = None
-            amount_str = normalized.get("amount", "")
-            if amount_str:
-                amount = Decimal(amount_str)
-
-            return Transaction(
-                transaction_type=TransactionType(transaction_type_str),
-                client_id=client_id,
-                transaction_id=transaction_id,
-                amount=amount,
+    def _journal_path(self, name: str) -> str:
+        return os.path.join(self._journal_dir, name)
+
+    def _recover(self) -> Optional[int]:
+        """
+        Restore state left in journal_dir by a crashed run and open the journal.
+        Returns the input byte offset to resume reading at, or None to start from the top.
+        """
+        os.makedirs(self._journal_dir, exist_ok=True)
+        snapshot = read_snapshot(self._journal_path(self.SNAPSHOT_FILE), fixed_point=self._fixed_point)
+        resume_offset = None
+        if snapshot is not None:
+            self._restore(snapshot)
+            resume_offset = snapshot.input_offset
+
+        # Replay single-threaded in journal order, which is file order
+        replayed = 0
+        valid_length = 0
+        for record in read_journal(self._journal_path(self.JOURNAL_FILE), fixed_point=self._fixed_point):
+            valid_length = record.journal_end
+            if resume_offset is not None and record.end_offset <= resume_offset:
+                # Already covered by the snapshot (crash before the journal was truncated)
+                continue
+            for transaction in record.transactions:
+                self._apply(transaction)
+            replayed += len(record.transactions)
+            resume_offset = record.end_offset
+
+        if resume_offset is not None:
+            logger.info(
+                f"Recovered from {self._journal_dir}: snapshot at offset "
+                f"{snapshot.input_offset if snapshot else 0}, replayed {replayed} journaled rows, resuming at {resume_offset}"
             )
-        except (KeyError, ValueError) as e:
-            logger.warning(f"Failed to parse row {row}: {e}")
-            return None
+        self._journal = Journal(self._journal_path(self.JOURNAL_FILE), valid_length=valid_length)
+        return resume_offset
+
+    def _restore(self, snapshot: Snapshot) -> None:
+        self._state.import_seen_transaction_ids(snapshot.seen)
+        for account in snapshot.accounts:
+            restored = self._state.get_or_create_account(account.client_id)
+            restored.available = account.available
+            restored.held = account.held
+            restored.locked = account.locked
+        for transaction, disputed in snapshot.transactions:
+            self._state.store_transaction(transaction)
+            if disputed:
+                self._state.mark_transaction_disputed(transaction.transaction_id)
+        for transaction in snapshot.parked:
+            if not self._parking_lot.park(transaction):
+                self._queue.send_to_dead_letter_queue(transaction)
+        self._stats.merge(snapshot.stats)
+
+    def _checkpoint(self, input_offset: int) -> None:
+        """
+        Snapshot state as of input_offset and truncate the journal. Called by the
+        publisher between chunks: joining the queues first is the quiesce
+        barrier, so every row before input_offset has been applied and consumers
+        sit idle while the snapshot is written.
+        """
+        self._join_consumer_queues()
+        dead_letters = self._queue.get_dead_letter_queue_messages()
+        for transaction in dead_letters:
+            self._queue.send_to_dead_letter_queue(transaction)
+
+        state = self._state
+        write_snapshot(
+            self._journal_path(self.SNAPSHOT_FILE),
+            input_offset,
+            state.get_all_accounts().values(),
+            ((transaction, state.is_transaction_disputed(transaction.transaction_id)) for transaction in state.iter_transactions()),
+            self._parking_lot.parked() + dead_letters,
+            self._stats.snapshot(),
+            state.export_seen_transaction_ids(),
+        )
+        self._journal.truncate()
+
+    def _finish_journal(self) -> None:
+        """The run completed: nothing is left to recover."""
+        self._journal.close()
+        for name in (self.JOURNAL_FILE, self.SNAPSHOT_FILE):
+            path = self._journal_path(name)
+            if os.path.exists(path):
+                os.remove(path)
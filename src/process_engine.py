@@ -0,0 +1,355 @@
+import logging
+import multiprocessing
+import os
+import sys
+from collections import deque
+from decimal import Decimal
+from queue import Empty, Full
+from typing import Callable, Dict, List, Optional, Tuple
+
+from binary_ingest import MAGIC, MAX_CACHED_AMOUNTS, NO_AMOUNT, RECORD, TYPES, is_binary_file
+from csv_ingest import CsvTransactionParser, read_header
+from models import ClientAccount, ProcessingResult, ProcessingStats, Transaction
+from money import Amount, fixed_to_decimal
+from parking_lot import ParkingLot
+from state_manager import StateBackend, StateManager
+from transaction_batch import SharedBatchRing, TransactionBatch
+from transaction_processor import TransactionProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class MultiProcessPaymentsEngine:
+    """
+    Partitions clients across worker processes to scale past the GIL.
+
+    The parent reads the CSV and routes every raw line to the worker that owns
+    its client (client_id % num_workers). Each worker parses and applies its
+    lines in file order with its own StateManager/TransactionProcessor, retries
+    its own DLQ (parking lot overflow) at the end, and sends its accounts back. Client partitions are
+    disjoint, so the parent merges the results with a plain dict update.
+
+    Binary input (binary_ingest.py) is already decoded, so the parent routes
+    its records instead: each worker has a SharedBatchRing, a shared memory
+    ring of TransactionBatch slots, and the parent writes the records of
+    each worker's clients into it as typed columns. The worker reads a batch
+    in place and applies it row by row with TransactionProcessor.process_row,
+    so no Transaction is pickled, copied or built on the way.
+
+    Transaction ids are assumed to be globally unique (as the input spec
+    guarantees). A tx id reused by clients in different partitions is treated
+    as two distinct transactions, whereas PaymentsEngine would skip the second.
+
+    fixed_point, state_factory and max_parked have the same meaning as in PaymentsEngine;
+    state_factory is called in each worker, so it must be picklable.
+    """
+
+    LINES_PER_CHUNK = 4096
+    MAX_CHUNKS_IN_FLIGHT = 64
+    RESULT_POLL_INTERVAL = 1.0
+    BATCH_SLOTS = SharedBatchRing.DEFAULT_SLOTS
+    ROWS_PER_BATCH = SharedBatchRing.DEFAULT_ROWS_PER_SLOT
+
+    def __init__(
+        self,
+        num_workers: Optional[int] = None,
+        fixed_point: bool = False,
+        state_factory: Callable[..., StateBackend] = StateManager,
+        max_parked: int = ParkingLot.DEFAULT_MAX_PARKED,
+    ):
+        self._num_workers = num_workers or os.cpu_count() or 1
+        self._max_parked = max_parked
+        self._fixed_point = fixed_point
+        self._state_factory = state_factory
+        self._stats = ProcessingStats()
+
+    @property
+    def stats(self) -> ProcessingStats:
+        return self._stats
+
+    def process_file(self, filepath: str) -> Dict[int, ClientAccount]:
+        """Process a CSV or binary transactions file and return final account states."""
+        context = multiprocessing.get_context()
+        worker_options = (self._fixed_point, self._state_factory, self._max_parked)
+        if is_binary_file(filepath):
+            rings = [SharedBatchRing(context, self.BATCH_SLOTS, self.ROWS_PER_BATCH) for _ in range(self._num_workers)]
+            try:
+                results = self._run_workers(
+                    context, _run_batch_worker, worker_options, rings, lambda workers: self._publish_batches(filepath, rings, workers)
+                )
+            finally:
+                for ring in rings:
+                    ring.close()
+                    ring.unlink()
+        else:
+            with open(filepath, "r") as f:
+                fieldnames = read_header(f) or []
+                client_column = CsvTransactionParser(fieldnames).client_column
+                line_queues = [context.Queue(maxsize=self.MAX_CHUNKS_IN_FLIGHT) for _ in range(self._num_workers)]
+
+                def publish(workers: List) -> None:
+                    self._publish_lines(f, client_column, line_queues, workers)
+                    for line_queue in line_queues:
+                        self._put_lines(line_queue, None, workers)
+
+                try:
+                    results = self._run_workers(context, _run_worker, (fieldnames, *worker_options), line_queues, publish)
+                except BaseException:
+                    # Lines left for a dead worker would keep the queue's feeder thread, and exit, waiting
+                    for line_queue in line_queues:
+                        line_queue.cancel_join_thread()
+                    raise
+
+        accounts: Dict[int, ClientAccount] = {}
+        for worker_accounts, worker_stats in results:
+            accounts.update(worker_accounts)
+            self._stats.merge(worker_stats)
+
+        print(
+            f"Processed: {self._stats.processed}, "
+            f"Failed: {self._stats.failed}, "
+            f"Parked: {self._stats.parked}, "
+            f"DLQ retried: {self._stats.dlq_retried}",
+            file=sys.stderr
+        )
+
+        return accounts
+
+    def _run_workers(self, context, target: Callable, worker_args: Tuple, channels: List, publish: Callable) -> List[Tuple]:
+        """Start one worker per channel, run publish(workers) and return the workers' results."""
+        result_queue = context.Queue()
+        workers = [
+            context.Process(target=target, args=(index, *worker_args, channel, result_queue))
+            for index, channel in enumerate(channels)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            publish(workers)
+            return self._collect_results(workers, result_queue)
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+                worker.join()
+
+    def _publish_lines(self, f, client_column: Optional[int], line_queues: List, workers: List) -> None:
+        """Route raw lines to the worker owning their client, in chunks."""
+        buffers: List[List[str]] = [[] for _ in line_queues]
+        while True:
+            lines = f.readlines(1 << 20)
+            if not lines:
+                break
+            for line in lines:
+                index = self._partition(line, client_column)
+                buffer = buffers[index]
+                buffer.append(line)
+                if len(buffer) >= self.LINES_PER_CHUNK:
+                    self._put_lines(line_queues[index], buffer, workers)
+                    buffers[index] = []
+
+        for index, buffer in enumerate(buffers):
+            if buffer:
+                self._put_lines(line_queues[index], buffer, workers)
+
+    def _put_lines(self, line_queue, lines: Optional[List[str]], workers: List) -> None:
+        """Queue a chunk of lines (None for the end), raising if a worker died while the queue is full."""
+        while True:
+            try:
+                line_queue.put(lines, timeout=self.RESULT_POLL_INTERVAL)
+                return
+            except Full:
+                self._check_workers(workers)
+
+    def _publish_batches(self, filepath: str, rings: List[SharedBatchRing], workers: List) -> None:
+        """Route binary records to the ring of the worker owning their client, in batches."""
+        num_workers = self._num_workers
+        rows_per_batch = rings[0].rows_per_slot
+        batches = [TransactionBatch() for _ in rings]
+        with open(filepath, "rb") as f:
+            f.seek(len(MAGIC))
+            while True:
+                data = f.read(rows_per_batch * RECORD.size)
+                if not data:
+                    break
+                if len(data) % RECORD.size:
+                    raise ValueError("truncated binary transactions file")
+                for code, client_id, transaction_id, amount in RECORD.iter_unpack(data):
+                    index = client_id % num_workers
+                    batch = batches[index]
+                    batch.append(code, client_id, transaction_id, amount)
+                    if len(batch) >= rows_per_batch:
+                        self._put(rings[index], batch, workers)
+                        batches[index] = TransactionBatch()
+
+        for ring, batch in zip(rings, batches):
+            if batch:
+                self._put(ring, batch, workers)
+            while not ring.put_end(timeout=self.RESULT_POLL_INTERVAL):
+                self._check_workers(workers)
+
+    def _put(self, ring: SharedBatchRing, batch: TransactionBatch, workers: List) -> None:
+        while not ring.put(batch, timeout=self.RESULT_POLL_INTERVAL):
+            self._check_workers(workers)
+
+    def _partition(self, line: str, client_column: Optional[int]) -> int:
+        """
+        Worker index for a raw line. Lines whose client can't be read cheaply
+        go to worker 0, whose parser reports them like any malformed row.
+        """
+        if client_column is None:
+            return 0
+        try:
+            return int(line.split(",", client_column + 1)[client_column]) % self._num_workers
+        except (IndexError, ValueError):
+            return 0
+
+    def _collect_results(self, workers: List, result_queue) -> List[Tuple]:
+        results: List[Optional[Tuple]] = [None] * len(workers)
+        remaining = len(workers)
+        while remaining:
+            try:
+                index, result = result_queue.get(timeout=self.RESULT_POLL_INTERVAL)
+            except Empty:
+                self._check_workers(workers)
+                continue
+            results[index] = result
+            remaining -= 1
+        return results
+
+    def _check_workers(self, workers: List) -> None:
+        for worker in workers:
+            if worker.exitcode not in (None, 0):
+                raise RuntimeError(f"Worker process {worker.name} exited with code {worker.exitcode}")
+
+
+def _run_worker(
+    index: int,
+    fieldnames: List[str],
+    fixed_point: bool,
+    state_factory: Callable[..., StateBackend],
+    max_parked: int,
+    line_queue,
+    result_queue,
+) -> None:
+    """Worker process entry point for CSV input: parses and applies the lines of its partition."""
+    parser = CsvTransactionParser(fieldnames, fixed_point=fixed_point)
+    partition = _Partition(fixed_point, state_factory, max_parked)
+    while True:
+        lines = line_queue.get()
+        if lines is None:
+            break
+        for transaction in parser.parse_lines(lines):
+            partition.apply(transaction)
+    result_queue.put((index, partition.finish()))
+
+
+def _run_batch_worker(
+    index: int,
+    fixed_point: bool,
+    state_factory: Callable[..., StateBackend],
+    max_parked: int,
+    ring: SharedBatchRing,
+    result_queue,
+) -> None:
+    """Worker process entry point for binary input: applies the batches in its ring in place."""
+    partition = _Partition(fixed_point, state_factory, max_parked)
+    try:
+        while True:
+            batch = ring.get()
+            if batch is None:
+                break
+            partition.apply_batch(batch)
+            ring.release()
+    finally:
+        ring.close()
+    result_queue.put((index, partition.finish()))
+
+
+class _Partition:
+    """
+    A worker's clients, applied sequentially: a worker owns its clients, so
+    no client locks are needed and order is file order. Retriable failures
+    are parked and retried when their dependency succeeds, as in
+    PaymentsEngine. What doesn't fit in the parking lot goes to a DLQ
+    list instead, retried once by finish() after the input is consumed,
+    when the transactions it waits for may have arrived.
+    """
+
+    def __init__(self, fixed_point: bool, state_factory: Callable[..., StateBackend], max_parked: int):
+        self._fixed_point = fixed_point
+        self._state = state_factory(fixed_point=fixed_point)
+        self._processor = TransactionProcessor(self._state)
+        self._parking_lot = ParkingLot(max_parked)
+        self._dead_letters: List[Transaction] = []
+        self._stats = ProcessingStats()
+        self._decimals: Dict[int, Decimal] = {}
+
+    def apply(self, transaction: Transaction) -> None:
+        """Apply a transaction, then every parked transaction its success releases."""
+        pending = deque([transaction])
+        while pending:
+            transaction = pending.popleft()
+            result, reason = self._processor.process_with_reason(transaction)
+            if result == ProcessingResult.SUCCESS:
+                self._stats.record_success(transaction.transaction_type)
+                pending.extend(self._parking_lot.release(transaction.transaction_id))
+            elif result == ProcessingResult.FAILED_PERMANENT:
+                self._stats.record_failure(transaction.transaction_type, reason)
+            elif result == ProcessingResult.FAILED_RETRIABLE:
+                self._park(transaction, reason)
+
+    def apply_batch(self, batch: TransactionBatch) -> None:
+        """
+        Apply the rows of a batch without building a Transaction per row;
+        one is built only for a row that has to be parked.
+        """
+        process_row = self._processor.process_row
+        parking_lot = self._parking_lot
+        stats = self._stats
+        for code, client_id, transaction_id, units in batch.rows():
+            transaction_type = TYPES[code]
+            amount = self._amount(units)
+            result, reason = process_row(transaction_type, client_id, transaction_id, amount)
+            if result == ProcessingResult.SUCCESS:
+                stats.record_success(transaction_type)
+                for released in parking_lot.release(transaction_id):
+                    self.apply(released)
+            elif result == ProcessingResult.FAILED_PERMANENT:
+                stats.record_failure(transaction_type, reason)
+            elif result == ProcessingResult.FAILED_RETRIABLE:
+                self._park(Transaction(transaction_type, client_id, transaction_id, amount), reason)
+
+    def _amount(self, units: int) -> Optional[Amount]:
+        """A batch amount in the engine's representation; Decimals are cached as in binary_ingest."""
+        if units == NO_AMOUNT:
+            return None
+        if self._fixed_point:
+            return units
+        value = self._decimals.get(units)
+        if value is None:
+            if len(self._decimals) >= MAX_CACHED_AMOUNTS:
+                self._decimals.clear()
+            value = self._decimals[units] = fixed_to_decimal(units)
+        return value
+
+    def _park(self, transaction: Transaction, reason) -> None:
+        if self._parking_lot.park(transaction):
+            self._stats.record_park(reason)
+        else:
+            self._dead_letters.append(transaction)
+
+    def finish(self) -> Tuple[Dict[int, ClientAccount], ProcessingStats]:
+        """Retry the DLQ, log what is still waiting and return the partition's accounts and stats."""
+        dead_letters, self._dead_letters = self._dead_letters, []
+        if dead_letters:
+            logger.info(f"Retrying {len(dead_letters)} messages from dead letter queue")
+        for transaction in dead_letters:
+            self._stats.record_dlq_retry()
+            self.apply(transaction)
+        still_failed = self._parking_lot.drain() + self._dead_letters
+        if still_failed:
+            logger.warning(f"{len(still_failed)} messages still waiting on a transaction that never succeeded")
+            for transaction in still_failed:
+                logger.warning(f"  Discarding: {transaction}")
+        return self._state.get_all_accounts(), self._stats.snapshot()
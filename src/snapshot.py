@@ -0,0 +1,158 @@
+import json
+import os
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+
+from journal import decode_amount, decode_transaction, encode_amount, encode_transaction
+from models import ClientAccount, StatsSnapshot, Transaction
+
+MAGIC = b"TPSNAP02"
+
+# Header after the magic: input offset u64, stats JSON length u32, then the JSON
+_HEADER = struct.Struct("<QI")
+_CLIENT = struct.Struct("<q")
+_CHECKSUM = struct.Struct("<I")
+_BLOB_LENGTH = struct.Struct("<Q")
+
+# Every entry of a section starts with _ENTRY; _END closes the section
+_ENTRY = 1
+_END = 0
+
+FLUSH_BYTES = 1 << 20
+
+
+@dataclass
+class Snapshot:
+    """Engine state as of input_offset: every row before it applied, none after."""
+    input_offset: int
+    accounts: List[ClientAccount] = field(default_factory=list)
+    # History with each transaction's disputed flag
+    transactions: List[Tuple[Transaction, bool]] = field(default_factory=list)
+    # Parked and dead-lettered transactions still waiting on a dependency
+    parked: List[Transaction] = field(default_factory=list)
+    stats: StatsSnapshot = field(default_factory=StatsSnapshot)
+    # StateBackend.export_seen_transaction_ids: processed tx ids not in the history
+    seen: bytes = b""
+
+
+class _ChecksummedWriter:
+    def __init__(self, f):
+        self._f = f
+        self._buffer = bytearray()
+        self.checksum = 0
+
+    @property
+    def buffer(self) -> bytearray:
+        if len(self._buffer) >= FLUSH_BYTES:
+            self.flush()
+        return self._buffer
+
+    def flush(self) -> None:
+        self.checksum = zlib.crc32(self._buffer, self.checksum)
+        self._f.write(self._buffer)
+        self._buffer = bytearray()
+
+
+def write_snapshot(
+    path: str,
+    input_offset: int,
+    accounts: Iterable[ClientAccount],
+    transactions: Iterable[Tuple[Transaction, bool]],
+    parked: Iterable[Transaction],
+    stats: StatsSnapshot,
+    seen: bytes = b"",
+) -> None:
+    """
+    Write a binary snapshot atomically: to a temporary file, fsynced, then
+    renamed over path. A crash mid-write leaves the previous snapshot intact.
+    Sections are streamed, so the history is never copied into a list.
+    """
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as f:
+        writer = _ChecksummedWriter(f)
+        stats_json = json.dumps(stats.to_dict()).encode()
+        writer.buffer.extend(MAGIC + _HEADER.pack(input_offset, len(stats_json)) + stats_json)
+
+        for account in accounts:
+            out = writer.buffer
+            out.append(_ENTRY)
+            out += _CLIENT.pack(account.client_id)
+            encode_amount(account.available, out)
+            encode_amount(account.held, out)
+            out.append(account.locked)
+        writer.buffer.append(_END)
+
+        for transaction, disputed in transactions:
+            out = writer.buffer
+            out.append(_ENTRY)
+            out.append(disputed)
+            encode_transaction(transaction, out)
+        writer.buffer.append(_END)
+
+        for transaction in parked:
+            out = writer.buffer
+            out.append(_ENTRY)
+            encode_transaction(transaction, out)
+        writer.buffer.append(_END)
+
+        writer.buffer.extend(_BLOB_LENGTH.pack(len(seen)))
+        writer.flush()
+        writer.buffer.extend(seen)
+        writer.flush()
+        f.write(_CHECKSUM.pack(writer.checksum))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary_path, path)
+    _fsync_directory(os.path.dirname(os.path.abspath(path)))
+
+
+def read_snapshot(path: str, fixed_point: bool = False) -> Optional[Snapshot]:
+    """Load a snapshot, or None if there is none. Raises ValueError if it is corrupt."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        data = f.read()
+    body, trailer = data[:-_CHECKSUM.size], data[-_CHECKSUM.size:]
+    if not data.startswith(MAGIC) or len(trailer) < _CHECKSUM.size or zlib.crc32(body) != _CHECKSUM.unpack(trailer)[0]:
+        raise ValueError(f"corrupt snapshot {path}")
+
+    offset = len(MAGIC)
+    input_offset, stats_length = _HEADER.unpack_from(body, offset)
+    offset += _HEADER.size
+    snapshot = Snapshot(input_offset, stats=StatsSnapshot.from_dict(json.loads(body[offset:offset + stats_length])))
+    offset += stats_length
+
+    while body[offset] == _ENTRY:
+        (client_id,) = _CLIENT.unpack_from(body, offset + 1)
+        available, offset = decode_amount(body, offset + 1 + _CLIENT.size, fixed_point)
+        held, offset = decode_amount(body, offset, fixed_point)
+        snapshot.accounts.append(ClientAccount(client_id, available, held, bool(body[offset])))
+        offset += 1
+    offset += 1
+
+    while body[offset] == _ENTRY:
+        disputed = bool(body[offset + 1])
+        transaction, offset = decode_transaction(body, offset + 2, fixed_point)
+        snapshot.transactions.append((transaction, disputed))
+    offset += 1
+
+    while body[offset] == _ENTRY:
+        transaction, offset = decode_transaction(body, offset + 1, fixed_point)
+        snapshot.parked.append(transaction)
+    offset += 1
+
+    (seen_length,) = _BLOB_LENGTH.unpack_from(body, offset)
+    offset += _BLOB_LENGTH.size
+    snapshot.seen = bytes(body[offset:offset + seen_length])
+    return snapshot
+
+
+def _fsync_directory(directory: str) -> None:
+    """Make a rename in directory durable."""
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,257 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import weakref
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from models import ClientAccount, Transaction, TransactionType
+from money import Amount
+from state_manager import StateBackend
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS accounts ("
+    " client_id INTEGER PRIMARY KEY, available TEXT NOT NULL, held TEXT NOT NULL, locked INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS transactions ("
+    " tx_id INTEGER PRIMARY KEY, type TEXT NOT NULL, client_id INTEGER NOT NULL, amount TEXT,"
+    " disputed INTEGER NOT NULL DEFAULT 0)",
+)
+
+# Fixed SQL text, so sqlite3's statement cache compiles each statement once
+_SELECT_ACCOUNT = "SELECT available, held, locked FROM accounts WHERE client_id = ?"
+_SELECT_ACCOUNTS = "SELECT client_id, available, held, locked FROM accounts"
+_UPSERT_ACCOUNT = "INSERT OR REPLACE INTO accounts (client_id, available, held, locked) VALUES (?, ?, ?, ?)"
+_SELECT_TRANSACTION = "SELECT type, client_id, amount FROM transactions WHERE tx_id = ?"
+_SELECT_TRANSACTION_EXISTS = "SELECT 1 FROM transactions WHERE tx_id = ?"
+_SELECT_TRANSACTIONS = "SELECT tx_id, type, client_id, amount FROM transactions ORDER BY tx_id"
+_SELECT_DISPUTED = "SELECT disputed FROM transactions WHERE tx_id = ?"
+_INSERT_TRANSACTION = "INSERT OR REPLACE INTO transactions (tx_id, type, client_id, amount, disputed) VALUES (?, ?, ?, ?, 0)"
+_UPDATE_DISPUTED = "UPDATE transactions SET disputed = ? WHERE tx_id = ?"
+
+# Rows fetched per lock acquisition by iter_transactions
+_ITER_FETCH_ROWS = 10_000
+
+
+class SqliteStateManager(StateBackend):
+    """
+    State backend keeping accounts and transaction history in SQLite (WAL
+    mode), for histories too large for the in-memory backends.
+
+    Writes are batched: stored transactions and dispute flag changes collect
+    in an in-memory buffer, which lookups consult first, and are flushed in a
+    single SQL transaction with executemany once batch_rows have accumulated.
+    Every statement is a fixed parameterized string, so it is compiled once
+    and reused from the connection's statement cache.
+
+    Withdrawals are stored like deposits: on disk a row per transaction is
+    cheap, and has_transaction and get_transaction share the table.
+
+    Accounts sit in a hot cache in front of the database: a client's row is
+    read once and the ClientAccount is then served from memory and mutated in
+    place, as TransactionProcessor expects. The cache is written back by
+    flush(), get_all_accounts() and close(). Entries are never evicted, since
+    an account evicted while a consumer still holds it would lose that
+    consumer's update; client ids are u16, so the cache holds at most 65,536
+    accounts.
+
+    With path=None the database is a temporary file, removed by close() or
+    when the manager is garbage collected. An existing database at path is
+    reopened with its accounts and history; it must have been written in the
+    same amount mode (fixed_point or not).
+
+    One connection is shared by all threads and serialized on a lock.
+    """
+
+    DEFAULT_BATCH_ROWS = 10_000
+    DEFAULT_CACHE_KIB = 64 * 1024
+
+    def __init__(
+        self,
+        fixed_point: bool = False,
+        path: Optional[str] = None,
+        batch_rows: int = DEFAULT_BATCH_ROWS,
+        cache_kib: int = DEFAULT_CACHE_KIB,
+    ):
+        self._fixed_point = fixed_point
+        self._batch_rows = batch_rows
+        temporary = path is None
+        if temporary:
+            fd, path = tempfile.mkstemp(prefix="toy-payments-", suffix=".sqlite")
+            os.close(fd)
+        self._path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, cached_statements=32)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(f"PRAGMA cache_size=-{cache_kib}")
+        for statement in _SCHEMA:
+            self._connection.execute(statement)
+        self._closer = weakref.finalize(self, _close, self._connection, path if temporary else None)
+        # Lookups reuse one cursor instead of creating one per execute()
+        self._cursor = self._connection.cursor()
+
+        self._db_lock = threading.Lock()
+        self._global_lock = threading.Lock()
+        self._client_locks: Dict[int, threading.Lock] = {}
+        self._accounts: Dict[int, ClientAccount] = {}
+        # Writes not yet flushed: stored transactions, and dispute flags by tx id
+        self._pending_transactions: Dict[int, Transaction] = {}
+        self._pending_disputes: Dict[int, bool] = {}
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def get_client_lock(self, client_id: int) -> threading.Lock:
+        with self._global_lock:
+            if client_id not in self._client_locks:
+                self._client_locks[client_id] = threading.Lock()
+            return self._client_locks[client_id]
+
+    def get_or_create_account(self, client_id: int) -> ClientAccount:
+        account = self._accounts.get(client_id)
+        if account is None:
+            with self._db_lock:
+                account = self._accounts.get(client_id)
+                if account is None:
+                    row = self._cursor.execute(_SELECT_ACCOUNT, (client_id,)).fetchone()
+                    account = self._account_from_row(client_id, row) if row else self._new_account(client_id)
+                    self._accounts[client_id] = account
+        return account
+
+    def _new_account(self, client_id: int) -> ClientAccount:
+        if self._fixed_point:
+            return ClientAccount(client_id=client_id, available=0, held=0)
+        return ClientAccount(client_id=client_id)
+
+    def store_transaction(self, transaction: Transaction) -> None:
+        with self._db_lock:
+            self._pending_transactions[transaction.transaction_id] = transaction
+            if len(self._pending_transactions) + len(self._pending_disputes) >= self._batch_rows:
+                self._flush()
+
+    def get_transaction(self, transaction_id: int) -> Optional[Transaction]:
+        with self._db_lock:
+            transaction = self._pending_transactions.get(transaction_id)
+            if transaction is not None:
+                return transaction
+            row = self._cursor.execute(_SELECT_TRANSACTION, (transaction_id,)).fetchone()
+        if row is None:
+            return None
+        transaction_type, client_id, amount = row
+        return Transaction(TransactionType(transaction_type), client_id, transaction_id, self._decode_amount(amount))
+
+    def has_transaction(self, transaction_id: int) -> bool:
+        with self._db_lock:
+            if transaction_id in self._pending_transactions:
+                return True
+            return self._cursor.execute(_SELECT_TRANSACTION_EXISTS, (transaction_id,)).fetchone() is not None
+
+    def mark_transaction_disputed(self, transaction_id: int) -> None:
+        self._set_disputed(transaction_id, True)
+
+    def is_transaction_disputed(self, transaction_id: int) -> bool:
+        with self._db_lock:
+            disputed = self._pending_disputes.get(transaction_id)
+            if disputed is not None:
+                return disputed
+            row = self._cursor.execute(_SELECT_DISPUTED, (transaction_id,)).fetchone()
+        return bool(row and row[0])
+
+    def clear_transaction_dispute(self, transaction_id: int) -> None:
+        self._set_disputed(transaction_id, False)
+
+    def _set_disputed(self, transaction_id: int, disputed: bool) -> None:
+        with self._db_lock:
+            self._pending_disputes[transaction_id] = disputed
+            if len(self._pending_transactions) + len(self._pending_disputes) >= self._batch_rows:
+                self._flush()
+
+    def iter_transactions(self) -> Iterator[Transaction]:
+        """Iterate over the stored history in tx id order, streamed from the database."""
+        with self._db_lock:
+            self._flush()
+            cursor = self._connection.execute(_SELECT_TRANSACTIONS)
+        while True:
+            with self._db_lock:
+                rows = cursor.fetchmany(_ITER_FETCH_ROWS)
+            if not rows:
+                return
+            for transaction_id, transaction_type, client_id, amount in rows:
+                yield Transaction(TransactionType(transaction_type), client_id, transaction_id, self._decode_amount(amount))
+
+    def export_seen_transaction_ids(self) -> bytes:
+        # Withdrawals have rows like deposits, so iter_transactions covers every id
+        return b""
+
+    def import_seen_transaction_ids(self, data: bytes) -> None:
+        pass
+
+    def get_all_accounts(self) -> Dict[int, ClientAccount]:
+        """Return all accounts: cached ones, plus rows of a reopened database not loaded in this run."""
+        with self._db_lock:
+            self._flush(write_accounts=True)
+            rows = self._cursor.execute(_SELECT_ACCOUNTS).fetchall()
+        accounts = {client_id: self._account_from_row(client_id, row) for client_id, *row in rows}
+        accounts.update(self._accounts)
+        return accounts
+
+    def flush(self) -> None:
+        """Write buffered transactions and dispute flags, and the cached accounts, to the database."""
+        with self._db_lock:
+            self._flush(write_accounts=True)
+
+    def close(self) -> None:
+        """Flush and close the database. A temporary database is deleted."""
+        if self._closer.alive:
+            with self._db_lock:
+                self._flush(write_accounts=True)
+            self._closer()
+
+    def _flush(self, write_accounts: bool = False) -> None:
+        """Write buffered history, and with write_accounts the account cache, in one SQL transaction. Caller holds _db_lock."""
+        transactions = [
+            (transaction.transaction_id, transaction.transaction_type.value, transaction.client_id, self._encode_amount(transaction.amount))
+            for transaction in self._pending_transactions.values()
+        ]
+        disputes = [(disputed, transaction_id) for transaction_id, disputed in self._pending_disputes.items()]
+        accounts = [self._account_row(account) for account in list(self._accounts.values())] if write_accounts else []
+
+        connection = self._connection
+        connection.execute("BEGIN")
+        try:
+            connection.executemany(_INSERT_TRANSACTION, transactions)
+            connection.executemany(_UPDATE_DISPUTED, disputes)
+            connection.executemany(_UPSERT_ACCOUNT, accounts)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        self._pending_transactions.clear()
+        self._pending_disputes.clear()
+
+    def _account_row(self, account: ClientAccount) -> Tuple:
+        return account.client_id, str(account.available), str(account.held), int(account.locked)
+
+    def _account_from_row(self, client_id: int, row: List) -> ClientAccount:
+        available, held, locked = row
+        return ClientAccount(client_id, self._decode_amount(available), self._decode_amount(held), bool(locked))
+
+    def _encode_amount(self, amount: Optional[Amount]) -> Optional[str]:
+        # Amounts are stored as text, exact in both representations
+        return None if amount is None else str(amount)
+
+    def _decode_amount(self, text: Optional[str]) -> Optional[Amount]:
+        if text is None:
+            return None
+        return int(text) if self._fixed_point else Decimal(text)
+
+
+def _close(connection: sqlite3.Connection, temporary_path: Optional[str]) -> None:
+    connection.close()
+    if temporary_path is not None:
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(temporary_path + suffix)
+            except FileNotFoundError:
+                pass
@@ -1,19 +1,123 @@
+import itertools
 import threading
-from typing import Dict, Optional, Set
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterator, List, Optional
 
-from models import Transaction, ClientAccount
+from history_store import SeenTransactionIds, TransactionHistory
+from models import Transaction, TransactionType, ClientAccount
 
 
-class StateManager:
+# Client ids are u16 in the input spec
+CLIENT_ID_SPACE = 1 << 16
+
+
+class StateBackend(ABC):
+    """
+    Interface between the engines and the state they process against:
+    accounts, client locks and the transaction history used for disputes.
+
+    get_or_create_account returns the backend's live ClientAccount, which
+    TransactionProcessor mutates in place, so a backend must keep returning
+    the same object for a client. Callers hold the client's lock (or own the
+    client's shard) while they use an account or touch its transactions.
+    """
+
+    @abstractmethod
+    def get_client_lock(self, client_id: int) -> threading.Lock:
+        """Lock serializing the processing of one client's transactions."""
+
+    @abstractmethod
+    def get_or_create_account(self, client_id: int) -> ClientAccount:
+        """Get existing account or create new one."""
+
+    @abstractmethod
+    def store_transaction(self, transaction: Transaction) -> None:
+        """
+        Record a processed deposit or withdrawal. has_transaction knows its id
+        from then on; get_transaction may only return it while it is a
+        retained deposit, the only kind a dispute can target.
+        """
+
+    def store_row(self, transaction_type: TransactionType, client_id: int, transaction_id: int, amount) -> None:
+        """store_transaction for a row not held as a Transaction; backends may avoid building one."""
+        self.store_transaction(Transaction(transaction_type, client_id, transaction_id, amount))
+
+    @abstractmethod
+    def has_transaction(self, transaction_id: int) -> bool:
+        """Whether a transaction with this ID was stored (for idempotency checks)."""
+
+    @abstractmethod
+    def get_transaction(self, transaction_id: int) -> Optional[Transaction]:
+        """Retrieve stored transaction by ID."""
+
+    @abstractmethod
+    def mark_transaction_disputed(self, transaction_id: int) -> None:
+        """Mark a transaction as disputed."""
+
+    @abstractmethod
+    def is_transaction_disputed(self, transaction_id: int) -> bool:
+        """Check if transaction is currently disputed."""
+
+    @abstractmethod
+    def clear_transaction_dispute(self, transaction_id: int) -> None:
+        """Clear dispute status for a transaction."""
+
+    @abstractmethod
+    def iter_transactions(self) -> Iterator[Transaction]:
+        """Iterate over the transactions get_transaction can return (for snapshots)."""
+
+    @abstractmethod
+    def export_seen_transaction_ids(self) -> bytes:
+        """Serialized ids known to has_transaction but not in iter_transactions (for snapshots)."""
+
+    @abstractmethod
+    def import_seen_transaction_ids(self, data: bytes) -> None:
+        """Restore ids exported by export_seen_transaction_ids."""
+
+    @abstractmethod
+    def get_all_accounts(self) -> Dict[int, ClientAccount]:
+        """Return all accounts (for final output)."""
+
+
+class StateManager(StateBackend):
     """
     Thread-safe state management with per-client locking.
     Stores client accounts and transaction history for dispute lookups.
+    In fixed-point mode new accounts start with int balances (see money.py).
+
+    history_factory builds the transaction history store, called with
+    fixed_point (TransactionHistory, CompactTransactionHistory or
+    TieredTransactionHistory).
+
+    Only deposits go to the history, since only deposits can be disputed.
+    Every stored tx id, withdrawals included, is a bit in a
+    SeenTransactionIds bitset, which answers the idempotency checks.
+
+    With deposit_retention=N the history is kept in generations of N
+    deposits: when the current one fills up it becomes the previous one, and
+    the previous one is dropped, except for its disputed deposits, which
+    move to the new generation. Between N and 2N of the most recent
+    deposits can be disputed; older ones are still known to has_transaction.
+    The dropped generation stays reachable until the next rollover, so a
+    dispute that looked its deposit up just before the rollover still finds it.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        fixed_point: bool = False,
+        history_factory: Callable[..., TransactionHistory] = TransactionHistory,
+        deposit_retention: Optional[int] = None,
+    ):
+        self._fixed_point = fixed_point
         self._accounts: Dict[int, ClientAccount] = {}
-        self._transactions: Dict[int, Transaction] = {}
-        self._disputed_transaction_ids: Set[int] = set()
+        self._history_factory = history_factory
+        self._history = history_factory(fixed_point=fixed_point)
+        self._seen = SeenTransactionIds()
+        self._deposit_retention = deposit_retention
+        # Older history generations with deposit_retention, and the lock serializing rollovers with dispute marks
+        self._previous_history: Optional[TransactionHistory] = None
+        self._dropped_history: Optional[TransactionHistory] = None
+        self._generation_lock = threading.Lock()
 
         # Global lock protects creation of new entries in _accounts and _client_locks dicts.
         # Without it, two threads could create duplicate locks for the same client.
@@ -35,29 +139,145 @@ class StateManager:
         """Get existing account or create new one."""
         with self._global_lock:
             if client_id not in self._accounts:
-                self._accounts[client_id] = ClientAccount(client_id=client_id)
+                self._accounts[client_id] = self._new_account(client_id)
             return self._accounts[client_id]
 
+    def _new_account(self, client_id: int) -> ClientAccount:
+        if self._fixed_point:
+            return ClientAccount(client_id=client_id, available=0, held=0)
+        return ClientAccount(client_id=client_id)
+
     def store_transaction(self, transaction: Transaction) -> None:
-        """Store transaction for future dispute lookups."""
-        self._transactions[transaction.transaction_id] = transaction
+        """Record transaction as seen, and keep deposits for future dispute lookups."""
+        self._seen.add(transaction.transaction_id)
+        if transaction.transaction_type != TransactionType.DEPOSIT:
+            return
+        history = self._history
+        history.put(transaction)
+        if self._deposit_retention is not None and len(history) >= self._deposit_retention:
+            self._roll_over(history)
+
+    def store_row(self, transaction_type: TransactionType, client_id: int, transaction_id: int, amount) -> None:
+        """store_transaction without building a Transaction for rows the history does not keep."""
+        if transaction_type != TransactionType.DEPOSIT:
+            self._seen.add(transaction_id)
+            return
+        self.store_transaction(Transaction(transaction_type, client_id, transaction_id, amount))
+
+    def has_transaction(self, transaction_id: int) -> bool:
+        """Check if a transaction with this ID was processed."""
+        return transaction_id in self._seen
 
     def get_transaction(self, transaction_id: int) -> Optional[Transaction]:
-        """Retrieve stored transaction by ID."""
-        return self._transactions.get(transaction_id)
+        """Retrieve a retained deposit by ID."""
+        transaction = self._history.get(transaction_id)
+        if transaction is None and self._previous_history is not None:
+            transaction = self._previous_history.get(transaction_id)
+        return transaction
 
     def mark_transaction_disputed(self, transaction_id: int) -> None:
         """Mark a transaction as disputed."""
-        self._disputed_transaction_ids.add(transaction_id)
+        if self._deposit_retention is None:
+            self._history.mark_disputed(transaction_id)
+            return
+        with self._generation_lock:
+            history = self._history
+            if history.get(transaction_id) is None:
+                previous, dropped = self._previous_history, self._dropped_history
+                if previous is not None and previous.get(transaction_id) is not None:
+                    history = previous
+                elif dropped is not None:
+                    transaction = dropped.get(transaction_id)
+                    if transaction is not None:
+                        # Dropped by a rollover after the dispute looked it up
+                        history.put(transaction)
+            history.mark_disputed(transaction_id)
 
     def is_transaction_disputed(self, transaction_id: int) -> bool:
         """Check if transaction is currently disputed."""
-        return transaction_id in self._disputed_transaction_ids
+        if self._history.is_disputed(transaction_id):
+            return True
+        return self._previous_history is not None and self._previous_history.is_disputed(transaction_id)
 
     def clear_transaction_dispute(self, transaction_id: int) -> None:
         """Clear dispute status for a transaction."""
-        self._disputed_transaction_ids.discard(transaction_id)
+        if self._deposit_retention is None:
+            self._history.clear_disputed(transaction_id)
+            return
+        with self._generation_lock:
+            self._history.clear_disputed(transaction_id)
+            if self._previous_history is not None:
+                self._previous_history.clear_disputed(transaction_id)
+
+    def _roll_over(self, full: TransactionHistory) -> None:
+        """Start a new history generation once the current one holds deposit_retention deposits."""
+        with self._generation_lock:
+            if self._history is not full:
+                return
+            history = self._history_factory(fixed_point=self._fixed_point)
+            dropped = self._previous_history
+            if dropped is not None:
+                for transaction in dropped:
+                    if dropped.is_disputed(transaction.transaction_id):
+                        history.put(transaction)
+                        history.mark_disputed(transaction.transaction_id)
+            # Previous first: a lookup racing the swap finds full in one of the two
+            self._previous_history = full
+            self._history = history
+            self._dropped_history = dropped
+
+    def iter_transactions(self) -> Iterator[Transaction]:
+        """Iterate over the retained deposits (for snapshots)."""
+        if self._previous_history is None:
+            return iter(self._history)
+        return itertools.chain(self._previous_history, self._history)
+
+    def export_seen_transaction_ids(self) -> bytes:
+        return self._seen.to_bytes()
+
+    def import_seen_transaction_ids(self, data: bytes) -> None:
+        self._seen.update_from_bytes(data)
 
     def get_all_accounts(self) -> Dict[int, ClientAccount]:
         """Return all accounts (for final output)."""
         return dict(self._accounts)
+
+
+class DenseStateManager(StateManager):
+    """
+    StateManager with accounts and client locks in preallocated tables
+    indexed by client id, one slot per possible u16 client.
+
+    All locks exist up front and a slot is only ever written by the consumer
+    that holds the client's lock (or owns the client's shard), so the hot path
+    takes no global lock and does no dict lookup. Ids outside the u16 range
+    fall back to the dict-based StateManager storage.
+    """
+
+    def __init__(self, **options):
+        """Takes StateManager's options (fixed_point, history_factory, deposit_retention)."""
+        super().__init__(**options)
+        self._account_slots: List[Optional[ClientAccount]] = [None] * CLIENT_ID_SPACE
+        self._lock_slots: List[threading.Lock] = [threading.Lock() for _ in range(CLIENT_ID_SPACE)]
+        self._used_slots: List[int] = []
+
+    def get_client_lock(self, client_id: int) -> threading.Lock:
+        if 0 <= client_id < CLIENT_ID_SPACE:
+            return self._lock_slots[client_id]
+        return super().get_client_lock(client_id)
+
+    def get_or_create_account(self, client_id: int) -> ClientAccount:
+        if 0 <= client_id < CLIENT_ID_SPACE:
+            account = self._account_slots[client_id]
+            if account is None:
+                account = self._new_account(client_id)
+                self._account_slots[client_id] = account
+                self._used_slots.append(client_id)
+            return account
+        return super().get_or_create_account(client_id)
+
+    def get_all_accounts(self) -> Dict[int, ClientAccount]:
+        """Return all accounts in client id order, visiting only slots in use."""
+        accounts = {client_id: self._account_slots[client_id] for client_id in sorted(self._used_slots)}
+        accounts.update(super().get_all_accounts())
+        return accounts
@@ -0,0 +1,185 @@
+import dataclasses
+import threading
+import time
+from typing import Dict, Iterable, List, Union
+
+from instrumentation import LatencyHistogram
+from message_queue import InMemoryQueue
+from models import ClientAccount, DispatchMode, Transaction
+from payments_engine import PaymentsEngine
+
+
+class _Submitted:
+    """
+    A submitted transaction with its submit time, as the streaming engine
+    queues it. Carries client_id, so it is routed like the transaction.
+    """
+
+    __slots__ = ("client_id", "transaction", "submitted_ns")
+
+    def __init__(self, transaction: Transaction, submitted_ns: int):
+        self.client_id = transaction.client_id
+        self.transaction = transaction
+        self.submitted_ns = submitted_ns
+
+
+class StreamingPaymentsEngine(PaymentsEngine):
+    """
+    PaymentsEngine as a long-lived embedded service: start() it once, submit()
+    transactions for as long as needed, and stop() it at the end.
+
+    Submitted transactions collect in a micro-batch that is published to the
+    consumers when it reaches micro_batch_size, or at the latest max_latency
+    seconds after its first transaction arrived (a flusher thread enforces
+    the deadline). Dispatch, parking and backpressure are those of
+    PaymentsEngine; each micro-batch is published like one read chunk, so in
+    SHARED mode a client whose transactions span two micro-batches can have
+    them applied out of order, and SHARDED and MAILBOX modes keep per-client
+    order.
+
+    flush() publishes the open micro-batch and waits until every transaction
+    submitted so far has been processed (applied, rejected, or parked waiting
+    for the transaction it refers to). snapshot() flushes and returns a
+    consistent copy of the accounts; submitters block meanwhile. stop()
+    flushes, retries the DLQ, stops the threads and returns the accounts.
+
+    Consumers record each transaction's latency from submit() to its first
+    processing; latency_report() gives the percentiles. Journaling and
+    instrumentation are not supported in this mode, and neither is
+    process_file().
+    """
+
+    DEFAULT_MICRO_BATCH_SIZE = 1024
+    DEFAULT_MAX_LATENCY = 0.005
+
+    def __init__(
+        self,
+        micro_batch_size: int = DEFAULT_MICRO_BATCH_SIZE,
+        max_latency: float = DEFAULT_MAX_LATENCY,
+        **options,
+    ):
+        if options.get("journal_dir") is not None or options.get("instrumentation") is not None:
+            raise ValueError("journal_dir and instrumentation are not supported by StreamingPaymentsEngine")
+        super().__init__(**options)
+        self._micro_batch_size = micro_batch_size
+        self._max_latency_ns = int(max_latency * 1e9)
+        # Guards the open micro-batch; held across publishing, so submitters feel backpressure
+        self._pending_ready = threading.Condition()
+        self._pending: List[_Submitted] = []
+        self._pending_since = 0
+        self._latencies: List[LatencyHistogram] = []
+        self._threads: List[threading.Thread] = []
+        self._started = False
+        self._stopping = False
+
+    def start(self) -> None:
+        """Start the consumer and flusher threads."""
+        if self._started:
+            raise RuntimeError("engine already started")
+        self._started = True
+        for consumer_queue in self._consumer_queues:
+            latency = LatencyHistogram()
+            self._latencies.append(latency)
+            self._threads.append(threading.Thread(target=self._consume_stream, args=(consumer_queue, latency)))
+        self._threads.append(threading.Thread(target=self._flush_on_deadline, name="flusher"))
+        for thread in self._threads:
+            thread.start()
+
+    def process_file(self, filepath: str) -> Dict[int, ClientAccount]:
+        """Not supported: it would run its own publisher and shut down the streaming consumers' queues."""
+        raise RuntimeError("StreamingPaymentsEngine takes transactions through submit(), not process_file()")
+
+    def submit(self, transactions: Union[Transaction, Iterable[Transaction]]) -> None:
+        """Submit one transaction or a batch of them. Thread-safe."""
+        if isinstance(transactions, Transaction):
+            transactions = (transactions,)
+        now = time.perf_counter_ns()
+        with self._pending_ready:
+            if not self._started or self._stopping:
+                raise RuntimeError("engine is not running")
+            pending = self._pending
+            if not pending:
+                self._pending_since = now
+                self._pending_ready.notify()
+            for transaction in transactions:
+                pending.append(_Submitted(transaction, now))
+            if len(pending) >= self._micro_batch_size:
+                self._publish_pending()
+
+    def flush(self) -> None:
+        """Publish the open micro-batch and wait until everything submitted so far is processed."""
+        with self._pending_ready:
+            self._flush()
+
+    def snapshot(self) -> Dict[int, ClientAccount]:
+        """Flush, then return copies of all accounts as of that point."""
+        with self._pending_ready:
+            self._flush()
+            return {client_id: dataclasses.replace(account) for client_id, account in self._state.get_all_accounts().items()}
+
+    def stop(self) -> Dict[int, ClientAccount]:
+        """Flush, retry the DLQ, stop the threads and return the final accounts."""
+        with self._pending_ready:
+            self._flush()
+            self._stopping = True
+            self._pending_ready.notify()
+        for consumer_queue in dict.fromkeys(self._consumer_queues):
+            consumer_queue.shutdown()
+        for thread in self._threads:
+            thread.join()
+        dead_letter_queue_messages = self._queue.get_dead_letter_queue_messages()
+        if dead_letter_queue_messages:
+            self._process_dead_letter_queue(dead_letter_queue_messages)
+        self._discard_unreleased()
+        return self._state.get_all_accounts()
+
+    def latency_report(self) -> dict:
+        """Submit-to-processing latency percentiles over all consumers (see LatencyHistogram)."""
+        merged = LatencyHistogram()
+        for latency in self._latencies:
+            merged.merge(latency)
+        return merged.to_dict()
+
+    def _flush(self) -> None:
+        """Caller holds _pending_ready."""
+        if self._pending:
+            self._publish_pending()
+        self._join_consumer_queues()
+
+    def _publish_pending(self) -> None:
+        """Publish the open micro-batch. Caller holds _pending_ready."""
+        transactions = self._pending
+        self._pending = []
+        self._publish_chunk(transactions)
+
+    def _flush_on_deadline(self) -> None:
+        """Publish the open micro-batch once its first transaction is max_latency old."""
+        with self._pending_ready:
+            while not self._stopping:
+                if not self._pending:
+                    self._pending_ready.wait()
+                    continue
+                remaining_ns = self._pending_since + self._max_latency_ns - time.perf_counter_ns()
+                if remaining_ns > 0:
+                    self._pending_ready.wait(remaining_ns / 1e9)
+                    continue
+                self._publish_pending()
+
+    def _consume_stream(self, queue: InMemoryQueue, latency: LatencyHistogram) -> None:
+        """
+        Consumer loop recording submit-to-processing latency and marking messages done for flush().
+        Batches hold _Submitted transactions, and bare ones handed off by other consumers.
+        """
+        clock = time.perf_counter_ns
+        hand_off = self._dispatch_mode != DispatchMode.SHARED
+        while True:
+            batch = queue.consume_batch(self._batch_size)
+            if not batch:
+                break
+            for item in batch:
+                if type(item) is _Submitted:
+                    self._apply(item.transaction, hand_off)
+                    latency.record(clock() - item.submitted_ns)
+                else:
+                    self._apply(item, hand_off)
+            queue.task_done(len(batch))
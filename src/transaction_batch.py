@@ -0,0 +1,172 @@
+from array import array
+from multiprocessing import shared_memory
+from typing import Iterator, List, Optional, Tuple
+
+from binary_ingest import NO_AMOUNT
+
+# Column typecodes: type code (index into binary_ingest.TYPES), client id (u16),
+# tx id (u32) and amount in fixed-point units (i64, NO_AMOUNT if none), the
+# limits of the binary input format
+COLUMN_TYPECODES = ("B", "H", "I", "q")
+
+# (type code, client id, tx id, amount units), as TransactionBatch.rows() yields them
+Row = Tuple[int, int, int, int]
+
+# Slot header: row count, or END_OF_STREAM
+_HEADER_BYTES = 8
+END_OF_STREAM = -1
+
+
+class TransactionBatch:
+    """
+    A batch of transaction rows as typed columns rather than Transaction objects.
+
+    The columns are arrays while a batch is being built, or memoryviews into
+    a SharedBatchRing slot when a consumer reads one, in which case nothing is
+    copied. rows() iterates the columns in step; nothing per row outlives the
+    iteration.
+    """
+
+    __slots__ = ("types", "clients", "transaction_ids", "amounts")
+
+    def __init__(self, types=None, clients=None, transaction_ids=None, amounts=None):
+        if types is None:
+            types, clients, transaction_ids, amounts = (array(typecode) for typecode in COLUMN_TYPECODES)
+        self.types = types
+        self.clients = clients
+        self.transaction_ids = transaction_ids
+        self.amounts = amounts
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def append(self, code: int, client_id: int, transaction_id: int, amount: int) -> None:
+        """Add a row to a batch being built. amount is in fixed-point units, or NO_AMOUNT."""
+        self.types.append(code)
+        self.clients.append(client_id)
+        self.transaction_ids.append(transaction_id)
+        self.amounts.append(amount)
+
+    def rows(self) -> Iterator[Row]:
+        return zip(self.types, self.clients, self.transaction_ids, self.amounts)
+
+    def columns(self) -> List:
+        return [self.types, self.clients, self.transaction_ids, self.amounts]
+
+
+def _slot_layout(rows_per_slot: int) -> Tuple[List[int], int]:
+    """Column offsets within a slot (8-byte aligned, after the header) and the slot size."""
+    offsets = []
+    offset = _HEADER_BYTES
+    for typecode in COLUMN_TYPECODES:
+        offsets.append(offset)
+        offset += -(-rows_per_slot * array(typecode).itemsize // 8) * 8
+    return offsets, offset
+
+
+class SharedBatchRing:
+    """
+    Single-producer, single-consumer ring of TransactionBatch slots in one
+    multiprocessing.shared_memory segment.
+
+    The producer copies a batch's columns into the next free slot with put()
+    (one slice assignment per column, however many rows); the consumer's
+    get() returns a TransactionBatch whose columns are memoryviews into that
+    slot, and release() hands the slot back once the batch is processed. Two
+    semaphores count free and filled slots, so put() blocks while the
+    consumer is a full ring behind. put_end() marks the end of the stream.
+
+    The creating process owns the segment and must close() and unlink() it.
+    A ring pickled into a worker process attaches to the same segment there.
+    """
+
+    DEFAULT_SLOTS = 8
+    DEFAULT_ROWS_PER_SLOT = 4096
+
+    def __init__(self, context, slots: int = DEFAULT_SLOTS, rows_per_slot: int = DEFAULT_ROWS_PER_SLOT):
+        self._slots = slots
+        self._rows_per_slot = rows_per_slot
+        self._offsets, self._slot_bytes = _slot_layout(rows_per_slot)
+        self._memory = shared_memory.SharedMemory(create=True, size=slots * self._slot_bytes)
+        self._free = context.Semaphore(slots)
+        self._filled = context.Semaphore(0)
+        # Slot sequence numbers of the next put() and get()
+        self._write_index = 0
+        self._read_index = 0
+        self._views: List[memoryview] = []
+
+    @property
+    def rows_per_slot(self) -> int:
+        return self._rows_per_slot
+
+    def __getstate__(self):
+        return (self._slots, self._rows_per_slot, self._memory.name, self._free, self._filled)
+
+    def __setstate__(self, state):
+        self._slots, self._rows_per_slot, name, self._free, self._filled = state
+        self._offsets, self._slot_bytes = _slot_layout(self._rows_per_slot)
+        # Attaching registers the segment with the resource tracker again; worker
+        # processes share their parent's tracker, which keeps it registered once
+        self._memory = shared_memory.SharedMemory(name=name)
+        self._write_index = 0
+        self._read_index = 0
+        self._views = []
+
+    def put(self, batch: TransactionBatch, timeout: Optional[float] = None) -> bool:
+        """Copy batch into the next free slot; False if none freed up within timeout."""
+        if len(batch) > self._rows_per_slot:
+            raise ValueError(f"batch of {len(batch)} rows does not fit a {self._rows_per_slot}-row slot")
+        if not self._free.acquire(timeout=timeout):
+            return False
+        base = self._write_index % self._slots * self._slot_bytes
+        with memoryview(self._memory.buf) as buffer:
+            buffer[base:base + _HEADER_BYTES].cast("q")[0] = len(batch)
+            for offset, column in zip(self._offsets, batch.columns()):
+                with memoryview(column).cast("B") as data:
+                    buffer[base + offset:base + offset + len(data)] = data
+        self._write_index += 1
+        self._filled.release()
+        return True
+
+    def put_end(self, timeout: Optional[float] = None) -> bool:
+        """Mark the end of the stream; False if no slot freed up within timeout."""
+        if not self._free.acquire(timeout=timeout):
+            return False
+        base = self._write_index % self._slots * self._slot_bytes
+        with memoryview(self._memory.buf) as buffer:
+            buffer[base:base + _HEADER_BYTES].cast("q")[0] = END_OF_STREAM
+        self._write_index += 1
+        self._filled.release()
+        return True
+
+    def get(self) -> Optional[TransactionBatch]:
+        """Block for the next batch, as a view into its slot; None at the end of the stream."""
+        self._filled.acquire()
+        base = self._read_index % self._slots * self._slot_bytes
+        buffer = memoryview(self._memory.buf)
+        self._views.append(buffer)
+        count = buffer[base:base + _HEADER_BYTES].cast("q")[0]
+        if count == END_OF_STREAM:
+            self.release()
+            return None
+        columns = []
+        for offset, typecode in zip(self._offsets, COLUMN_TYPECODES):
+            start = base + offset
+            column = buffer[start:start + count * array(typecode).itemsize].cast(typecode)
+            self._views.append(column)
+            columns.append(column)
+        return TransactionBatch(*columns)
+
+    def release(self) -> None:
+        """Hand the slot of the batch from get() back to the producer. The batch must not be used after."""
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._read_index += 1
+        self._free.release()
+
+    def close(self) -> None:
+        self._memory.close()
+
+    def unlink(self) -> None:
+        self._memory.unlink()
@@ -1,10 +1,16 @@
 import logging
 
-from models import Transaction, TransactionType, ClientAccount, ProcessingResult
-from state_manager import StateManager
+from typing import Optional, Tuple
+
+from models import Transaction, TransactionType, ClientAccount, ProcessingResult, RejectionReason
+from money import Amount
+from state_manager import StateBackend
 
 logger = logging.getLogger(__name__)
 
+# Result of a transaction, with the reason for failures (None on success)
+Outcome = Tuple[ProcessingResult, Optional[RejectionReason]]
+
 
 class TransactionProcessor:
     """
@@ -13,7 +19,7 @@ class TransactionProcessor:
     Caller is responsible for holding appropriate client lock.
     """
 
-    def __init__(self, state: StateManager):
+    def __init__(self, state: StateBackend):
         self._state = state
 
     def process_transaction(self, transaction: Transaction) -> ProcessingResult:
@@ -25,100 +31,152 @@ class TransactionProcessor:
             FAILED_RETRIABLE: May succeed if retried later (e.g., transaction not found yet)
             FAILED_PERMANENT: Will never succeed (e.g., wrong client, frozen account)
         """
-        account = self._state.get_or_create_account(transaction.client_id)
+        return self.process_with_reason(transaction)[0]
+
+    def process_with_reason(self, transaction: Transaction) -> Outcome:
+        """Process a single transaction. Returns the ProcessingResult and, for failures, why."""
+        return self._process(
+            transaction.transaction_type, transaction.client_id, transaction.transaction_id, transaction.amount, transaction
+        )
+
+    def process_row(self, transaction_type: TransactionType, client_id: int, transaction_id: int, amount: Optional[Amount]) -> Outcome:
+        """
+        process_with_reason for a row given as fields, e.g. from a
+        TransactionBatch. No Transaction is built for it unless the state
+        keeps one (a deposit, for disputes).
+        """
+        return self._process(transaction_type, client_id, transaction_id, amount, None)
+
+    def _process(
+        self,
+        transaction_type: TransactionType,
+        client_id: int,
+        transaction_id: int,
+        amount: Optional[Amount],
+        transaction: Optional[Transaction],
+    ) -> Outcome:
+        account = self._state.get_or_create_account(client_id)
 
         if account.locked:
-            return ProcessingResult.FAILED_PERMANENT
+            return ProcessingResult.FAILED_PERMANENT, RejectionReason.ACCOUNT_LOCKED
 
-        match transaction.transaction_type:
+        match transaction_type:
             case TransactionType.DEPOSIT:
-                return self._handle_deposit(account, transaction)
+                return self._handle_deposit(account, transaction_id, amount, transaction)
             case TransactionType.WITHDRAWAL:
-                return self._handle_withdrawal(account, transaction)
+                return self._handle_withdrawal(account, transaction_id, amount, transaction)
             case TransactionType.DISPUTE:
-                return self._handle_dispute(account, transaction)
+                return self._handle_dispute(account, transaction_id)
             case TransactionType.RESOLVE:
-                return self._handle_resolve(account, transaction)
+                return self._handle_resolve(account, transaction_id)
             case TransactionType.CHARGEBACK:
-                return self._handle_chargeback(account, transaction)
+                return self._handle_chargeback(account, transaction_id)
             case _:
-                return ProcessingResult.FAILED_PERMANENT
-
-    def _handle_deposit(self, account: ClientAccount, transaction: Transaction) -> ProcessingResult:
-        if transaction.amount is None or transaction.amount <= 0:
-            logger.warning(f"Deposit tx {transaction.transaction_id}: invalid amount {transaction.amount}")
-            return ProcessingResult.FAILED_PERMANENT
-
-        if self._state.get_transaction(transaction.transaction_id) is not None:
-            logger.info(f"Deposit tx {transaction.transaction_id}: already processed, skipping (idempotent)")
-            return ProcessingResult.SUCCESS
-
-        account.credit(transaction.amount)
-        self._state.store_transaction(transaction)
-        return ProcessingResult.SUCCESS
-
-    def _handle_withdrawal(self, account: ClientAccount, transaction: Transaction) -> ProcessingResult:
-        if transaction.amount is None or transaction.amount <= 0:
-            logger.warning(f"Withdrawal tx {transaction.transaction_id}: invalid amount {transaction.amount}")
-            return ProcessingResult.FAILED_PERMANENT
-
-        if self._state.get_transaction(transaction.transaction_id) is not None:
-            logger.info(f"Withdrawal tx {transaction.transaction_id}: already processed, skipping (idempotent)")
-            return ProcessingResult.SUCCESS
-
-        if account.available >= transaction.amount:
-            account.debit(transaction.amount)
+                return ProcessingResult.FAILED_PERMANENT, RejectionReason.UNSUPPORTED_TYPE
+
+    def _store(
+        self,
+        transaction_type: TransactionType,
+        account: ClientAccount,
+        transaction_id: int,
+        amount: Amount,
+        transaction: Optional[Transaction],
+    ) -> None:
+        if transaction is None:
+            self._state.store_row(transaction_type, account.client_id, transaction_id, amount)
+        else:
             self._state.store_transaction(transaction)
-            return ProcessingResult.SUCCESS
-        return ProcessingResult.FAILED_PERMANENT
 
-    def _handle_dispute(self, account: ClientAccount, transaction: Transaction) -> ProcessingResult:
-        original = self._state.get_transaction(transaction.transaction_id)
+    def _handle_deposit(
+        self, account: ClientAccount, transaction_id: int, amount: Optional[Amount], transaction: Optional[Transaction]
+    ) -> Outcome:
+        if amount is None or amount <= 0:
+            logger.warning(f"Deposit tx {transaction_id}: invalid amount {amount}")
+            return ProcessingResult.FAILED_PERMANENT, RejectionReason.INVALID_AMOUNT
+
+        if self._state.has_transaction(transaction_id):
+            logger.info(f"Deposit tx {transaction_id}: already processed, skipping (idempotent)")
+            return ProcessingResult.SUCCESS, None
+
+        account.credit(amount)
+        self._store(TransactionType.DEPOSIT, account, transaction_id, amount, transaction)
+        return ProcessingResult.SUCCESS, None
+
+    def _handle_withdrawal(
+        self, account: ClientAccount, transaction_id: int, amount: Optional[Amount], transaction: Optional[Transaction]
+    ) -> Outcome:
+        if amount is None or amount <= 0:
+            logger.warning(f"Withdrawal tx {transaction_id}: invalid amount {amount}")
+            return ProcessingResult.FAILED_PERMANENT, RejectionReason.INVALID_AMOUNT
+
+        if self._state.has_transaction(transaction_id):
+            logger.info(f"Withdrawal tx {transaction_id}: already processed, skipping (idempotent)")
+            return ProcessingResult.SUCCESS, None
+
+        if account.available >= amount:
+            account.debit(amount)
+            self._store(TransactionType.WITHDRAWAL, account, transaction_id, amount, transaction)
+            return ProcessingResult.SUCCESS, None
+        return ProcessingResult.FAILED_PERMANENT, RejectionReason.INSUFFICIENT_FUNDS
+
+    def _handle_dispute(self, account: ClientAccount, transaction_id: int) -> Outcome:
+        original = self._state.get_transaction(transaction_id)
 
         if original is None:
-            logger.info(f"Dispute for tx {transaction.transaction_id}: transaction not found yet, likely out-of-order message delivery")
-            return ProcessingResult.FAILED_RETRIABLE
+            if self._state.has_transaction(transaction_id):
+                # Processed, but not a retained deposit: a withdrawal, or a deposit past the retention limit
+                logger.warning(f"Dispute for tx {transaction_id}: only retained deposits can be disputed")
+                return ProcessingResult.FAILED_PERMANENT, RejectionReason.NOT_DISPUTABLE
+            logger.info(f"Dispute for tx {transaction_id}: transaction not found yet, likely out-of-order message delivery")
+            return ProcessingResult.FAILED_RETRIABLE, RejectionReason.TRANSACTION_NOT_FOUND
 
-        if original.client_id != transaction.client_id:
-            logger.error(f"Dispute for tx {transaction.transaction_id}: client mismatch (expected {original.client_id}, got {transaction.client_id}). This should never happen.")
-            return ProcessingResult.FAILED_PERMANENT
+        if original.client_id != account.client_id:
+            logger.error(f"Dispute for tx {transaction_id}: client mismatch (expected {original.client_id}, got {account.client_id}). This should never happen.")
+            return ProcessingResult.FAILED_PERMANENT, RejectionReason.CLIENT_MISMATCH
 
-        if self._state.is_transaction_disputed(transaction.transaction_id):
-            logger.warning(f"Dispute for tx {transaction.transaction_id}: transaction already disputed")
-            return ProcessingResult.FAILED_PERMANENT
+        if self._state.is_transaction_disputed(transaction_id):
+            logger.warning(f"Dispute for tx {transaction_id}: transaction already disputed")
+            return ProcessingResult.FAILED_PERMANENT, RejectionReason.ALREADY_DISPUTED
 
         # TODO: Withdrawal disputes (internal dispute resolution, fraud claims) could be supported by tracking payment state and attempting to recall funds
         if original.transaction_type != TransactionType.DEPOSIT:
-            logger.warning(f"Dispute for tx {transaction.transaction_id}: only deposits can be disputed (got {original.transaction_type.value}), withdrawals not supported as funds already left account")
-            return ProcessingResult.FAILED_PERMANENT
+            logger.warning(f"Dispute for tx {transaction_id}: only deposits can be disputed (got {original.transaction_type.value}), withdrawals not supported as funds already left account")
+            return ProcessingResult.FAILED_PERMANENT, RejectionReason.NOT_DISPUTABLE
 
         account.hold(original.amount)
-        self._state.mark_transaction_disputed(transaction.transaction_id)
-        return ProcessingResult.SUCCESS
+        self._state.mark_transaction_disputed(transaction_id)
+        return ProcessingResult.SUCCESS, None
 
-    def _handle_resolve(self, account: ClientAccount, transaction: Transaction) -> ProcessingResult:
-        original = self._state.get_transaction(transaction.transaction_id)
+    def _handle_resolve(self, account: ClientAccount, transaction_id: int) -> Outcome:
+        original = self._state.get_transaction(transaction_id)
 
         if original is None:
-            return ProcessingResult.FAILED_RETRIABLE
+            return self._not_found(transaction_id)
 
-        if not self._state.is_transaction_disputed(transaction.transaction_id):
-            return ProcessingResult.FAILED_RETRIABLE
+        if not self._state.is_transaction_disputed(transaction_id):
+            return ProcessingResult.FAILED_RETRIABLE, RejectionReason.NOT_DISPUTED
 
         account.release_hold(original.amount)
-        self._state.clear_transaction_dispute(transaction.transaction_id)
-        return ProcessingResult.SUCCESS
+        self._state.clear_transaction_dispute(transaction_id)
+        return ProcessingResult.SUCCESS, None
 
-    def _handle_chargeback(self, account: ClientAccount, transaction: Transaction) -> ProcessingResult:
-        original = self._state.get_transaction(transaction.transaction_id)
+    def _handle_chargeback(self, account: ClientAccount, transaction_id: int) -> Outcome:
+        original = self._state.get_transaction(transaction_id)
 
         if original is None:
-            return ProcessingResult.FAILED_RETRIABLE
+            return self._not_found(transaction_id)
 
-        if not self._state.is_transaction_disputed(transaction.transaction_id):
-            return ProcessingResult.FAILED_RETRIABLE
+        if not self._state.is_transaction_disputed(transaction_id):
+            return ProcessingResult.FAILED_RETRIABLE, RejectionReason.NOT_DISPUTED
 
         account.remove_held(original.amount)
         account.locked = True
-        self._state.clear_transaction_dispute(transaction.transaction_id)
-        return ProcessingResult.SUCCESS
+        self._state.clear_transaction_dispute(transaction_id)
+        return ProcessingResult.SUCCESS, None
+
+    def _not_found(self, transaction_id: int) -> Outcome:
+        """Resolve or chargeback whose original isn't a retained deposit."""
+        if self._state.has_transaction(transaction_id):
+            # A withdrawal, or a deposit past retention (disputed deposits are always retained)
+            return ProcessingResult.FAILED_RETRIABLE, RejectionReason.NOT_DISPUTED
+        return ProcessingResult.FAILED_RETRIABLE, RejectionReason.TRANSACTION_NOT_FOUND
@@ -0,0 +1,83 @@
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from binary_ingest import MAGIC, RECORD, convert_csv, is_binary_file, iter_binary_chunks
+from csv_ingest import iter_transaction_chunks
+
+ROWS = "".join(
+    [
+        "type, client, tx, amount\n",
+        "deposit, 1, 1, 1.2345\n",
+        "withdrawal, 1, 2, 0.5\n",
+        "bogus, 1, 3, 1.0\n",
+        "deposit, 65535, 4294967295, 922337203685477.5807\n",
+        "dispute, 1, 1,\n",
+        "resolve, 1, 1\n",
+        "deposit, 2, 5, -3\n",
+        "chargeback, 1, 1,\n",
+    ]
+)
+
+
+def convert(tmp_path, text: str = ROWS) -> str:
+    csv_path = tmp_path / "input.csv"
+    csv_path.write_text(text)
+    binary_path = tmp_path / "input.bin"
+    convert_csv(str(csv_path), str(binary_path))
+    return str(binary_path)
+
+
+def read_all(path: str, **options):
+    with open(path, "rb") as f:
+        return [transaction for _, _, transactions in iter_binary_chunks(f, **options) for transaction in transactions]
+
+
+class TestBinaryIngest:
+    @pytest.mark.parametrize("fixed_point", [False, True])
+    def test_round_trip_matches_csv(self, tmp_path, fixed_point):
+        path = convert(tmp_path)
+        with open(tmp_path / "input.csv", "rb") as f:
+            expected = [t for _, _, transactions in iter_transaction_chunks(f, fixed_point=fixed_point) for t in transactions]
+
+        assert read_all(path, fixed_point=fixed_point) == expected
+        assert os.path.getsize(path) == len(MAGIC) + 7 * RECORD.size
+
+    def test_is_binary_file(self, tmp_path):
+        path = convert(tmp_path)
+        assert is_binary_file(path)
+        assert not is_binary_file(str(tmp_path / "input.csv"))
+
+    def test_ids_out_of_range_rejected(self, tmp_path):
+        with pytest.raises(ValueError):
+            convert(tmp_path, "type, client, tx, amount\ndeposit, 65536, 1, 1.0\n")
+        with pytest.raises(ValueError):
+            convert(tmp_path, "type, client, tx, amount\ndeposit, 1, 4294967296, 1.0\n")
+
+    def test_chunks_report_byte_offsets_and_resume(self, tmp_path):
+        path = convert(tmp_path, "type,client,tx,amount\n" + "".join(f"deposit,1,{tx_id},1.5\n" for tx_id in range(1, 101)))
+        with open(path, "rb") as f:
+            chunks = list(iter_binary_chunks(f, read_chunk_bytes=100))
+
+        assert chunks[0][0] == len(MAGIC)
+        assert chunks[-1][1] == os.path.getsize(path)
+        assert all(end - start == 6 * RECORD.size for start, end, _ in chunks[:-1])
+        with open(path, "rb") as f:
+            rest = list(iter_binary_chunks(f, start_offset=chunks[3][1], read_chunk_bytes=100))
+        assert rest == chunks[4:]
+
+    def test_misaligned_offset_and_truncated_file_rejected(self, tmp_path):
+        path = convert(tmp_path)
+        with open(path, "rb") as f, pytest.raises(ValueError):
+            list(iter_binary_chunks(f, start_offset=len(MAGIC) + 1))
+        with open(path, "ab") as f:
+            f.write(b"\x00")
+        with pytest.raises(ValueError):
+            read_all(path)
+
+    def test_empty_file(self, tmp_path):
+        path = convert(tmp_path, "type, client, tx, amount\n")
+        assert read_all(path) == []
@@ -0,0 +1,71 @@
+import bz2
+import gzip
+import io
+import lzma
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from compressed_input import compression_of, open_input
+from csv_ingest import iter_transaction_chunks
+
+COMPRESSORS = {"gz": gzip.compress, "bz2": bz2.compress, "xz": lzma.compress}
+DATA = b"type, client, tx, amount\n" + b"".join(f"deposit, {tx_id % 9}, {tx_id}, 1.5\n".encode() for tx_id in range(1, 2001))
+
+
+def plain_chunks(tmp_path, **options):
+    path = tmp_path / "plain.csv"
+    path.write_bytes(DATA)
+    with open(path, "rb") as f:
+        return list(iter_transaction_chunks(f, **options))
+
+
+def write_compressed(tmp_path, compression: str, data: bytes = DATA) -> str:
+    path = tmp_path / f"input.csv.{compression}"
+    path.write_bytes(COMPRESSORS[compression](data))
+    return str(path)
+
+
+class TestCompressedInput:
+    @pytest.mark.parametrize("compression", sorted(COMPRESSORS))
+    def test_detects_compression_by_magic(self, tmp_path, compression):
+        assert compression_of(write_compressed(tmp_path, compression)) == compression
+
+    def test_plain_file_is_not_compressed(self, tmp_path):
+        path = tmp_path / "input.csv"
+        path.write_bytes(DATA)
+        assert compression_of(str(path)) is None
+        with open_input(str(path)) as f:
+            assert f.read() == DATA
+
+    @pytest.mark.parametrize("compression", sorted(COMPRESSORS))
+    def test_chunks_match_plain_input(self, tmp_path, compression):
+        path = write_compressed(tmp_path, compression)
+        expected = plain_chunks(tmp_path, read_chunk_bytes=1000)
+
+        with open_input(path, buffer_bytes=1000) as f:
+            assert list(iter_transaction_chunks(f, read_chunk_bytes=1000)) == expected
+
+    def test_resume_at_offset_seeks_forward(self, tmp_path):
+        path = write_compressed(tmp_path, "gz")
+        expected = plain_chunks(tmp_path, read_chunk_bytes=1000)
+        resume_offset = expected[10][1]
+
+        with open_input(path, buffer_bytes=1000) as f:
+            assert list(iter_transaction_chunks(f, resume_offset, read_chunk_bytes=1000)) == expected[11:]
+            with pytest.raises(io.UnsupportedOperation):
+                f.seek(0)
+
+    def test_close_before_end(self, tmp_path):
+        path = write_compressed(tmp_path, "xz", DATA * 20)
+        with open_input(path, buffer_bytes=1000) as f:
+            assert f.readline() == DATA.split(b"\n")[0] + b"\n"
+
+    def test_corrupt_input_raises_in_reader(self, tmp_path):
+        path = tmp_path / "input.csv.gz"
+        path.write_bytes(gzip.compress(DATA)[:-100] + b"\x00" * 100)
+        with open_input(str(path)) as f, pytest.raises(Exception):
+            f.read()
@@ -0,0 +1,110 @@
+import io
+import sys
+import os
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from csv_ingest import CsvTransactionParser, iter_transaction_batches, iter_transaction_chunks, iter_transactions
+from models import Transaction, TransactionType
+
+HEADER = ["type", " client", " tx", " amount"]
+
+
+class TestCsvTransactionParser:
+    def setup_method(self):
+        self.parser = CsvTransactionParser(HEADER)
+
+    def test_parse_deposit(self):
+        transaction = self.parser.parse_line("deposit, 1, 2, 1.5\n")
+        assert transaction == Transaction(TransactionType.DEPOSIT, client_id=1, transaction_id=2, amount=Decimal("1.5"))
+
+    def test_parse_dispute_without_amount(self):
+        assert self.parser.parse_line("dispute, 1, 2,\n").amount is None
+        assert self.parser.parse_line("dispute, 1, 2, \n").amount is None
+        assert self.parser.parse_line("dispute, 1, 2\n").amount is None
+
+    def test_type_is_case_and_whitespace_insensitive(self):
+        transaction = self.parser.parse_line("  WithDrawal , 1, 2, 1\r\n")
+        assert transaction.transaction_type == TransactionType.WITHDRAWAL
+
+    def test_repeated_amounts_are_shared(self):
+        first = self.parser.parse_line("deposit, 1, 1, 10.0")
+        second = self.parser.parse_line("deposit, 2, 2, 10.0")
+        assert first.amount is second.amount
+
+    def test_column_order_from_header(self):
+        parser = CsvTransactionParser(["tx", "amount", "client", "type"])
+        transaction = parser.parse_line("7,2.5,3,deposit")
+        assert transaction == Transaction(TransactionType.DEPOSIT, client_id=3, transaction_id=7, amount=Decimal("2.5"))
+
+    def test_quoted_fields(self):
+        transaction = self.parser.parse_line('"deposit","1",2,"3.0"')
+        assert transaction.client_id == 1
+        assert transaction.amount == Decimal("3.0")
+
+    def test_blank_line_skipped(self):
+        assert self.parser.parse_line("\n") is None
+
+    def test_malformed_rows_rejected(self, caplog):
+        assert self.parser.parse_line("bogus, 1, 1, 1.0") is None
+        assert self.parser.parse_line("deposit, x, 1, 1.0") is None
+        assert self.parser.parse_line("deposit, 1, 1, abc") is None
+        assert self.parser.parse_line("deposit, 1") is None
+        assert len([r for r in caplog.records if "Failed to parse row" in r.message]) == 4
+
+    def test_missing_header_column_rejects_rows(self):
+        parser = CsvTransactionParser(["type", "client", "amount"])
+        assert parser.parse_line("deposit, 1, 1.0") is None
+
+    def test_fixed_point_amounts(self):
+        parser = CsvTransactionParser(HEADER, fixed_point=True)
+        transactions = parser.parse_lines(["deposit, 1, 1, 1.5\n", "deposit, 1, 2, 0.00001\n", "dispute, 1, 1,\n"])
+        assert [transaction.amount for transaction in transactions] == [15000, None]
+
+    def test_parse_lines_drops_bad_rows(self):
+        transactions = self.parser.parse_lines(["deposit, 1, 1, 1.0\n", "bad\n", "\n", "withdrawal, 1, 2, 0.5\n"])
+        assert [transaction.transaction_id for transaction in transactions] == [1, 2]
+
+
+class TestIterTransactions:
+    def test_batches_follow_read_chunks(self):
+        rows = "".join(f"deposit, 1, {tx_id}, 1.0\n" for tx_id in range(1, 101))
+        f = io.StringIO("type, client, tx, amount\n" + rows)
+
+        batches = list(iter_transaction_batches(f, read_chunk_bytes=200))
+
+        assert len(batches) > 1
+        assert [t.transaction_id for batch in batches for t in batch] == list(range(1, 101))
+
+    def test_empty_file(self):
+        assert list(iter_transaction_batches(io.StringIO(""))) == []
+
+    def test_iter_transactions_fixture(self):
+        path = os.path.join(os.path.dirname(__file__), "fixtures", "basic.csv")
+        transactions = list(iter_transactions(path))
+        assert len(transactions) == 5
+        assert transactions[-1] == Transaction(TransactionType.WITHDRAWAL, client_id=2, transaction_id=5, amount=Decimal("3.0"))
+
+    def test_chunks_report_byte_offsets(self):
+        header = b"type, client, tx, amount\n"
+        rows = b"".join(f"deposit, 1, {tx_id}, 1.0\n".encode() for tx_id in range(1, 101))
+        data = header + rows
+
+        chunks = list(iter_transaction_chunks(io.BytesIO(data), read_chunk_bytes=200))
+
+        assert len(chunks) > 1
+        assert chunks[0][0] == len(header)
+        assert chunks[-1][1] == len(data)
+        for (_, end, _), (start, _, _) in zip(chunks, chunks[1:]):
+            assert end == start
+        assert [t.transaction_id for _, _, batch in chunks for t in batch] == list(range(1, 101))
+
+    def test_chunks_resume_at_offset(self):
+        data = b"type, client, tx, amount\n" + b"".join(f"deposit, 1, {tx_id}, 1.0\n".encode() for tx_id in range(1, 11))
+        _, resume_offset, first = next(iter_transaction_chunks(io.BytesIO(data), read_chunk_bytes=50))
+
+        rest = list(iter_transaction_chunks(io.BytesIO(data), start_offset=resume_offset))
+
+        resumed_ids = [t.transaction_id for _, _, batch in rest for t in batch]
+        assert [t.transaction_id for t in first] + resumed_ids == list(range(1, 11))
@@ -0,0 +1,135 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from daemon import PaymentsDaemon
+from daemon_client import submit
+from payments_engine import PaymentsEngine
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+BASIC_OUTPUT = b"client,available,held,total,locked\n1,1.5,0,1.5,false\n2,2,0,2,false\n"
+
+
+@pytest.fixture
+def socket_path():
+    # Unix socket paths are limited to ~100 bytes, so keep it short
+    with tempfile.TemporaryDirectory(prefix="pd-") as tmp_dir:
+        yield os.path.join(tmp_dir, "daemon.sock")
+
+
+def serve(socket_path: str, **options) -> PaymentsDaemon:
+    daemon = PaymentsDaemon(socket_path, **options)
+    threading.Thread(target=daemon.serve_forever, daemon=True).start()
+    return daemon
+
+
+class TestPaymentsDaemon:
+    def test_input_path_job(self, socket_path):
+        daemon = serve(socket_path)
+        try:
+            status, accounts_csv = submit(socket_path, input_path=os.path.join(FIXTURES, "basic.csv"))
+        finally:
+            daemon.shutdown()
+            daemon.server_close()
+
+        assert status == {"status": "ok", "processed": 4, "failed": 1, "parked": 0}
+        assert accounts_csv == BASIC_OUTPUT
+        assert not os.path.exists(socket_path)
+
+    def test_streamed_rows_job(self, socket_path):
+        daemon = serve(socket_path)
+        try:
+            with open(os.path.join(FIXTURES, "basic.csv"), "rb") as f:
+                status, accounts_csv = submit(socket_path, rows=f, fixed_point=True)
+        finally:
+            daemon.shutdown()
+            daemon.server_close()
+
+        assert status["status"] == "ok"
+        assert accounts_csv == BASIC_OUTPUT
+
+    def test_errors_are_reported(self, socket_path):
+        daemon = serve(socket_path)
+        try:
+            status, accounts_csv = submit(socket_path, input_path="/nonexistent/input.csv")
+        finally:
+            daemon.shutdown()
+            daemon.server_close()
+
+        assert status["status"] == "error"
+        assert "nonexistent" in status["error"]
+        assert accounts_csv == b""
+
+    def test_concurrent_jobs_are_isolated_and_bounded(self, socket_path):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        class SlowEngine(PaymentsEngine):
+            def process_file(self, filepath):
+                with lock:
+                    running.append(filepath)
+                    peak.append(len(running))
+                time.sleep(0.05)
+                try:
+                    return super().process_file(filepath)
+                finally:
+                    with lock:
+                        running.remove(filepath)
+
+        daemon = serve(socket_path, max_jobs=2, engine_factory=SlowEngine)
+        results = {}
+
+        def run_job(client_id):
+            rows = f"type,client,tx,amount\ndeposit,{client_id},1,{client_id}.5\n".encode()
+            results[client_id] = submit(socket_path, rows=io.BytesIO(rows))
+
+        try:
+            threads = [threading.Thread(target=run_job, args=(client_id,)) for client_id in range(1, 7)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            daemon.shutdown()
+            daemon.server_close()
+
+        assert max(peak) == 2
+        for client_id, (status, accounts_csv) in results.items():
+            assert status["processed"] == 1
+            assert accounts_csv.splitlines()[1:] == [f"{client_id},{client_id}.5,0,{client_id}.5,false".encode()]
+
+    def test_refuses_socket_of_live_daemon(self, socket_path):
+        daemon = serve(socket_path)
+        try:
+            with pytest.raises(OSError):
+                PaymentsDaemon(socket_path)
+        finally:
+            daemon.shutdown()
+            daemon.server_close()
+
+    def test_client_cli(self, socket_path, tmp_path):
+        daemon = serve(socket_path)
+        try:
+            client = [sys.executable, os.path.join(SRC, "daemon_client.py"), "--socket", socket_path]
+            completed = subprocess.run([*client, os.path.join(FIXTURES, "basic.csv")], capture_output=True, check=True)
+            with open(os.path.join(FIXTURES, "basic.csv"), "rb") as f:
+                streamed = subprocess.run([*client, "-"], stdin=f, capture_output=True, check=True)
+            failed = subprocess.run([*client, str(tmp_path / "missing.csv")], capture_output=True)
+        finally:
+            daemon.shutdown()
+            daemon.server_close()
+
+        assert completed.stdout == BASIC_OUTPUT
+        assert streamed.stdout == BASIC_OUTPUT
+        assert failed.returncode == 1
+        assert b"error" in failed.stderr
@@ -1,10 +1,23 @@
+import bz2
+import functools
+import gzip
 import sys
 import os
+import random
+import threading
 from decimal import Decimal
 
+import pytest
+
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
+from binary_ingest import MAGIC, RECORD, convert_csv
+from history_store import TieredTransactionHistory
+from instrumentation import Instrumentation
+from models import DispatchMode, RejectionReason, TransactionType
 from payments_engine import PaymentsEngine
+from sqlite_state import SqliteStateManager
+from state_manager import StateManager
 
 
 class TestPaymentsEngine:
@@ -359,3 +372,510 @@ class TestPaymentsEngine:
 
         # Deposit 200, only first withdrawal processed (50), duplicates skipped
         assert accounts[1].available == Decimal("150")
+
+    def test_sharded_dispatch_basic(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text('\n'.join([
+            "type, client, tx, amount",
+            "deposit, 1, 1, 1.0",
+            "deposit, 2, 2, 2.0",
+            "deposit, 1, 3, 2.0",
+            "withdrawal, 1, 4, 1.5",
+            "withdrawal, 2, 5, 3.0",
+        ]))
+
+        engine = PaymentsEngine(num_consumers=4, dispatch_mode=DispatchMode.SHARDED)
+        accounts = engine.process_file(str(csv_file))
+
+        assert accounts[1].available == Decimal("1.5")
+        assert accounts[2].available == Decimal("2.0")
+
+    def test_sharded_dispatch_preserves_client_order(self, tmp_path):
+        """Withdrawal must see exactly the deposits that precede it in the file."""
+        rows = ["type, client, tx, amount"]
+        tx_id = 1
+        for client_id in range(1, 21):
+            for _ in range(50):
+                rows.append(f"deposit, {client_id}, {tx_id}, 10")
+                rows.append(f"withdrawal, {client_id}, {tx_id + 1}, 10")
+                tx_id += 2
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text('\n'.join(rows))
+
+        engine = PaymentsEngine(num_consumers=4, dispatch_mode=DispatchMode.SHARDED)
+        accounts = engine.process_file(str(csv_file))
+
+        for client_id in range(1, 21):
+            assert accounts[client_id].available == Decimal("0"), f"Client {client_id}"
+        assert engine.stats.failed == 0
+        assert engine.stats.dlq_retried == 0
+
+    def test_sharded_dispatch_out_of_order_parked(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text('\n'.join([
+            "type, client, tx, amount",
+            "dispute, 1, 1,",
+            "deposit, 1, 1, 100.0",
+        ]))
+
+        engine = PaymentsEngine(num_consumers=2, dispatch_mode=DispatchMode.SHARDED)
+        accounts = engine.process_file(str(csv_file))
+
+        assert accounts[1].available == Decimal("0")
+        assert accounts[1].held == Decimal("100")
+        assert engine.stats.parked == 1
+        assert engine.stats.dlq_retried == 0
+
+    def test_mailbox_dispatch_preserves_client_order_under_skew(self, tmp_path):
+        """A hot client is applied in file order even when its mailbox moves between consumers."""
+        rows = ["type, client, tx, amount"]
+        tx_id = 1
+        for round_ in range(400):
+            client_id = 1 if round_ % 5 else 2 + round_ % 30
+            rows.append(f"deposit, {client_id}, {tx_id}, 10")
+            rows.append(f"withdrawal, {client_id}, {tx_id + 1}, 10")
+            tx_id += 2
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text('\n'.join(rows))
+
+        engine = SmallChunkEngine(num_consumers=4, dispatch_mode=DispatchMode.MAILBOX, batch_size=8)
+        accounts = engine.process_file(str(csv_file))
+
+        assert all(account.available == Decimal("0") for account in accounts.values())
+        assert engine.stats.processed == 800
+        assert engine.stats.failed == 0
+        assert engine.stats.dlq_retried == 0
+
+    def test_released_transaction_of_another_client_goes_to_its_owner(self, tmp_path):
+        """A dispute of client 2 parked on client 1's deposit is applied by client 2's consumer."""
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text('\n'.join([
+            "type, client, tx, amount",
+            "dispute, 2, 1,",
+            "deposit, 2, 2, 5.0",
+            "deposit, 1, 1, 100.0",
+        ]))
+
+        for dispatch_mode in (DispatchMode.SHARDED, DispatchMode.MAILBOX):
+            state = ThreadRecordingStateManager()
+            engine = PaymentsEngine(num_consumers=2, dispatch_mode=dispatch_mode, state_factory=lambda **_: state)
+            accounts = engine.process_file(str(csv_file))
+
+            assert accounts[1].held == Decimal("0")
+            assert accounts[2].available == Decimal("5.0")
+            assert engine.stats.parked == 1
+            assert engine.stats.snapshot().rejected_by_reason[RejectionReason.CLIENT_MISMATCH] == 1
+            if dispatch_mode == DispatchMode.SHARDED:
+                assert all(len(threads) == 1 for threads in state.threads.values())
+
+    def test_early_dispute_resolve_chain(self, tmp_path):
+        """Dispute and resolve both arrive before their deposit."""
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text('\n'.join([
+            "type, client, tx, amount",
+            "dispute, 1, 1,",
+            "resolve, 1, 1,",
+            "dispute, 1, 2,",
+            "chargeback, 1, 2,",
+            "deposit, 1, 1, 100.0",
+            "deposit, 1, 2, 30.0",
+            "withdrawal, 1, 3, 10.0",
+        ]))
+
+        for dispatch_mode in DispatchMode:
+            engine = PaymentsEngine(num_consumers=1, dispatch_mode=dispatch_mode)
+            accounts = engine.process_file(str(csv_file))
+
+            # tx 1 disputed then resolved, tx 2 disputed then charged back, then frozen
+            assert accounts[1].available == Decimal("100")
+            assert accounts[1].held == Decimal("0")
+            assert accounts[1].locked is True
+            assert engine.stats.parked == 4
+            assert engine.stats.failed == 1
+
+    def test_parking_lot_overflow_falls_back_to_dlq(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text('\n'.join([
+            "type, client, tx, amount",
+            "dispute, 1, 1,",
+            "dispute, 1, 2,",
+            "deposit, 1, 1, 100.0",
+            "deposit, 1, 2, 50.0",
+        ]))
+
+        engine = PaymentsEngine(num_consumers=1, max_parked=1)
+        accounts = engine.process_file(str(csv_file))
+
+        assert accounts[1].held == Decimal("150")
+        assert engine.stats.parked == 1
+        assert engine.stats.dlq_retried == 1
+
+    def test_fixed_point_matches_decimal(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text('\n'.join([
+            "type, client, tx, amount",
+            "deposit, 1, 1, 1.2345",
+            "deposit, 1, 2, 0.0001",
+            "withdrawal, 1, 3, 0.2346",
+            "deposit, 2, 4, 100.0",
+            "withdrawal, 2, 5, 30.5",
+            "dispute, 2, 4,",
+            "deposit, 3, 6, 10",
+            "dispute, 3, 6,",
+            "chargeback, 3, 6,",
+        ]))
+
+        decimal_accounts = PaymentsEngine(num_consumers=1).process_file(str(csv_file))
+        fixed_accounts = PaymentsEngine(num_consumers=1, fixed_point=True).process_file(str(csv_file))
+
+        assert fixed_accounts[1].available == 10000
+        assert fixed_accounts[2].available == -305000
+        assert fixed_accounts[2].held == 1000000
+        assert fixed_accounts[3].locked is True
+        for client_id, account in decimal_accounts.items():
+            fixed = fixed_accounts[client_id]
+            assert isinstance(fixed.available, int)
+            assert account.available == Decimal(fixed.available) / 10000
+            assert account.held == Decimal(fixed.held) / 10000
+            assert account.locked == fixed.locked
+
+    def test_fixed_point_rejects_excess_precision(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text('\n'.join([
+            "type, client, tx, amount",
+            "deposit, 1, 1, 1.00001",
+            "deposit, 1, 2, 2",
+        ]))
+
+        accounts = PaymentsEngine(num_consumers=2, fixed_point=True).process_file(str(csv_file))
+
+        assert accounts[1].available == 20000
+
+    def test_alternate_backends_match_in_memory(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        rows = ["type,client,tx,amount"]
+        for transaction_id in range(1, 3001):
+            client_id = transaction_id % 50
+            rows.append(f"deposit,{client_id},{transaction_id},{transaction_id % 7 + 1}.25")
+            if transaction_id % 5 == 0:
+                rows.append(f"withdrawal,{client_id},{100_000 + transaction_id},1.5")
+            if transaction_id % 11 == 0:
+                rows.append(f"dispute,{client_id},{transaction_id},")
+            if transaction_id % 33 == 0:
+                rows.append(f"resolve,{client_id},{transaction_id},")
+            if transaction_id % 77 == 0:
+                rows.append(f"chargeback,{client_id},{transaction_id},")
+        csv_file.write_text("\n".join(rows) + "\n")
+
+        def balances(state_factory):
+            engine = PaymentsEngine(num_consumers=4, dispatch_mode=DispatchMode.SHARDED, state_factory=state_factory)
+            return {client_id: (a.available, a.held, a.locked) for client_id, a in engine.process_file(str(csv_file)).items()}
+
+        expected = balances(StateManager)
+        assert balances(SqliteStateManager) == expected
+        tiered = functools.partial(TieredTransactionHistory, hot_capacity=100)
+        assert balances(functools.partial(StateManager, history_factory=tiered)) == expected
+
+    def test_parse_workers_match_sequential_parsing(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        write_recovery_workload(csv_file, 2000)
+
+        def run(**options):
+            engine = SmallChunkEngine(num_consumers=1, **options)
+            accounts = engine.process_file(str(csv_file))
+            return {client_id: (a.available, a.held, a.locked) for client_id, a in accounts.items()}, engine.stats.processed
+
+        assert run(parse_workers=2) == run()
+        assert run(parse_workers=2, fixed_point=True) == run(fixed_point=True)
+
+    def test_binary_input_matches_csv(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        write_recovery_workload(csv_file, 2000)
+        binary_file = tmp_path / "test.bin"
+        convert_csv(str(csv_file), str(binary_file))
+
+        def run(path, **options):
+            engine = SmallChunkEngine(num_consumers=2, dispatch_mode=DispatchMode.SHARDED, **options)
+            accounts = engine.process_file(str(path))
+            return {client_id: (a.available, a.held, a.locked) for client_id, a in accounts.items()}, engine.stats.processed
+
+        assert run(binary_file) == run(csv_file)
+        assert run(binary_file, fixed_point=True) == run(csv_file, fixed_point=True)
+
+    def test_truncated_binary_input_raises(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        write_recovery_workload(csv_file, 2000)
+        binary_file = tmp_path / "test.bin"
+        convert_csv(str(csv_file), str(binary_file))
+        binary_file.write_bytes(binary_file.read_bytes()[:-3])
+
+        for dispatch_mode in DispatchMode:
+            engine = SmallChunkEngine(num_consumers=2, dispatch_mode=dispatch_mode)
+            with pytest.raises(ValueError, match="truncated"):
+                engine.process_file(str(binary_file))
+
+    def test_compressed_input_matches_plain(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        write_recovery_workload(csv_file, 2000)
+        compressed_file = tmp_path / "test.csv.bz2"
+        compressed_file.write_bytes(bz2.compress(csv_file.read_bytes()))
+
+        def run(path, **options):
+            # SHARED mode may apply a client spanning two read chunks out of order
+            engine = SmallChunkEngine(num_consumers=2, dispatch_mode=DispatchMode.SHARDED, **options)
+            accounts = engine.process_file(str(path))
+            return {client_id: (a.available, a.held, a.locked) for client_id, a in accounts.items()}, engine.stats.processed
+
+        assert run(compressed_file) == run(csv_file)
+        assert run(compressed_file, parse_workers=2) == run(csv_file)
+
+    def test_truncated_compressed_input_raises(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        write_recovery_workload(csv_file, 2000)
+        compressed_file = tmp_path / "test.csv.gz"
+        data = gzip.compress(csv_file.read_bytes())
+        compressed_file.write_bytes(data[:len(data) // 2])
+
+        engine = SmallChunkEngine(num_consumers=2)
+        with pytest.raises(EOFError):
+            engine.process_file(str(compressed_file))
+
+    def test_instrumentation_report(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text('\n'.join([
+            "type, client, tx, amount",
+            "deposit, 1, 1, 100.0",
+            "deposit, 2, 2, 50.0",
+            "withdrawal, 1, 3, 30.0",
+            "dispute, 2, 2,",
+            "withdrawal, 2, 4, 500.0",
+        ]))
+
+        engine = PaymentsEngine(num_consumers=2, instrumentation=Instrumentation())
+        accounts = engine.process_file(str(csv_file))
+        report = engine.instrumentation_report
+
+        assert accounts[1].available == Decimal("70")
+        assert report["counters"]["processed"] == 4
+        assert report["counters"]["failed"] == 1
+        assert report["counters"]["rejected_by_reason"] == {"insufficient_funds": 1}
+        assert report["stages"]["parse"]["count"] == 1
+        assert report["stages"]["apply"]["count"] == 5
+        assert report["stages"]["lock_wait"]["count"] == 5
+        assert len(report["consumers"]) == 2
+        assert sum(consumer["transactions"] for consumer in report["consumers"]) == 5
+        assert {client["client_id"] for client in report["hot_clients"]} == {1, 2}
+        assert sum(client["acquisitions"] for client in report["hot_clients"]) == 5
+
+    def test_instrumentation_sharded_takes_no_client_lock(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text('\n'.join([
+            "type, client, tx, amount",
+            "deposit, 1, 1, 100.0",
+            "deposit, 2, 2, 50.0",
+        ]))
+
+        engine = PaymentsEngine(num_consumers=2, dispatch_mode=DispatchMode.SHARDED, instrumentation=Instrumentation())
+        engine.process_file(str(csv_file))
+        report = engine.instrumentation_report
+
+        assert report["stages"]["apply"]["count"] == 2
+        assert report["stages"]["lock_wait"]["count"] == 0
+        assert report["hot_clients"] == []
+
+    def test_no_instrumentation_report_by_default(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text("type, client, tx, amount\ndeposit, 1, 1, 1.0")
+
+        engine = PaymentsEngine(num_consumers=1)
+        engine.process_file(str(csv_file))
+
+        assert engine.instrumentation_report is None
+
+    def test_stats_breakdown(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text('\n'.join([
+            "type, client, tx, amount",
+            "dispute, 1, 1,",
+            "deposit, 1, 1, 100.0",
+            "deposit, 2, 2, 10.0",
+            "withdrawal, 2, 3, 50.0",
+            "deposit, 3, 4, -1.0",
+            "dispute, 3, 5,",
+        ]))
+
+        engine = PaymentsEngine(num_consumers=3)
+        engine.process_file(str(csv_file))
+        snapshot = engine.stats.snapshot()
+
+        assert snapshot.processed == 3
+        assert snapshot.processed_by_type[TransactionType.DEPOSIT] == 2
+        assert snapshot.processed_by_type[TransactionType.DISPUTE] == 1
+        assert snapshot.failed_by_type[TransactionType.WITHDRAWAL] == 1
+        assert snapshot.failed_by_type[TransactionType.DEPOSIT] == 1
+        assert snapshot.rejected_by_reason[RejectionReason.INSUFFICIENT_FUNDS] == 1
+        assert snapshot.rejected_by_reason[RejectionReason.INVALID_AMOUNT] == 1
+        assert snapshot.rejected_by_reason[RejectionReason.TRANSACTION_NOT_FOUND] == 2
+        assert snapshot.parked == 2
+
+
+class ThreadRecordingStateManager(StateManager):
+    """Records which threads touched each client's account."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.threads = {}
+
+    def get_or_create_account(self, client_id):
+        self.threads.setdefault(client_id, set()).add(threading.get_ident())
+        return super().get_or_create_account(client_id)
+
+
+class SmallChunkEngine(PaymentsEngine):
+    READ_CHUNK_BYTES = 512
+
+
+class CrashingEngine(PaymentsEngine):
+    """Leaves the journal and snapshot behind, as a run killed after its last chunk would."""
+
+    READ_CHUNK_BYTES = 512
+
+    def _finish_journal(self):
+        pass
+
+
+def write_recovery_workload(path, num_rows: int) -> int:
+    """Write a seeded workload; returns the byte length of the first half (header included)."""
+    rng = random.Random(3)
+    lines = ["type, client, tx, amount\n"]
+    deposits = {}
+    for tx_id in range(1, num_rows + 1):
+        client_id = rng.randint(1, 20)
+        roll = rng.random()
+        if deposits.get(client_id) and roll < 0.15:
+            lines.append(f"dispute, {client_id}, {deposits[client_id].pop()},\n")
+        elif roll < 0.35:
+            lines.append(f"withdrawal, {client_id}, {tx_id}, 3.5\n")
+        else:
+            lines.append(f"deposit, {client_id}, {tx_id}, {rng.randint(1, 100)}.25\n")
+            deposits.setdefault(client_id, []).append(tx_id)
+    # A dispute that arrives before its deposit stays parked across the crash
+    lines.insert(10, "dispute, 1, 999999,\n")
+    lines.append("deposit, 1, 999999, 5.0\n")
+    # A replayed withdrawal is only caught if recovery restores the seen tx ids
+    lines[1:1] = ["deposit, 1, 999990, 100.0\n", "withdrawal, 1, 999991, 1.0\n"]
+    lines.append("withdrawal, 1, 999991, 1.0\n")
+    data = "".join(lines)
+    with open(path, "w") as f:
+        f.write(data)
+    return len("".join(lines[:len(lines) // 2]))
+
+
+class TestJournaledEngine:
+    def as_tuples(self, accounts):
+        return {client_id: (a.available, a.held, a.locked) for client_id, a in accounts.items()}
+
+    def crash_and_recover(
+        self, tmp_path, snapshot_interval: int, parse_workers: int = 0, dispatch_mode: DispatchMode = DispatchMode.SHARDED
+    ):
+        full = tmp_path / "full.csv"
+        half_length = write_recovery_workload(full, 2000)
+        prefix = tmp_path / "prefix.csv"
+        prefix.write_bytes(full.read_bytes()[:half_length])
+        journal_dir = tmp_path / "journal"
+        options = dict(num_consumers=3, dispatch_mode=dispatch_mode)
+
+        expected_engine = PaymentsEngine(**options)
+        expected = expected_engine.process_file(str(full))
+
+        CrashingEngine(
+            journal_dir=str(journal_dir), snapshot_interval=snapshot_interval, parse_workers=parse_workers, **options
+        ).process_file(str(prefix))
+        assert (journal_dir / PaymentsEngine.JOURNAL_FILE).exists()
+        engine = PaymentsEngine(journal_dir=str(journal_dir), parse_workers=parse_workers, **options)
+        recovered = engine.process_file(str(full))
+
+        assert self.as_tuples(recovered) == self.as_tuples(expected)
+        assert engine.stats.processed == expected_engine.stats.processed
+        assert engine.stats.failed == expected_engine.stats.failed
+        assert os.listdir(journal_dir) == []
+        return journal_dir
+
+    def test_recover_from_snapshot_and_journal(self, tmp_path):
+        self.crash_and_recover(tmp_path, snapshot_interval=300)
+
+    def test_recover_from_journal_only(self, tmp_path):
+        self.crash_and_recover(tmp_path, snapshot_interval=10**9)
+
+    def test_recover_with_parse_workers(self, tmp_path):
+        self.crash_and_recover(tmp_path, snapshot_interval=300, parse_workers=2)
+
+    def test_recover_with_mailbox_dispatch(self, tmp_path):
+        self.crash_and_recover(tmp_path, snapshot_interval=300, dispatch_mode=DispatchMode.MAILBOX)
+
+    def test_recover_compressed_input(self, tmp_path):
+        full_csv = tmp_path / "full.csv"
+        half_length = write_recovery_workload(full_csv, 2000)
+        full = tmp_path / "full.csv.gz"
+        full.write_bytes(gzip.compress(full_csv.read_bytes()))
+        prefix = tmp_path / "prefix.csv.gz"
+        prefix.write_bytes(gzip.compress(full_csv.read_bytes()[:half_length]))
+        journal_dir = tmp_path / "journal"
+        options = dict(num_consumers=3, dispatch_mode=DispatchMode.SHARDED)
+
+        expected = PaymentsEngine(**options).process_file(str(full_csv))
+        CrashingEngine(journal_dir=str(journal_dir), snapshot_interval=300, **options).process_file(str(prefix))
+        recovered = PaymentsEngine(journal_dir=str(journal_dir), **options).process_file(str(full))
+
+        assert self.as_tuples(recovered) == self.as_tuples(expected)
+
+    def test_recover_binary_input(self, tmp_path):
+        full_csv = tmp_path / "full.csv"
+        write_recovery_workload(full_csv, 2000)
+        full = tmp_path / "full.bin"
+        convert_csv(str(full_csv), str(full))
+        prefix = tmp_path / "prefix.bin"
+        data = full.read_bytes()
+        prefix.write_bytes(data[:len(MAGIC) + (len(data) - len(MAGIC)) // RECORD.size // 2 * RECORD.size])
+        journal_dir = tmp_path / "journal"
+        options = dict(num_consumers=3, dispatch_mode=DispatchMode.SHARDED)
+
+        expected = PaymentsEngine(**options).process_file(str(full_csv))
+        CrashingEngine(journal_dir=str(journal_dir), snapshot_interval=300, **options).process_file(str(prefix))
+        recovered = PaymentsEngine(journal_dir=str(journal_dir), **options).process_file(str(full))
+
+        assert self.as_tuples(recovered) == self.as_tuples(expected)
+
+    def test_crash_leaves_snapshot_and_journal_tail(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        write_recovery_workload(csv_file, 500)
+        journal_dir = tmp_path / "journal"
+
+        CrashingEngine(num_consumers=2, journal_dir=str(journal_dir), snapshot_interval=100).process_file(str(csv_file))
+
+        assert sorted(os.listdir(journal_dir)) == [PaymentsEngine.JOURNAL_FILE, PaymentsEngine.SNAPSHOT_FILE]
+
+    def test_completed_run_matches_unjournaled(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        write_recovery_workload(csv_file, 500)
+        journal_dir = tmp_path / "journal"
+
+        expected = PaymentsEngine(num_consumers=1).process_file(str(csv_file))
+        accounts = PaymentsEngine(num_consumers=1, journal_dir=str(journal_dir), snapshot_interval=100).process_file(str(csv_file))
+
+        assert self.as_tuples(accounts) == self.as_tuples(expected)
+        assert os.listdir(journal_dir) == []
+
+    def test_fixed_point_recovery(self, tmp_path):
+        full = tmp_path / "full.csv"
+        half_length = write_recovery_workload(full, 600)
+        prefix = tmp_path / "prefix.csv"
+        prefix.write_bytes(full.read_bytes()[:half_length])
+        journal_dir = tmp_path / "journal"
+
+        expected = PaymentsEngine(num_consumers=1, fixed_point=True).process_file(str(full))
+        CrashingEngine(num_consumers=1, fixed_point=True, journal_dir=str(journal_dir), snapshot_interval=100).process_file(str(prefix))
+        recovered = PaymentsEngine(num_consumers=1, fixed_point=True, journal_dir=str(journal_dir)).process_file(str(full))
+
+        assert self.as_tuples(recovered) == self.as_tuples(expected)
+        assert all(isinstance(account.available, int) for account in recovered.values())
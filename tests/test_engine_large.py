@@ -1,10 +1,14 @@
+import functools
 import sys
 import os
 from decimal import Decimal
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
+from models import DispatchMode
+from history_store import CompactTransactionHistory
 from payments_engine import PaymentsEngine
+from state_manager import StateManager, DenseStateManager
 
 
 class TestPaymentsEngineLargeScale:
@@ -51,6 +55,17 @@ class TestPaymentsEngineLargeScale:
             assert accounts[client_id].held == Decimal("0")
             assert accounts[client_id].locked is False
 
+        engine = PaymentsEngine(num_consumers=10, state_factory=DenseStateManager)
+        accounts = engine.process_file(str(csv_file))
+
+        assert list(accounts) == list(range(1, num_clients + 1))
+
+        for client_id in range(1, num_clients + 1):
+            assert accounts[client_id].available == expected_balance, \
+                f"Client {client_id}: expected {expected_balance}, got {accounts[client_id].available}"
+            assert accounts[client_id].held == Decimal("0")
+            assert accounts[client_id].locked is False
+
     def test_with_disputes_resolves_chargebacks(self, tmp_path):
         """Test with disputes, resolves, and chargebacks across 50 accounts."""
         rows = ["type, client, tx, amount"]
@@ -109,7 +124,13 @@ class TestPaymentsEngineLargeScale:
 
         engine = PaymentsEngine(num_consumers=10)
         accounts = engine.process_file(str(csv_file))
+        self._verify_dispute_accounts(accounts)
+
+        compact_state = functools.partial(StateManager, history_factory=CompactTransactionHistory)
+        engine = PaymentsEngine(num_consumers=10, state_factory=compact_state)
+        self._verify_dispute_accounts(engine.process_file(str(csv_file)))
 
+    def _verify_dispute_accounts(self, accounts):
         # Verify Client 1-10: Normal
         for client_id in range(1, 11):
             assert accounts[client_id].available == Decimal("500"), f"Client {client_id}"
@@ -141,3 +162,52 @@ class TestPaymentsEngineLargeScale:
             assert accounts[client_id].available == Decimal("600"), f"Client {client_id}"
             assert accounts[client_id].held == Decimal("0")
             assert accounts[client_id].locked is False
+
+    def test_sharded_1000_accounts_6000_transactions(self, tmp_path):
+        """Same workload as above through client-sharded consumer queues."""
+        num_clients = 1000
+        rows = ["type, client, tx, amount"]
+        tx_id = 1
+
+        for client_id in range(1, num_clients + 1):
+            for amount in ("100", "200", "300"):
+                rows.append(f"deposit, {client_id}, {tx_id}, {amount}")
+                tx_id += 1
+            for amount in ("50", "100"):
+                rows.append(f"withdrawal, {client_id}, {tx_id}, {amount}")
+                tx_id += 1
+            rows.append(f"dispute, {client_id}, {tx_id - 5},")
+            rows.append(f"resolve, {client_id}, {tx_id - 5},")
+
+        csv_file = tmp_path / "large_test.csv"
+        csv_file.write_text('\n'.join(rows))
+
+        engine = PaymentsEngine(num_consumers=10, dispatch_mode=DispatchMode.SHARDED)
+        accounts = engine.process_file(str(csv_file))
+
+        assert len(accounts) == num_clients
+        for client_id in range(1, num_clients + 1):
+            assert accounts[client_id].available == Decimal("450"), f"Client {client_id}"
+            assert accounts[client_id].held == Decimal("0")
+            assert accounts[client_id].locked is False
+        # In file order nothing is ever out of order for a client
+        assert engine.stats.dlq_retried == 0
+
+    def test_small_queue_capacity_applies_backpressure(self, tmp_path):
+        """A queue far smaller than the input still processes everything."""
+        rows = ["type, client, tx, amount"]
+        for tx_id in range(1, 5001):
+            rows.append(f"deposit, {tx_id % 100 + 1}, {tx_id}, 1")
+        csv_file = tmp_path / "large_test.csv"
+        csv_file.write_text('\n'.join(rows))
+
+        for dispatch_mode in DispatchMode:
+            engine = PaymentsEngine(num_consumers=4, dispatch_mode=dispatch_mode, queue_capacity=16)
+            accounts = engine.process_file(str(csv_file))
+
+            assert all(account.available == Decimal("50") for account in accounts.values())
+            assert engine.stats.processed == 5000
+            # Batches are admitted whole, so depth may overshoot capacity by one batch
+            assert all(stats.max_depth < 16 + 2 * PaymentsEngine.DEFAULT_BATCH_SIZE for stats in engine.queue_stats)
+            assert sum(stats.backpressure_waits for stats in engine.queue_stats) > 0
+            assert sum(stats.published for stats in engine.queue_stats) == 5000
@@ -0,0 +1,204 @@
+import sys
+import os
+import threading
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from history_store import MAX_TRANSACTION_ID, BloomFilter, SeenTransactionIds, TransactionHistory, CompactTransactionHistory, TieredTransactionHistory
+from models import Transaction, TransactionType
+
+
+def deposit(transaction_id: int, client_id: int = 1, amount=Decimal("10")) -> Transaction:
+    return Transaction(TransactionType.DEPOSIT, client_id=client_id, transaction_id=transaction_id, amount=amount)
+
+
+class TestTransactionHistory:
+    def make_history(self, **kwargs):
+        return TransactionHistory(**kwargs)
+
+    def test_put_get(self):
+        history = self.make_history()
+        history.put(deposit(1, amount=Decimal("1.5")))
+        history.put(Transaction(TransactionType.WITHDRAWAL, client_id=2, transaction_id=2, amount=Decimal("0.25")))
+
+        assert history.get(1) == deposit(1, amount=Decimal("1.5"))
+        assert history.get(2) == Transaction(TransactionType.WITHDRAWAL, client_id=2, transaction_id=2, amount=Decimal("0.25"))
+        assert history.get(3) is None
+        assert len(history) == 2
+
+    def test_disputes(self):
+        history = self.make_history()
+        history.put(deposit(1))
+        assert not history.is_disputed(1)
+        history.mark_disputed(1)
+        assert history.is_disputed(1)
+        history.clear_disputed(1)
+        assert not history.is_disputed(1)
+
+    def test_iter(self):
+        history = self.make_history()
+        for transaction_id in range(1, 6):
+            history.put(deposit(transaction_id))
+        assert sorted(transaction.transaction_id for transaction in history) == [1, 2, 3, 4, 5]
+
+    def test_fixed_point_amounts(self):
+        history = self.make_history(fixed_point=True)
+        history.put(deposit(1, amount=12345))
+        assert history.get(1).amount == 12345
+
+
+class TestCompactTransactionHistory(TestTransactionHistory):
+    def make_history(self, **kwargs):
+        return CompactTransactionHistory(**kwargs)
+
+    def test_grows_and_keeps_disputes(self):
+        history = self.make_history(initial_capacity=8)
+        for transaction_id in range(10_000):
+            history.put(deposit(transaction_id, client_id=transaction_id % 100, amount=Decimal(transaction_id)))
+            if transaction_id % 7 == 0:
+                history.mark_disputed(transaction_id)
+
+        assert len(history) == 10_000
+        assert history.capacity >= 10_000 / CompactTransactionHistory.MAX_LOAD_FACTOR
+        for transaction_id in range(10_000):
+            transaction = history.get(transaction_id)
+            assert transaction.client_id == transaction_id % 100
+            assert transaction.amount == Decimal(transaction_id)
+            assert history.is_disputed(transaction_id) == (transaction_id % 7 == 0)
+
+    def test_values_outside_columns_are_kept_exactly(self):
+        history = self.make_history()
+        wide = [
+            deposit(1 << 40),
+            deposit(2, client_id=70_000),
+            deposit(3, amount=Decimal("0.00001")),
+            deposit(4, amount=Decimal("1e30")),
+        ]
+        for transaction in wide:
+            history.put(transaction)
+            history.mark_disputed(transaction.transaction_id)
+
+        for transaction in wide:
+            assert history.get(transaction.transaction_id) == transaction
+            assert history.is_disputed(transaction.transaction_id)
+        assert history.get(-1) is None
+
+    def test_bytes_per_transaction(self):
+        history = self.make_history()
+        for transaction_id in range(100_000):
+            history.put(deposit(transaction_id))
+        assert history.nbytes / len(history) < 40
+
+    def test_concurrent_writers(self):
+        history = self.make_history(initial_capacity=8)
+
+        def writer(offset: int):
+            for transaction_id in range(offset, 20_000, 4):
+                history.put(deposit(transaction_id))
+                assert history.get(transaction_id) is not None
+
+        threads = [threading.Thread(target=writer, args=(offset,)) for offset in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(history) == 20_000
+        assert all(history.get(transaction_id) is not None for transaction_id in range(20_000))
+
+
+class TestTieredTransactionHistory(TestTransactionHistory):
+    def make_history(self, **kwargs):
+        kwargs.setdefault("hot_capacity", 100)
+        return TieredTransactionHistory(**kwargs)
+
+    def test_evicts_to_cold_tier_and_answers_old_lookups(self):
+        history = self.make_history()
+        for transaction_id in range(1, 100_001):
+            history.put(deposit(transaction_id, client_id=transaction_id % 100, amount=Decimal(transaction_id) / 4))
+
+        assert history.hot_count == 100
+        assert history.cold_count == 99_900
+        assert len(history) == 100_000
+        for transaction_id in (1, 2, 5_000, 99_900, 99_901, 100_000):
+            transaction = history.get(transaction_id)
+            assert transaction.client_id == transaction_id % 100
+            assert transaction.amount == Decimal(transaction_id) / 4
+        assert history.get(100_001) is None
+        assert history.get(-5) is None
+
+    def test_lookup_promotes_cold_entry_without_duplicating_it(self):
+        history = self.make_history(hot_capacity=2)
+        for transaction_id in range(1, 6):
+            history.put(deposit(transaction_id))
+        history.mark_disputed(1)
+        assert history.get(1) == deposit(1)
+        for transaction_id in range(6, 9):
+            history.put(deposit(transaction_id))
+
+        assert history.is_disputed(1)
+        assert len(history) == 8
+        assert sorted(transaction.transaction_id for transaction in history) == list(range(1, 9))
+
+    def test_fixed_point_cold_entries(self):
+        history = self.make_history(fixed_point=True, hot_capacity=1)
+        history.put(deposit(1, amount=12345))
+        history.put(deposit(2, amount=1 << 70))
+        history.put(deposit(3, amount=1))
+        assert history.cold_count == 1
+        assert history.get(1).amount == 12345
+        assert history.get(2).amount == 1 << 70
+
+    def test_close_removes_files(self):
+        history = self.make_history(hot_capacity=1)
+        for transaction_id in range(3):
+            history.put(deposit(transaction_id))
+        assert os.path.isdir(history.directory)
+        history.close()
+        assert not os.path.exists(history.directory)
+
+
+class TestSeenTransactionIds:
+    def test_add_and_contains(self):
+        seen = SeenTransactionIds()
+        ids = [0, 7, 8, 524_287, 524_288, MAX_TRANSACTION_ID, MAX_TRANSACTION_ID + 1, -3]
+        for transaction_id in ids:
+            seen.add(transaction_id)
+        assert all(transaction_id in seen for transaction_id in ids)
+        assert 1 not in seen and 524_289 not in seen and 1 << 40 not in seen
+        assert seen.nbytes == 3 * 65536
+
+    def test_serialization_merges(self):
+        seen = SeenTransactionIds()
+        for transaction_id in (1, 3, 1 << 40):
+            seen.add(transaction_id)
+        restored = SeenTransactionIds()
+        restored.add(2)
+        restored.update_from_bytes(seen.to_bytes())
+        assert all(transaction_id in restored for transaction_id in (1, 2, 3, 1 << 40))
+        assert 4 not in restored
+
+    def test_concurrent_writers_lose_no_bits(self):
+        seen = SeenTransactionIds()
+
+        def writer(offset: int):
+            for transaction_id in range(offset, 40_000, 4):
+                seen.add(transaction_id)
+
+        threads = [threading.Thread(target=writer, args=(offset,)) for offset in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(transaction_id in seen for transaction_id in range(40_000))
+
+
+class TestBloomFilter:
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom = BloomFilter(10_000)
+        for key in range(0, 20_000, 2):
+            bloom.add(key)
+        assert all(bloom.might_contain(key) for key in range(0, 20_000, 2))
+        false_positives = sum(bloom.might_contain(key) for key in range(1, 20_000, 2))
+        assert false_positives < 10_000 * 0.03
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import sys
+import os
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from ingest_server import IngestServer
+from models import DispatchMode
+from streaming_engine import StreamingPaymentsEngine
+
+
+async def http_request(reader, writer, method: str, target: str, body: bytes = b"", headers: str = ""):
+    length = f"Content-Length: {len(body)}\r\n" if method == "POST" else ""
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: test\r\n{length}{headers}\r\n".encode() + body)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    content_length = int(head.lower().split(b"content-length: ")[1].split(b"\r\n")[0])
+    return status, await reader.readexactly(content_length)
+
+
+def run_with_server(scenario, **server_options):
+    """Run scenario(server, tcp_address, http_address) against a fresh engine; returns (result, accounts)."""
+    engine = StreamingPaymentsEngine(max_latency=0.001, num_consumers=2, dispatch_mode=DispatchMode.SHARDED)
+    engine.start()
+
+    async def main():
+        server = IngestServer(engine, **server_options)
+        tcp_address = await server.start_tcp()
+        http_address = await server.start_http()
+        try:
+            return await scenario(server, tcp_address, http_address)
+        finally:
+            await server.close()
+
+    try:
+        result = asyncio.run(main())
+    finally:
+        accounts = engine.stop()
+    return result, accounts
+
+
+class TestIngestServer:
+    def test_tcp_rows_split_across_writes(self):
+        async def scenario(server, tcp_address, http_address):
+            reader, writer = await asyncio.open_connection(*tcp_address)
+            payload = b"deposit,1,1,10.0\ndeposit,2,2,5.5\nwithdrawal,1,3,2.5\nbogus\ndeposit,1,4,1"
+            for start in range(0, len(payload), 7):
+                writer.write(payload[start:start + 7])
+                await writer.drain()
+            writer.write_eof()
+            accepted = int(await reader.readline())
+            writer.close()
+            return accepted
+
+        accepted, accounts = run_with_server(scenario)
+
+        assert accepted == 4
+        assert accounts[1].available == Decimal("8.5")
+        assert accounts[2].available == Decimal("5.5")
+
+    def test_http_keep_alive_and_accounts(self):
+        async def scenario(server, tcp_address, http_address):
+            reader, writer = await asyncio.open_connection(*http_address)
+            first = await http_request(reader, writer, "POST", "/transactions", b"deposit,1,1,3.0\ndeposit,1,2,4.0\n")
+            second = await http_request(reader, writer, "POST", "/transactions", b"dispute,1,1,\n")
+            accounts = await http_request(reader, writer, "GET", "/accounts")
+            missing = await http_request(reader, writer, "GET", "/nope")
+            writer.close()
+            return first, second, accounts, missing, server.requests
+
+        (first, second, accounts_csv, missing, requests), accounts = run_with_server(scenario)
+
+        assert first == (202, json.dumps({"accepted": 2}).encode())
+        assert second[0] == 202
+        assert accounts_csv == (200, b"client,available,held,total,locked\n1,4,3,7,false\n")
+        assert missing[0] == 404
+        assert requests == 4
+        assert accounts[1].held == Decimal("3.0")
+
+    def test_http_unknown_route_skips_body(self):
+        async def scenario(server, tcp_address, http_address):
+            reader, writer = await asyncio.open_connection(*http_address)
+            missing = await http_request(reader, writer, "POST", "/nope", b"deposit,1,1,3.0\n")
+            accepted = await http_request(reader, writer, "POST", "/transactions", b"deposit,1,2,4.0\n")
+            writer.write(b"POST /nope HTTP/1.1\r\nContent-Length: 1000\r\n\r\n")
+            head = await reader.readuntil(b"\r\n\r\n")
+            closed = await reader.read() == b""
+            writer.close()
+            return missing, accepted, head, closed
+
+        (missing, accepted, head, closed), accounts = run_with_server(scenario, max_body_bytes=100)
+
+        assert missing[0] == 404
+        assert accepted == (202, json.dumps({"accepted": 1}).encode())
+        assert head.startswith(b"HTTP/1.1 404 ") and b"Connection: close" in head
+        assert closed
+        assert accounts[1].available == Decimal("4.0")
+
+    def test_http_rejects_missing_length_and_large_bodies(self):
+        async def scenario(server, tcp_address, http_address):
+            statuses = []
+            for request in (
+                b"POST /transactions HTTP/1.1\r\nHost: test\r\n\r\n",
+                b"POST /transactions HTTP/1.1\r\nContent-Length: 1000\r\n\r\n",
+            ):
+                reader, writer = await asyncio.open_connection(*http_address)
+                writer.write(request)
+                statuses.append(int((await reader.readline()).split()[1]))
+                writer.close()
+            return statuses
+
+        statuses, _ = run_with_server(scenario, max_body_bytes=100)
+
+        assert statuses == [411, 413]
+
+    def test_many_connections_with_bounded_inflight_chunks(self):
+        async def client(http_address, client_id):
+            reader, writer = await asyncio.open_connection(*http_address)
+            accepted = 0
+            for batch in range(5):
+                rows = "".join(
+                    f"deposit,{client_id},{client_id * 1000 + batch * 10 + row},1.25\n" for row in range(10)
+                ).encode()
+                status, body = await http_request(reader, writer, "POST", "/transactions", rows)
+                assert status == 202
+                accepted += json.loads(body)["accepted"]
+            writer.close()
+            return accepted
+
+        async def scenario(server, tcp_address, http_address):
+            return await asyncio.gather(*(client(http_address, client_id) for client_id in range(1, 51)))
+
+        accepted, accounts = run_with_server(scenario, max_inflight_chunks=2)
+
+        assert sum(accepted) == 50 * 50
+        assert len(accounts) == 50
+        assert all(account.available == Decimal("62.5") for account in accounts.values())
@@ -0,0 +1,86 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from instrumentation import Instrumentation, LatencyHistogram, HOT_CLIENTS_REPORTED
+
+
+class TestLatencyHistogram:
+    def test_record(self):
+        histogram = LatencyHistogram()
+        for duration_ns in (100, 200, 300, 5000):
+            histogram.record(duration_ns)
+
+        assert histogram.count == 4
+        assert histogram.total_ns == 5600
+        assert histogram.max_ns == 5000
+
+    def test_percentiles_are_bucket_upper_bounds(self):
+        histogram = LatencyHistogram()
+        for _ in range(99):
+            histogram.record(1000)
+        histogram.record(1_000_000)
+
+        assert 1000 <= histogram.percentile_ns(0.5) < 2000
+        assert 1000 <= histogram.percentile_ns(0.99) < 2000
+        assert histogram.percentile_ns(1.0) == 1_000_000
+
+    def test_empty(self):
+        histogram = LatencyHistogram()
+        assert histogram.percentile_ns(0.5) == 0
+        assert histogram.to_dict()["mean_us"] == 0.0
+
+    def test_zero_duration(self):
+        histogram = LatencyHistogram()
+        histogram.record(0)
+        assert histogram.percentile_ns(0.5) == 0
+
+    def test_merge(self):
+        first, second = LatencyHistogram(), LatencyHistogram()
+        first.record(10)
+        second.record(1000)
+        second.record(1000)
+        first.merge(second)
+
+        assert first.count == 3
+        assert first.total_ns == 2010
+        assert first.max_ns == 1000
+
+
+class TestInstrumentation:
+    def test_report_merges_consumers(self):
+        instrumentation = Instrumentation()
+        instrumentation.start()
+        first = instrumentation.consumer(0)
+        second = instrumentation.consumer(1)
+        first.record_lock_wait(7, 500)
+        second.record_lock_wait(7, 1500)
+        second.record_lock_wait(8, 100)
+        first.queue_wait.record(2_000_000_000)
+        instrumentation.finish()
+
+        report = instrumentation.report()
+
+        assert report["stages"]["lock_wait"]["count"] == 3
+        assert report["hot_clients"][0] == {"client_id": 7, "lock_wait_seconds": 2e-6, "acquisitions": 2}
+        assert report["consumers"][0]["idle_seconds"] == 2.0
+        assert report["wall_seconds"] >= 0
+
+    def test_hot_clients_are_capped(self):
+        instrumentation = Instrumentation()
+        timings = instrumentation.consumer(0)
+        for client_id in range(HOT_CLIENTS_REPORTED + 5):
+            timings.record_lock_wait(client_id, client_id)
+
+        hot_clients = instrumentation.report()["hot_clients"]
+
+        assert len(hot_clients) == HOT_CLIENTS_REPORTED
+        assert hot_clients[0]["client_id"] == HOT_CLIENTS_REPORTED + 4
+
+    def test_timed_parse(self):
+        instrumentation = Instrumentation()
+        batches = list(instrumentation.publisher.timed(iter([[1], [2, 3]])))
+
+        assert batches == [[1], [2, 3]]
+        assert instrumentation.publisher.parse.count == 2
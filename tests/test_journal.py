@@ -0,0 +1,111 @@
+import sys
+import os
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from journal import Journal, decode_transaction, encode_transaction, read_journal
+from models import Transaction, TransactionType
+
+
+def roundtrip(transaction: Transaction, fixed_point: bool) -> Transaction:
+    out = bytearray()
+    encode_transaction(transaction, out)
+    decoded, offset = decode_transaction(bytes(out), 0, fixed_point)
+    assert offset == len(out)
+    return decoded
+
+
+class TestTransactionEncoding:
+    def test_decimal_amount_is_exact(self):
+        transaction = Transaction(TransactionType.DEPOSIT, client_id=7, transaction_id=42, amount=Decimal("1.00005"))
+        assert roundtrip(transaction, fixed_point=False) == transaction
+
+    def test_fixed_point_amount(self):
+        transaction = Transaction(TransactionType.WITHDRAWAL, client_id=1, transaction_id=2, amount=12345)
+        assert roundtrip(transaction, fixed_point=True) == transaction
+
+    def test_units_decode_to_decimal(self):
+        transaction = Transaction(TransactionType.DEPOSIT, client_id=1, transaction_id=2, amount=15000)
+        assert roundtrip(transaction, fixed_point=False).amount == Decimal("1.5")
+
+    def test_no_amount_and_large_ids(self):
+        transaction = Transaction(TransactionType.DISPUTE, client_id=1 << 40, transaction_id=(1 << 62))
+        assert roundtrip(transaction, fixed_point=False) == transaction
+
+    def test_int_beyond_i64(self):
+        transaction = Transaction(TransactionType.DEPOSIT, client_id=1, transaction_id=1, amount=1 << 70)
+        assert roundtrip(transaction, fixed_point=True) == transaction
+
+
+class TestJournal:
+    def make_chunk(self, first_tx: int):
+        return [
+            Transaction(TransactionType.DEPOSIT, client_id=1, transaction_id=first_tx, amount=Decimal("10")),
+            Transaction(TransactionType.DISPUTE, client_id=1, transaction_id=first_tx),
+        ]
+
+    def test_append_and_read(self, tmp_path):
+        path = str(tmp_path / "journal.bin")
+        journal = Journal(path)
+        journal.append(25, 100, self.make_chunk(1))
+        journal.append(100, 180, self.make_chunk(3))
+        journal.close()
+
+        records = list(read_journal(path))
+
+        assert [(record.start_offset, record.end_offset) for record in records] == [(25, 100), (100, 180)]
+        assert records[1].transactions == self.make_chunk(3)
+        assert records[-1].journal_end == os.path.getsize(path)
+
+    def test_group_commit(self, tmp_path):
+        journal = Journal(str(tmp_path / "journal.bin"), group_commit_rows=4)
+        journal.append(0, 10, self.make_chunk(1))
+        assert journal.syncs == 0
+        journal.append(10, 20, self.make_chunk(3))
+        assert journal.syncs == 1
+        journal.close()
+
+    def test_torn_tail_is_ignored(self, tmp_path):
+        path = str(tmp_path / "journal.bin")
+        journal = Journal(path)
+        journal.append(0, 10, self.make_chunk(1))
+        journal.append(10, 20, self.make_chunk(3))
+        journal.close()
+        valid_length = os.path.getsize(path)
+        with open(path, "r+b") as f:
+            f.truncate(valid_length - 3)
+
+        records = list(read_journal(path))
+        assert len(records) == 1
+
+        # Reopening at the last valid record drops the torn bytes before appending
+        journal = Journal(path, valid_length=records[-1].journal_end)
+        journal.append(10, 20, self.make_chunk(3))
+        journal.close()
+        assert [record.end_offset for record in read_journal(path)] == [10, 20]
+
+    def test_corrupt_record_stops_reading(self, tmp_path):
+        path = str(tmp_path / "journal.bin")
+        journal = Journal(path)
+        journal.append(0, 10, self.make_chunk(1))
+        journal.append(10, 20, self.make_chunk(3))
+        journal.close()
+        with open(path, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b"\xff")
+
+        assert len(list(read_journal(path))) == 1
+
+    def test_truncate(self, tmp_path):
+        path = str(tmp_path / "journal.bin")
+        journal = Journal(path)
+        journal.append(0, 10, self.make_chunk(1))
+        journal.truncate()
+        journal.append(10, 20, self.make_chunk(3))
+        journal.close()
+
+        assert [record.start_offset for record in read_journal(path)] == [10]
+
+    def test_missing_journal(self, tmp_path):
+        assert list(read_journal(str(tmp_path / "missing.bin"))) == []
@@ -0,0 +1,129 @@
+import sys
+import os
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from mailbox_scheduler import MailboxScheduler
+from models import Transaction, TransactionType
+
+
+def make_transaction(client_id: int, transaction_id: int) -> Transaction:
+    return Transaction(
+        transaction_type=TransactionType.DEPOSIT,
+        client_id=client_id,
+        transaction_id=transaction_id,
+        amount=Decimal("100"),
+    )
+
+
+def consume_in_thread(scheduler: MailboxScheduler, max_messages: int) -> list:
+    """consume_batch from a fresh consumer thread; returns the batch."""
+    result = []
+    thread = threading.Thread(target=lambda: result.extend(scheduler.consume_batch(max_messages)))
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    return result
+
+
+class TestMailboxScheduler:
+    def test_consume_takes_whole_mailboxes_in_order(self):
+        scheduler = MailboxScheduler(num_workers=1)
+        scheduler.publish_batch([make_transaction(1, 1), make_transaction(2, 2), make_transaction(1, 3)])
+
+        batch = scheduler.consume_batch(10)
+
+        assert [(t.client_id, t.transaction_id) for t in batch] == [(1, 1), (1, 3), (2, 2)]
+        assert scheduler.is_empty()
+
+    def test_held_mailbox_is_not_handed_to_another_consumer(self):
+        scheduler = MailboxScheduler(num_workers=2)
+        scheduler.publish_batch([make_transaction(1, 1)])
+        assert [t.transaction_id for t in scheduler.consume_batch(10)] == [1]
+
+        # Client 1 gets more work while this thread still holds its mailbox
+        scheduler.publish_batch([make_transaction(1, 2), make_transaction(3, 3)])
+        stolen = consume_in_thread(scheduler, 10)
+        assert [t.client_id for t in stolen] == [3]
+
+        # Releasing on the next call puts client 1 back on this thread's run queue
+        assert [t.transaction_id for t in scheduler.consume_batch(10)] == [2]
+
+    def test_idle_consumer_steals(self):
+        scheduler = MailboxScheduler(num_workers=2)
+        # Clients 2, 4, 6, 8 all live on worker 0's run queue
+        scheduler.publish_batch([make_transaction(client_id, client_id) for client_id in (2, 4, 6, 8)])
+
+        worker_0 = scheduler.consume_batch(1)
+        worker_1 = consume_in_thread(scheduler, 10)
+
+        assert [t.client_id for t in worker_0] == [2]
+        assert sorted(t.client_id for t in worker_1) == [6, 8]
+        assert scheduler.steals == 1
+        assert scheduler.get_stats().depth == 1
+
+    def test_batch_larger_than_max_is_not_split(self):
+        scheduler = MailboxScheduler(num_workers=1)
+        scheduler.publish_batch([make_transaction(1, tx_id) for tx_id in range(5)])
+        scheduler.publish_batch([make_transaction(1, 5)])
+
+        assert len(scheduler.consume_batch(2)) == 5
+        assert len(scheduler.consume_batch(2)) == 1
+
+    def test_shutdown_drains_then_ends_stream(self):
+        scheduler = MailboxScheduler(num_workers=2)
+        results = []
+
+        def consume():
+            while True:
+                batch = scheduler.consume_batch(3)
+                if not batch:
+                    break
+                results.extend(batch)
+                scheduler.task_done(len(batch))
+
+        threads = [threading.Thread(target=consume) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for start in range(0, 300, 30):
+            scheduler.publish_batch([make_transaction(tx_id % 7, tx_id) for tx_id in range(start, start + 30)])
+        scheduler.join()
+        scheduler.shutdown()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert not any(thread.is_alive() for thread in threads)
+        assert len(results) == 300
+        for client_id in range(7):
+            tx_ids = [t.transaction_id for t in results if t.client_id == client_id]
+            assert len(tx_ids) == len(set(tx_ids))
+
+    def test_publish_backpressure(self):
+        scheduler = MailboxScheduler(num_workers=1, capacity=4, low_watermark=1)
+        scheduler.publish_batch([make_transaction(1, tx_id) for tx_id in range(4)])
+        published = threading.Event()
+
+        def publish():
+            scheduler.publish_batch([make_transaction(2, 10)])
+            published.set()
+
+        thread = threading.Thread(target=publish)
+        thread.start()
+        time.sleep(0.05)
+        assert not published.is_set()
+        scheduler.consume_batch(10)
+        thread.join(timeout=5)
+
+        assert published.is_set()
+        assert scheduler.get_stats().backpressure_waits == 1
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            MailboxScheduler(num_workers=0)
+        with pytest.raises(ValueError):
+            MailboxScheduler(num_workers=1, capacity=4, low_watermark=4)
@@ -0,0 +1,86 @@
+import json
+import lzma
+import subprocess
+import sys
+import os
+
+MAIN = os.path.join(os.path.dirname(__file__), "..", "src", "main.py")
+CONVERTER = os.path.join(os.path.dirname(__file__), "..", "src", "binary_ingest.py")
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def run_main(*args) -> bytes:
+    completed = subprocess.run([sys.executable, MAIN, *args], capture_output=True, check=True)
+    return completed.stdout
+
+
+class TestMain:
+    def test_basic_fixture_output(self):
+        output = run_main(os.path.join(FIXTURES, "basic.csv"))
+        assert output == (
+            b"client,available,held,total,locked\n"
+            b"1,1.5,0,1.5,false\n"
+            b"2,2,0,2,false\n"
+        )
+
+    def test_processes_output_is_byte_identical(self):
+        path = os.path.join(FIXTURES, "basic.csv")
+        assert run_main(path, "--processes", "2") == run_main(path)
+
+    def test_fixed_point_output_is_byte_identical(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text('\n'.join([
+            "type, client, tx, amount",
+            "deposit, 1, 1, 1.2345",
+            "withdrawal, 1, 2, 0.2345",
+            "deposit, 2, 3, 100.50",
+            "withdrawal, 2, 4, 130",
+            "deposit, 3, 5, 0.0001",
+            "dispute, 3, 5,",
+        ]))
+        path = str(csv_file)
+        assert run_main(path, "--fixed-point") == run_main(path)
+        assert run_main(path, "--fixed-point", "--processes", "2") == run_main(path)
+
+    def test_parse_workers_output_is_byte_identical(self):
+        path = os.path.join(FIXTURES, "basic.csv")
+        assert run_main(path, "--parse-workers", "2") == run_main(path)
+
+    def test_binary_input_output_is_byte_identical(self, tmp_path):
+        path = os.path.join(FIXTURES, "basic.csv")
+        binary_path = tmp_path / "basic.bin"
+        subprocess.run([sys.executable, CONVERTER, path, str(binary_path)], capture_output=True, check=True)
+
+        assert run_main(str(binary_path)) == run_main(path)
+        assert run_main(str(binary_path), "--fixed-point") == run_main(path)
+        assert run_main(str(binary_path), "--processes", "2") == run_main(path)
+        assert run_main(str(binary_path), "--fixed-point", "--processes", "2") == run_main(path)
+
+    def test_compressed_input_output_is_byte_identical(self, tmp_path):
+        path = os.path.join(FIXTURES, "basic.csv")
+        compressed_path = tmp_path / "basic.csv.xz"
+        with open(path, "rb") as f:
+            compressed_path.write_bytes(lzma.compress(f.read()))
+
+        assert run_main(str(compressed_path)) == run_main(path)
+
+    def test_output_path(self, tmp_path):
+        path = os.path.join(FIXTURES, "basic.csv")
+        output_path = tmp_path / "accounts.csv"
+
+        assert run_main(path, "-o", str(output_path)) == b""
+        assert output_path.read_bytes() == run_main(path)
+
+    def test_stats_json(self, tmp_path):
+        path = os.path.join(FIXTURES, "basic.csv")
+        report_path = tmp_path / "stats.json"
+
+        assert run_main(path, "--stats-json", str(report_path)) == run_main(path)
+        report = json.loads(report_path.read_text())
+        assert set(report["stages"]) == {"parse", "publish", "queue_wait", "lock_wait", "apply"}
+        assert report["counters"]["processed"] > 0
+
+    def test_missing_argument_exits_with_usage(self):
+        completed = subprocess.run([sys.executable, MAIN], capture_output=True)
+        assert completed.returncode != 0
+        assert b"usage" in completed.stderr
@@ -4,7 +4,9 @@ from decimal import Decimal
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
-from models import Transaction, TransactionType, ClientAccount, ProcessingResult
+import threading
+
+from models import Transaction, TransactionType, ClientAccount, ProcessingResult, ProcessingStats, RejectionReason, StatsSnapshot
 
 
 class TestTransaction:
@@ -50,3 +52,55 @@ class TestProcessingResult:
         assert ProcessingResult.SUCCESS.value == "success"
         assert ProcessingResult.FAILED_RETRIABLE.value == "failed_retriable"
         assert ProcessingResult.FAILED_PERMANENT.value == "failed_permanent"
+
+
+class TestProcessingStats:
+    def test_counters(self):
+        stats = ProcessingStats()
+        stats.record_success(TransactionType.DEPOSIT)
+        stats.record_success()
+        stats.record_failure(TransactionType.WITHDRAWAL, RejectionReason.INSUFFICIENT_FUNDS)
+        stats.record_park(RejectionReason.TRANSACTION_NOT_FOUND)
+        stats.record_dlq_retry()
+
+        assert (stats.processed, stats.failed, stats.parked, stats.dlq_retried) == (2, 1, 1, 1)
+        snapshot = stats.snapshot()
+        assert snapshot.processed_by_type[TransactionType.DEPOSIT] == 1
+        assert snapshot.failed_by_type[TransactionType.WITHDRAWAL] == 1
+        assert snapshot.to_dict()["rejected_by_reason"] == {"insufficient_funds": 1, "transaction_not_found": 1}
+
+    def test_aggregates_across_threads(self):
+        stats = ProcessingStats()
+
+        def record():
+            for _ in range(10_000):
+                stats.record_success(TransactionType.DEPOSIT)
+                stats.record_failure(TransactionType.WITHDRAWAL, RejectionReason.INSUFFICIENT_FUNDS)
+
+        threads = [threading.Thread(target=record) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert stats.processed == 80_000
+        assert stats.failed == 80_000
+        snapshot = stats.snapshot()
+        assert snapshot.processed_by_type[TransactionType.DEPOSIT] == 80_000
+        assert snapshot.rejected_by_reason[RejectionReason.INSUFFICIENT_FUNDS] == 80_000
+
+    def test_merge(self):
+        stats = ProcessingStats()
+        stats.record_success(TransactionType.DEPOSIT)
+        stats.merge(StatsSnapshot(
+            processed=2,
+            failed=1,
+            processed_by_type={TransactionType.DEPOSIT: 2},
+            rejected_by_reason={RejectionReason.ACCOUNT_LOCKED: 1},
+        ))
+
+        snapshot = stats.snapshot()
+        assert snapshot.processed == 3
+        assert snapshot.failed == 1
+        assert snapshot.processed_by_type[TransactionType.DEPOSIT] == 3
+        assert snapshot.rejected_by_reason[RejectionReason.ACCOUNT_LOCKED] == 1
@@ -0,0 +1,47 @@
+import sys
+import os
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from money import parse_fixed, format_fixed, decimal_to_fixed, fixed_to_decimal
+
+
+class TestParseFixed:
+    @pytest.mark.parametrize("amount_str, units", [
+        ("1", 10000),
+        ("1.0", 10000),
+        (" 2.5 ", 25000),
+        ("0.0001", 1),
+        ("1.23450", 12345),
+        (".5", 5000),
+        ("3.", 30000),
+        ("-1.5", -15000),
+        ("+7", 70000),
+        ("1e2", 1000000),
+        ("0", 0),
+    ])
+    def test_valid(self, amount_str, units):
+        assert parse_fixed(amount_str) == units
+
+    @pytest.mark.parametrize("amount_str", ["", "abc", "1.2.3", "-", ".", "1.23456", "NaN", "Infinity", "1e-5"])
+    def test_invalid(self, amount_str):
+        with pytest.raises(ValueError):
+            parse_fixed(amount_str)
+
+    def test_matches_decimal(self):
+        for amount_str in ["1.2345", "100", "0.1", "99999999.9999", "12.30"]:
+            assert parse_fixed(amount_str) == decimal_to_fixed(Decimal(amount_str))
+
+
+class TestFormatFixed:
+    @pytest.mark.parametrize("amount_str", ["0", "1.5", "2", "-30", "0.0001", "1.2345", "100", "-0.25", "1234567.8900"])
+    def test_matches_normalized_decimal(self, amount_str):
+        expected = f"{Decimal(amount_str).normalize():f}"
+        assert format_fixed(parse_fixed(amount_str)) == expected
+
+    def test_round_trip_decimal(self):
+        assert fixed_to_decimal(12345) == Decimal("1.2345")
+        assert decimal_to_fixed(fixed_to_decimal(-7)) == -7
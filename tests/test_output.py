@@ -0,0 +1,62 @@
+import io
+import sys
+import os
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from models import ClientAccount
+from output import HEADER, format_amount, write_accounts, write_accounts_to_path
+
+
+def reference_row(account: ClientAccount) -> str:
+    """The per-row print formatting main.py used before output.py."""
+    def fmt(value):
+        return f"{value.normalize():f}"
+    return f"{account.client_id},{fmt(account.available)},{fmt(account.held)},{fmt(account.total)},{str(account.locked).lower()}\n"
+
+
+class TestFormatAmount:
+    def test_matches_normalized_decimal(self):
+        for text in ["0", "-0", "-0.00", "1E+2", "100.0", "0E-8", "1.50", "-3.2000", "0.0001", "1E-7", "123456789.1234"]:
+            value = Decimal(text)
+            assert format_amount(value) == f"{value.normalize():f}", text
+
+    def test_fixed_point(self):
+        assert format_amount(15000) == "1.5"
+        assert format_amount(-1) == "-0.0001"
+        assert format_amount(0) == "0"
+
+
+class TestWriteAccounts:
+    def make_accounts(self):
+        accounts = {}
+        for client_id in (7, 3, 65535, 1, 20):
+            accounts[client_id] = ClientAccount(
+                client_id, available=Decimal(client_id) / 8, held=Decimal("0.50"), locked=client_id % 2 == 0
+            )
+        return accounts
+
+    def test_byte_identical_to_per_row_print(self):
+        accounts = self.make_accounts()
+        out = io.BytesIO()
+
+        write_accounts(accounts, out, rows_per_write=2)
+
+        expected = HEADER.decode() + "".join(reference_row(accounts[client_id]) for client_id in sorted(accounts))
+        assert out.getvalue() == expected.encode()
+
+    def test_no_accounts(self):
+        out = io.BytesIO()
+        write_accounts({}, out)
+        assert out.getvalue() == HEADER
+
+    def test_write_to_path(self, tmp_path):
+        accounts = self.make_accounts()
+        path = tmp_path / "out.csv"
+        out = io.BytesIO()
+
+        write_accounts_to_path(accounts, str(path))
+        write_accounts(accounts, out)
+
+        assert path.read_bytes() == out.getvalue()
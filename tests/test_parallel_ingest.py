@@ -0,0 +1,92 @@
+import mmap
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from csv_ingest import iter_transaction_chunks
+from parallel_ingest import iter_parallel_chunks, split_ranges
+
+HEADER = b"type, client, tx, amount\n"
+
+
+def write_csv(tmp_path, body: bytes) -> str:
+    path = tmp_path / "input.csv"
+    path.write_bytes(HEADER + body)
+    return str(path)
+
+
+def mixed_rows(count: int) -> bytes:
+    rows = []
+    for tx_id in range(1, count + 1):
+        if tx_id % 17 == 0:
+            rows.append("bogus, 1, 1, 1.0\n")
+        elif tx_id % 5 == 0:
+            rows.append(f"dispute, {tx_id % 7}, {tx_id - 1},\n")
+        else:
+            rows.append(f"deposit, {tx_id % 7}, {tx_id}, {tx_id % 13}.{tx_id % 100:02d}\n")
+    return "".join(rows).encode()
+
+
+class TestSplitRanges:
+    @pytest.mark.parametrize("body", [mixed_rows(200), b"".join(b"deposit, 1, %04d, 1.5\n" % tx_id for tx_id in range(100))])
+    def test_ranges_match_sequential_chunks(self, tmp_path, body):
+        # The second body has lines ending exactly at each range_bytes boundary
+        path = write_csv(tmp_path, body)
+        with open(path, "rb") as f:
+            chunks = [(start, end) for start, end, _ in iter_transaction_chunks(f, read_chunk_bytes=220)]
+            with_mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        ranges = list(split_ranges(with_mmap, len(HEADER), 220))
+
+        assert len(ranges) > 1
+        assert ranges == chunks
+
+    def test_last_line_without_newline(self):
+        data = HEADER + b"deposit, 1, 1, 1.0\ndeposit, 1, 2, 1.0"
+        with_mmap = mmap.mmap(-1, len(data))
+        with_mmap.write(data)
+
+        assert list(split_ranges(with_mmap, len(HEADER), 10)) == [
+            (len(HEADER), len(HEADER) + 19),
+            (len(HEADER) + 19, len(data)),
+        ]
+        assert list(split_ranges(with_mmap, len(HEADER), 19)) == [(len(HEADER), len(data))]
+
+
+class TestIterParallelChunks:
+    @pytest.mark.parametrize("fixed_point", [False, True])
+    def test_matches_sequential_reader(self, tmp_path, fixed_point):
+        path = write_csv(tmp_path, mixed_rows(500))
+        with open(path, "rb") as f:
+            expected = list(iter_transaction_chunks(f, read_chunk_bytes=300, fixed_point=fixed_point))
+
+        chunks = list(iter_parallel_chunks(path, workers=2, range_bytes=300, fixed_point=fixed_point))
+
+        assert len(chunks) > 4
+        assert chunks == expected
+
+    def test_resume_at_offset(self, tmp_path):
+        path = write_csv(tmp_path, mixed_rows(100))
+        first = next(iter_parallel_chunks(path, workers=2, range_bytes=200))
+
+        rest = list(iter_parallel_chunks(path, workers=2, start_offset=first[1], range_bytes=200))
+
+        with open(path, "rb") as f:
+            assert [first] + rest == list(iter_transaction_chunks(f, read_chunk_bytes=200))
+
+    def test_ids_beyond_int64(self, tmp_path):
+        path = write_csv(tmp_path, f"deposit, 1, {2 ** 64}, 1.0\n".encode())
+
+        [(_, _, transactions)] = iter_parallel_chunks(path, workers=1)
+
+        assert transactions[0].transaction_id == 2 ** 64
+
+    def test_empty_and_header_only_files(self, tmp_path):
+        empty = tmp_path / "empty.csv"
+        empty.write_bytes(b"")
+
+        assert list(iter_parallel_chunks(str(empty), workers=2)) == []
+        assert list(iter_parallel_chunks(write_csv(tmp_path, b""), workers=2)) == []
@@ -0,0 +1,44 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from models import Transaction, TransactionType
+from parking_lot import ParkingLot
+
+
+def dispute(client_id: int, transaction_id: int) -> Transaction:
+    return Transaction(TransactionType.DISPUTE, client_id=client_id, transaction_id=transaction_id)
+
+
+class TestParkingLot:
+    def test_release_in_arrival_order(self):
+        lot = ParkingLot()
+        first = dispute(1, 7)
+        second = Transaction(TransactionType.RESOLVE, client_id=1, transaction_id=7)
+        lot.park(first)
+        lot.park(dispute(1, 8))
+        lot.park(second)
+
+        assert lot.release(7) == [first, second]
+        assert lot.release(7) == []
+        assert len(lot) == 1
+
+    def test_release_unknown_id(self):
+        assert ParkingLot().release(1) == []
+
+    def test_bounded(self):
+        lot = ParkingLot(max_parked=2)
+        assert lot.park(dispute(1, 1))
+        assert lot.park(dispute(1, 2))
+        assert not lot.park(dispute(1, 3))
+        lot.release(1)
+        assert lot.park(dispute(1, 3))
+
+    def test_drain(self):
+        lot = ParkingLot()
+        lot.park(dispute(1, 1))
+        lot.park(dispute(2, 2))
+
+        assert sorted(transaction.transaction_id for transaction in lot.drain()) == [1, 2]
+        assert len(lot) == 0
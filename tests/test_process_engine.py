@@ -0,0 +1,175 @@
+import sys
+import os
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from binary_ingest import convert_csv
+from models import DispatchMode, RejectionReason, TransactionType
+from payments_engine import PaymentsEngine
+from process_engine import MultiProcessPaymentsEngine
+from state_manager import DenseStateManager
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class SmallBatchEngine(MultiProcessPaymentsEngine):
+    # Many batches per worker, so the rings wrap around
+    BATCH_SLOTS = 2
+    ROWS_PER_BATCH = 16
+
+
+class SmallChunkEngine(MultiProcessPaymentsEngine):
+    # Line queues fill after a few chunks
+    LINES_PER_CHUNK = 16
+    MAX_CHUNKS_IN_FLIGHT = 2
+    RESULT_POLL_INTERVAL = 0.05
+
+
+def failing_state(**options):
+    raise RuntimeError("state backend unavailable")
+
+
+def as_tuples(accounts):
+    return {
+        client_id: (account.available, account.held, account.total, account.locked)
+        for client_id, account in accounts.items()
+    }
+
+
+class TestMultiProcessPaymentsEngine:
+    def test_basic_fixture_matches_threaded_engine(self):
+        path = os.path.join(FIXTURES, "basic.csv")
+
+        expected = PaymentsEngine(num_consumers=1).process_file(path)
+        accounts = MultiProcessPaymentsEngine(num_workers=2).process_file(path)
+
+        assert as_tuples(accounts) == as_tuples(expected)
+
+    def test_disputes_across_partitions(self, tmp_path):
+        rows = ["type, client, tx, amount"]
+        for client_id in range(1, 41):
+            rows.append(f"deposit, {client_id}, {client_id * 10 + 1}, 100")
+            rows.append(f"deposit, {client_id}, {client_id * 10 + 2}, 50.5")
+            rows.append(f"withdrawal, {client_id}, {client_id * 10 + 3}, 25")
+        for client_id in range(1, 41):
+            rows.append(f"dispute, {client_id}, {client_id * 10 + 1},")
+            if client_id % 3 == 0:
+                rows.append(f"resolve, {client_id}, {client_id * 10 + 1},")
+            elif client_id % 3 == 1:
+                rows.append(f"chargeback, {client_id}, {client_id * 10 + 1},")
+                rows.append(f"deposit, {client_id}, {client_id * 10 + 4}, 10")
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text('\n'.join(rows))
+
+        expected = PaymentsEngine(num_consumers=4, dispatch_mode=DispatchMode.SHARDED).process_file(str(csv_file))
+        engine = MultiProcessPaymentsEngine(num_workers=3)
+        accounts = engine.process_file(str(csv_file))
+
+        assert as_tuples(accounts) == as_tuples(expected)
+        assert accounts[3].available == Decimal("125.5")
+        assert accounts[4].locked is True
+
+    def test_dense_state_in_workers(self):
+        path = os.path.join(FIXTURES, "basic.csv")
+
+        expected = PaymentsEngine(num_consumers=1).process_file(path)
+        accounts = MultiProcessPaymentsEngine(num_workers=2, state_factory=DenseStateManager).process_file(path)
+
+        assert as_tuples(accounts) == as_tuples(expected)
+
+    def test_out_of_order_parked(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text('\n'.join([
+            "type, client, tx, amount",
+            "dispute, 1, 1,",
+            "deposit, 1, 1, 100.0",
+        ]))
+
+        engine = MultiProcessPaymentsEngine(num_workers=2)
+        accounts = engine.process_file(str(csv_file))
+
+        assert accounts[1].available == Decimal("0")
+        assert accounts[1].held == Decimal("100")
+        assert engine.stats.parked == 1
+        snapshot = engine.stats.snapshot()
+        assert snapshot.processed_by_type[TransactionType.DISPUTE] == 1
+        assert snapshot.rejected_by_reason[RejectionReason.TRANSACTION_NOT_FOUND] == 1
+
+    def test_parking_lot_overflow_falls_back_to_dlq(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text('\n'.join([
+            "type, client, tx, amount",
+            "dispute, 1, 1,",
+            "dispute, 1, 2,",
+            "deposit, 1, 1, 100.0",
+            "deposit, 1, 2, 50.0",
+        ]))
+        binary_file = tmp_path / "test.bin"
+        convert_csv(str(csv_file), str(binary_file))
+
+        for path in (csv_file, binary_file):
+            engine = MultiProcessPaymentsEngine(num_workers=2, max_parked=1)
+            accounts = engine.process_file(str(path))
+
+            assert accounts[1].held == Decimal("150")
+            assert engine.stats.parked == 1
+            assert engine.stats.dlq_retried == 1
+
+    def test_malformed_rows_skipped(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text('\n'.join([
+            "type, client, tx, amount",
+            "deposit, x, 1, 100.0",
+            "bogus, 1, 2, 100.0",
+            "deposit, 1, 3, 5",
+        ]))
+
+        accounts = MultiProcessPaymentsEngine(num_workers=2).process_file(str(csv_file))
+
+        assert list(accounts) == [1]
+        assert accounts[1].available == Decimal("5")
+
+    def test_empty_file(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text("type, client, tx, amount\n")
+
+        assert MultiProcessPaymentsEngine(num_workers=2).process_file(str(csv_file)) == {}
+
+    def test_binary_input_through_shared_memory_batches(self, tmp_path):
+        rows = ["type, client, tx, amount"]
+        for tx_id in range(1, 601):
+            client_id = tx_id % 7 + 1
+            rows.append(f"deposit, {client_id}, {tx_id}, {tx_id % 5}.1234")
+            if tx_id % 4 == 0:
+                rows.append(f"withdrawal, {client_id}, {10_000 + tx_id}, 1.5")
+            if tx_id % 50 == 0:
+                rows.append(f"dispute, {client_id}, {tx_id},")
+        # Parked until the deposit arrives, then released inside a batch
+        rows.insert(1, "dispute, 3, 20000,")
+        rows.append("deposit, 3, 20000, 9")
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text("\n".join(rows))
+        binary_file = tmp_path / "test.bin"
+        convert_csv(str(csv_file), str(binary_file))
+
+        for fixed_point in (False, True):
+            expected_engine = MultiProcessPaymentsEngine(num_workers=3, fixed_point=fixed_point)
+            expected = expected_engine.process_file(str(csv_file))
+            engine = SmallBatchEngine(num_workers=3, fixed_point=fixed_point)
+            accounts = engine.process_file(str(binary_file))
+
+            assert as_tuples(accounts) == as_tuples(expected)
+            assert engine.stats.processed == expected_engine.stats.processed
+            assert engine.stats.parked == 1
+
+    def test_worker_crash_on_csv_input_raises(self, tmp_path):
+        num_rows = SmallChunkEngine.MAX_CHUNKS_IN_FLIGHT * SmallChunkEngine.LINES_PER_CHUNK * 20
+        csv_file = tmp_path / "test.csv"
+        csv_file.write_text("type,client,tx,amount\n" + "".join(f"deposit,1,{tx_id},1.0\n" for tx_id in range(1, num_rows + 1)))
+
+        engine = SmallChunkEngine(num_workers=1, state_factory=failing_state)
+        with pytest.raises(RuntimeError, match="exited with code"):
+            engine.process_file(str(csv_file))
@@ -4,8 +4,9 @@ from decimal import Decimal
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
-from models import Transaction, TransactionType, ProcessingResult
-from state_manager import StateManager
+from models import Transaction, TransactionType, ProcessingResult, RejectionReason
+from history_store import CompactTransactionHistory
+from state_manager import StateManager, DenseStateManager
 from transaction_processor import TransactionProcessor
 
 
@@ -122,3 +123,62 @@ class TestTransactionProcessor:
         new_deposit = Transaction(TransactionType.DEPOSIT, client_id=1, transaction_id=2, amount=Decimal("50"))
         result = self.processor.process_transaction(new_deposit)
         assert result == ProcessingResult.FAILED_PERMANENT
+
+    def test_rejection_reasons(self):
+        deposit = Transaction(TransactionType.DEPOSIT, client_id=1, transaction_id=1, amount=Decimal("10"))
+        assert self.processor.process_with_reason(deposit) == (ProcessingResult.SUCCESS, None)
+
+        cases = [
+            (Transaction(TransactionType.WITHDRAWAL, client_id=1, transaction_id=2, amount=Decimal("20")),
+             ProcessingResult.FAILED_PERMANENT, RejectionReason.INSUFFICIENT_FUNDS),
+            (Transaction(TransactionType.DEPOSIT, client_id=1, transaction_id=3, amount=Decimal("-1")),
+             ProcessingResult.FAILED_PERMANENT, RejectionReason.INVALID_AMOUNT),
+            (Transaction(TransactionType.DISPUTE, client_id=2, transaction_id=1),
+             ProcessingResult.FAILED_PERMANENT, RejectionReason.CLIENT_MISMATCH),
+            (Transaction(TransactionType.DISPUTE, client_id=1, transaction_id=99),
+             ProcessingResult.FAILED_RETRIABLE, RejectionReason.TRANSACTION_NOT_FOUND),
+            (Transaction(TransactionType.RESOLVE, client_id=1, transaction_id=1),
+             ProcessingResult.FAILED_RETRIABLE, RejectionReason.NOT_DISPUTED),
+        ]
+        for transaction, expected_result, expected_reason in cases:
+            assert self.processor.process_with_reason(transaction) == (expected_result, expected_reason)
+
+        dispute = Transaction(TransactionType.DISPUTE, client_id=1, transaction_id=1)
+        self.processor.process_transaction(dispute)
+        assert self.processor.process_with_reason(dispute) == (ProcessingResult.FAILED_PERMANENT, RejectionReason.ALREADY_DISPUTED)
+
+        chargeback = Transaction(TransactionType.CHARGEBACK, client_id=1, transaction_id=1)
+        self.processor.process_transaction(chargeback)
+        assert self.processor.process_with_reason(deposit) == (ProcessingResult.FAILED_PERMANENT, RejectionReason.ACCOUNT_LOCKED)
+
+    def test_process_row_matches_process_with_reason(self):
+        rows = [
+            (TransactionType.DEPOSIT, 1, 1, Decimal("10")),
+            (TransactionType.WITHDRAWAL, 1, 2, Decimal("4")),
+            (TransactionType.WITHDRAWAL, 1, 3, Decimal("40")),
+            (TransactionType.DISPUTE, 2, 1, None),
+            (TransactionType.DISPUTE, 1, 2, None),
+            (TransactionType.DISPUTE, 1, 1, None),
+            (TransactionType.RESOLVE, 1, 1, None),
+            (TransactionType.WITHDRAWAL, 1, 2, Decimal("4")),
+        ]
+        outcomes = [self.processor.process_row(*row) for row in rows]
+
+        state = type(self.state)()
+        processor = TransactionProcessor(state)
+        assert outcomes == [processor.process_with_reason(Transaction(*row)) for row in rows]
+        assert self.state.get_or_create_account(1) == state.get_or_create_account(1)
+        assert self.state.get_transaction(1) == Transaction(TransactionType.DEPOSIT, 1, 1, Decimal("10"))
+        assert self.state.has_transaction(2)
+
+
+class TestTransactionProcessorDenseState(TestTransactionProcessor):
+    def setup_method(self):
+        self.state = DenseStateManager()
+        self.processor = TransactionProcessor(self.state)
+
+
+class TestTransactionProcessorCompactHistory(TestTransactionProcessor):
+    def setup_method(self):
+        self.state = StateManager(history_factory=CompactTransactionHistory)
+        self.processor = TransactionProcessor(self.state)
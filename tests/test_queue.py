@@ -1,7 +1,10 @@
 import sys
 import os
+import threading
 from decimal import Decimal
 
+import pytest
+
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
 from message_queue import InMemoryQueue
@@ -65,3 +68,172 @@ class TestInMemoryQueue:
         queue = InMemoryQueue()
         messages = queue.get_dead_letter_queue_messages()
         assert messages == []
+
+
+class TestBoundedQueue:
+    def test_unbounded_by_default(self):
+        queue = InMemoryQueue()
+        for transaction_id in range(1000):
+            queue.publish_message(make_transaction(1, transaction_id))
+        assert queue.get_stats().depth == 1000
+        assert queue.get_stats().backpressure_waits == 0
+
+    def test_publisher_blocks_until_low_watermark(self):
+        queue = InMemoryQueue(capacity=4, low_watermark=1)
+        for transaction_id in range(4):
+            queue.publish_message(make_transaction(1, transaction_id))
+
+        published = threading.Event()
+
+        def publish():
+            queue.publish_message(make_transaction(1, 99))
+            published.set()
+
+        publisher = threading.Thread(target=publish)
+        publisher.start()
+
+        assert not published.wait(0.1)
+        queue.consume_message()
+        queue.consume_message()
+        assert not published.wait(0.1)  # depth 2, still above the low watermark
+        queue.consume_message()
+        assert published.wait(1.0)
+        publisher.join()
+
+        stats = queue.get_stats()
+        assert stats.depth == 2
+        assert stats.max_depth == 4
+        assert stats.published == 5
+        assert stats.consumed == 3
+        assert stats.backpressure_waits == 1
+        assert stats.backpressure_seconds > 0
+
+    def test_preserves_fifo_order(self):
+        queue = InMemoryQueue(capacity=8)
+        received = []
+
+        def consume():
+            while len(received) < 100:
+                message = queue.consume_message()
+                if message is not None:
+                    received.append(message.transaction_id)
+
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        for transaction_id in range(100):
+            queue.publish_message(make_transaction(1, transaction_id))
+        consumer.join()
+
+        assert received == list(range(100))
+        assert queue.get_stats().max_depth <= 8
+
+    def test_invalid_watermarks(self):
+        with pytest.raises(ValueError):
+            InMemoryQueue(capacity=0)
+        with pytest.raises(ValueError):
+            InMemoryQueue(capacity=4, low_watermark=4)
+
+
+class TestBatchQueue:
+    def test_publish_batch_consume_batch(self):
+        queue = InMemoryQueue()
+        queue.publish_batch([make_transaction(1, transaction_id) for transaction_id in range(3)])
+        queue.publish_batch([make_transaction(2, transaction_id) for transaction_id in range(3, 5)])
+
+        batch = queue.consume_batch(10)
+        assert [message.transaction_id for message in batch] == [0, 1, 2, 3, 4]
+        assert queue.is_empty()
+
+        stats = queue.get_stats()
+        assert stats.published == 5
+        assert stats.consumed == 5
+        assert stats.lock_acquisitions == 3
+
+    def test_consume_batch_keeps_published_batches_whole(self):
+        queue = InMemoryQueue()
+        queue.publish_batch([make_transaction(1, transaction_id) for transaction_id in range(3)])
+        queue.publish_batch([make_transaction(2, transaction_id) for transaction_id in range(3, 6)])
+        queue.publish_batch([make_transaction(3, transaction_id) for transaction_id in range(6, 8)])
+
+        # Second batch doesn't fit after the first; an oversized batch is not split
+        assert [message.transaction_id for message in queue.consume_batch(4)] == [0, 1, 2]
+        assert [message.transaction_id for message in queue.consume_batch(2)] == [3, 4, 5]
+        assert [message.transaction_id for message in queue.consume_batch(2)] == [6, 7]
+
+    def test_consume_message_from_batch(self):
+        queue = InMemoryQueue()
+        queue.publish_batch([make_transaction(1, transaction_id) for transaction_id in range(2)])
+
+        assert queue.consume_message().transaction_id == 0
+        assert queue.consume_message().transaction_id == 1
+        assert queue.is_empty()
+
+    def test_shutdown_wakes_blocked_consumer(self):
+        queue = InMemoryQueue()
+        batches = []
+        consumer = threading.Thread(target=lambda: batches.append(queue.consume_batch(10)))
+        consumer.start()
+
+        queue.shutdown()
+        consumer.join(timeout=5)
+
+        assert not consumer.is_alive()
+        assert batches == [[]]
+
+    def test_consume_batch_drains_before_end_of_stream(self):
+        queue = InMemoryQueue()
+        queue.publish_batch([make_transaction(1, 1)])
+        queue.shutdown()
+
+        assert len(queue.consume_batch(10)) == 1
+        assert queue.consume_batch(10) == []
+
+    def test_publish_batch_backpressure(self):
+        queue = InMemoryQueue(capacity=4, low_watermark=2)
+        queue.publish_batch([make_transaction(1, transaction_id) for transaction_id in range(5)])
+        assert queue.get_stats().depth == 5
+
+        published = threading.Event()
+
+        def publish():
+            queue.publish_batch([make_transaction(1, 5)])
+            published.set()
+
+        publisher = threading.Thread(target=publish)
+        publisher.start()
+        assert not published.wait(timeout=0.1)
+
+        queue.consume_batch(10)
+        publisher.join(timeout=5)
+        assert published.is_set()
+        assert queue.get_stats().backpressure_waits == 1
+
+    def test_join_waits_for_task_done(self):
+        queue = InMemoryQueue()
+        queue.publish_batch([make_transaction(1, transaction_id) for transaction_id in range(3)])
+        joined = threading.Event()
+
+        def join():
+            queue.join()
+            joined.set()
+
+        joiner = threading.Thread(target=join)
+        joiner.start()
+        batch = queue.consume_batch(10)
+        assert not joined.wait(timeout=0.1)
+
+        queue.task_done(len(batch))
+        joiner.join(timeout=5)
+        assert joined.is_set()
+
+    def test_hand_off_ignores_backpressure(self):
+        queue = InMemoryQueue(capacity=4, low_watermark=2)
+        queue.publish_batch([make_transaction(1, transaction_id) for transaction_id in range(5)])
+
+        queue.hand_off([make_transaction(2, 5)])
+
+        stats = queue.get_stats()
+        assert stats.depth == 6
+        assert stats.published == 6
+        assert stats.backpressure_waits == 0
+        assert [message.transaction_id for message in queue.consume_batch(10)] == list(range(6))
@@ -0,0 +1,65 @@
+import sys
+import os
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from models import ClientAccount, RejectionReason, StatsSnapshot, Transaction, TransactionType
+from snapshot import read_snapshot, write_snapshot
+
+
+class TestSnapshot:
+    def test_roundtrip(self, tmp_path):
+        path = str(tmp_path / "snapshot.bin")
+        accounts = [
+            ClientAccount(1, available=Decimal("1.5"), held=Decimal("0")),
+            ClientAccount(2, available=Decimal("-3"), held=Decimal("10.00001"), locked=True),
+        ]
+        transactions = [
+            (Transaction(TransactionType.DEPOSIT, client_id=1, transaction_id=1, amount=Decimal("1.5")), False),
+            (Transaction(TransactionType.DEPOSIT, client_id=2, transaction_id=2, amount=Decimal("10.00001")), True),
+        ]
+        parked = [Transaction(TransactionType.DISPUTE, client_id=3, transaction_id=9)]
+        stats = StatsSnapshot(
+            processed=3,
+            failed=1,
+            processed_by_type={TransactionType.DEPOSIT: 2},
+            rejected_by_reason={RejectionReason.INSUFFICIENT_FUNDS: 1},
+        )
+
+        write_snapshot(path, 1234, accounts, iter(transactions), parked, stats, seen=b"\x01seen ids")
+        snapshot = read_snapshot(path)
+
+        assert snapshot.input_offset == 1234
+        assert snapshot.accounts == accounts
+        assert snapshot.transactions == transactions
+        assert snapshot.parked == parked
+        assert snapshot.seen == b"\x01seen ids"
+        assert snapshot.stats.processed == 3
+        assert snapshot.stats.processed_by_type == {TransactionType.DEPOSIT: 2}
+        assert snapshot.stats.rejected_by_reason == {RejectionReason.INSUFFICIENT_FUNDS: 1}
+        assert not os.path.exists(path + ".tmp")
+
+    def test_fixed_point(self, tmp_path):
+        path = str(tmp_path / "snapshot.bin")
+        write_snapshot(path, 0, [ClientAccount(1, available=15000, held=0)], [], [], StatsSnapshot())
+
+        account = read_snapshot(path, fixed_point=True).accounts[0]
+
+        assert account.available == 15000
+        assert isinstance(account.held, int)
+
+    def test_missing_snapshot(self, tmp_path):
+        assert read_snapshot(str(tmp_path / "missing.bin")) is None
+
+    def test_corrupt_snapshot_rejected(self, tmp_path):
+        path = str(tmp_path / "snapshot.bin")
+        write_snapshot(path, 0, [ClientAccount(1)], [], [], StatsSnapshot())
+        with open(path, "r+b") as f:
+            f.seek(12)
+            f.write(b"\xff")
+
+        with pytest.raises(ValueError):
+            read_snapshot(path)
@@ -0,0 +1,188 @@
+import sys
+import os
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from models import Transaction, TransactionType
+from sqlite_state import SqliteStateManager
+from state_manager import StateBackend, StateManager, DenseStateManager, CLIENT_ID_SPACE
+
+
+class TestStateManager:
+    def make_state(self, **kwargs) -> StateBackend:
+        return StateManager(**kwargs)
+
+    def test_get_or_create_account_returns_same_account(self):
+        state = self.make_state()
+        account = state.get_or_create_account(7)
+        assert state.get_or_create_account(7) is account
+        assert account.available == Decimal("0")
+
+    def test_fixed_point_accounts_start_at_int_zero(self):
+        account = self.make_state(fixed_point=True).get_or_create_account(1)
+        assert account.available == 0 and isinstance(account.available, int)
+        assert isinstance(account.held, int)
+
+    def test_client_lock_is_stable_per_client(self):
+        state = self.make_state()
+        assert state.get_client_lock(1) is state.get_client_lock(1)
+        assert state.get_client_lock(1) is not state.get_client_lock(2)
+
+    def test_transactions_and_disputes(self):
+        state = self.make_state()
+        transaction = Transaction(TransactionType.DEPOSIT, client_id=1, transaction_id=10, amount=Decimal("5"))
+        state.store_transaction(transaction)
+        assert state.get_transaction(10) == transaction
+        assert state.get_transaction(11) is None
+
+        state.mark_transaction_disputed(10)
+        assert state.is_transaction_disputed(10)
+        state.clear_transaction_dispute(10)
+        assert not state.is_transaction_disputed(10)
+
+    def test_has_transaction(self):
+        state = self.make_state()
+        state.store_transaction(Transaction(TransactionType.DEPOSIT, client_id=1, transaction_id=10, amount=Decimal("5")))
+        state.store_transaction(Transaction(TransactionType.WITHDRAWAL, client_id=1, transaction_id=11, amount=Decimal("1")))
+        assert state.has_transaction(10) and state.has_transaction(11)
+        assert not state.has_transaction(12)
+
+    def test_get_all_accounts(self):
+        state = self.make_state()
+        for client_id in (3, 1, 2):
+            state.get_or_create_account(client_id)
+        assert sorted(state.get_all_accounts()) == [1, 2, 3]
+
+
+class TestDepositOnlyHistory:
+    def deposit(self, transaction_id: int) -> Transaction:
+        return Transaction(TransactionType.DEPOSIT, client_id=1, transaction_id=transaction_id, amount=Decimal(transaction_id))
+
+    def test_withdrawals_are_only_seen(self):
+        state = StateManager()
+        state.store_transaction(Transaction(TransactionType.WITHDRAWAL, client_id=1, transaction_id=11, amount=Decimal("1")))
+        assert state.has_transaction(11)
+        assert state.get_transaction(11) is None
+        assert list(state.iter_transactions()) == []
+
+    def test_retention_keeps_recent_and_disputed_deposits(self):
+        state = StateManager(deposit_retention=10)
+        state.store_transaction(self.deposit(1))
+        state.mark_transaction_disputed(1)
+        for transaction_id in range(2, 41):
+            state.store_transaction(self.deposit(transaction_id))
+
+        assert all(state.has_transaction(transaction_id) for transaction_id in range(1, 41))
+        assert state.get_transaction(1) == self.deposit(1)
+        assert state.is_transaction_disputed(1)
+        assert state.get_transaction(2) is None
+        assert all(state.get_transaction(transaction_id) is not None for transaction_id in range(31, 41))
+        retained = sorted(transaction.transaction_id for transaction in state.iter_transactions())
+        assert 11 <= len(retained) <= 21 and retained[0] == 1 and retained[-1] == 40
+
+        state.clear_transaction_dispute(1)
+        for transaction_id in range(41, 61):
+            state.store_transaction(self.deposit(transaction_id))
+        assert state.get_transaction(1) is None
+
+    def test_dispute_marked_after_rollover_dropped_its_deposit(self):
+        state = StateManager(deposit_retention=2)
+        for transaction_id in range(1, 5):
+            state.store_transaction(self.deposit(transaction_id))
+        # Deposit 1 was looked up before the rollover that dropped it
+        assert state.get_transaction(1) is None
+        state.mark_transaction_disputed(1)
+        assert state.is_transaction_disputed(1)
+        assert state.get_transaction(1) == self.deposit(1)
+
+    def test_seen_ids_round_trip(self):
+        state = StateManager()
+        for transaction_id in (5, 1 << 33, 700_000):
+            state.store_transaction(Transaction(TransactionType.WITHDRAWAL, 1, transaction_id, Decimal("1")))
+        restored = StateManager()
+        restored.import_seen_transaction_ids(state.export_seen_transaction_ids())
+        assert all(restored.has_transaction(transaction_id) for transaction_id in (5, 1 << 33, 700_000))
+        assert not restored.has_transaction(6)
+
+
+class TestDenseStateManager(TestStateManager):
+    def make_state(self, **kwargs) -> StateBackend:
+        return DenseStateManager(**kwargs)
+
+    def test_get_all_accounts_in_client_order(self):
+        state = self.make_state()
+        for client_id in (65535, 3, 0, 1000):
+            state.get_or_create_account(client_id)
+        assert list(state.get_all_accounts()) == [0, 3, 1000, 65535]
+
+    def test_ids_outside_u16_fall_back(self):
+        state = self.make_state()
+        for client_id in (CLIENT_ID_SPACE, -1, 5):
+            state.get_or_create_account(client_id).credit(Decimal("1"))
+        assert state.get_client_lock(-1) is state.get_client_lock(-1)
+        assert state.get_client_lock(-1) is not state.get_client_lock(CLIENT_ID_SPACE - 1)
+        assert sorted(state.get_all_accounts()) == [-1, 5, CLIENT_ID_SPACE]
+        assert state.get_or_create_account(-1).available == Decimal("1")
+
+    def test_deposit_retention(self):
+        state = self.make_state(deposit_retention=2)
+        for transaction_id in range(1, 9):
+            state.store_transaction(Transaction(TransactionType.DEPOSIT, 1, transaction_id, Decimal("1")))
+        assert state.get_transaction(1) is None
+        assert state.get_transaction(8) is not None
+        assert all(state.has_transaction(transaction_id) for transaction_id in range(1, 9))
+
+
+class TestSqliteStateManager(TestStateManager):
+    def make_state(self, **kwargs) -> StateBackend:
+        return SqliteStateManager(batch_rows=4, **kwargs)
+
+    def test_lookups_span_flushed_and_pending_writes(self):
+        state = self.make_state()
+        for transaction_id in range(1, 11):
+            state.store_transaction(Transaction(TransactionType.DEPOSIT, 1, transaction_id, Decimal(f"{transaction_id}.5")))
+        state.mark_transaction_disputed(3)
+        state.mark_transaction_disputed(10)
+        for transaction_id in range(1, 11):
+            assert state.get_transaction(transaction_id).amount == Decimal(f"{transaction_id}.5")
+        assert state.is_transaction_disputed(3) and state.is_transaction_disputed(10)
+        assert not state.is_transaction_disputed(4)
+        assert [transaction.transaction_id for transaction in state.iter_transactions()] == list(range(1, 11))
+        assert state.is_transaction_disputed(3)
+
+    def test_fixed_point_amounts_round_trip(self):
+        state = self.make_state(fixed_point=True)
+        big = 1 << 70
+        state.store_transaction(Transaction(TransactionType.DEPOSIT, 1, 1, big))
+        state.get_or_create_account(1).credit(big)
+        state.flush()
+        assert state.get_transaction(1).amount == big
+        assert state.get_all_accounts()[1].available == big
+
+    def test_reopen_persisted_database(self, tmp_path):
+        path = str(tmp_path / "state.sqlite")
+        state = self.make_state(path=path)
+        state.get_or_create_account(1).credit(Decimal("2.5"))
+        state.get_or_create_account(2).locked = True
+        state.store_transaction(Transaction(TransactionType.DEPOSIT, 1, 7, Decimal("2.5")))
+        state.mark_transaction_disputed(7)
+        state.close()
+
+        reopened = self.make_state(path=path)
+        assert reopened.get_transaction(7) == Transaction(TransactionType.DEPOSIT, 1, 7, Decimal("2.5"))
+        assert reopened.is_transaction_disputed(7)
+        accounts = reopened.get_all_accounts()
+        assert accounts[1].available == Decimal("2.5")
+        assert accounts[2].locked
+        assert reopened.get_or_create_account(1).available == Decimal("2.5")
+        reopened.close()
+
+    def test_temporary_database_removed_on_close(self):
+        state = self.make_state()
+        path = state.path
+        state.store_transaction(Transaction(TransactionType.DEPOSIT, 1, 1, Decimal("1")))
+        assert os.path.exists(path)
+        state.close()
+        assert not os.path.exists(path)
+        assert not os.path.exists(path + "-wal")
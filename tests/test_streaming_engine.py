@@ -0,0 +1,127 @@
+import sys
+import os
+import time
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from csv_ingest import iter_transactions
+from models import DispatchMode, Transaction, TransactionType
+from payments_engine import PaymentsEngine
+from streaming_engine import StreamingPaymentsEngine
+
+
+def deposit(client_id: int, tx_id: int, amount: str) -> Transaction:
+    return Transaction(TransactionType.DEPOSIT, client_id, tx_id, Decimal(amount))
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+class TestStreamingPaymentsEngine:
+    def test_stream_matches_process_file(self, tmp_path):
+        csv_file = tmp_path / "test.csv"
+        lines = ["type, client, tx, amount"]
+        for tx_id in range(1, 3001):
+            client_id = tx_id % 13
+            lines.append(f"deposit, {client_id}, {tx_id}, {tx_id % 7}.5")
+            if tx_id % 4 == 0:
+                lines.append(f"withdrawal, {client_id}, {100_000 + tx_id}, 2.25")
+            if tx_id % 9 == 0:
+                lines.append(f"dispute, {client_id}, {tx_id},")
+            if tx_id % 27 == 0:
+                lines.append(f"chargeback, {client_id}, {tx_id},")
+        csv_file.write_text("\n".join(lines) + "\n")
+        transactions = list(iter_transactions(str(csv_file)))
+        expected = PaymentsEngine(num_consumers=3, dispatch_mode=DispatchMode.SHARDED).process_file(str(csv_file))
+
+        engine = StreamingPaymentsEngine(micro_batch_size=100, num_consumers=3, dispatch_mode=DispatchMode.SHARDED)
+        engine.start()
+        for start in range(0, len(transactions), 37):
+            engine.submit(transactions[start:start + 37])
+        accounts = engine.stop()
+
+        assert {c: (a.available, a.held, a.locked) for c, a in accounts.items()} == {
+            c: (a.available, a.held, a.locked) for c, a in expected.items()
+        }
+        assert engine.latency_report()["count"] == len(transactions)
+
+    def test_max_latency_publishes_partial_micro_batch(self):
+        engine = StreamingPaymentsEngine(micro_batch_size=1_000_000, max_latency=0.01, num_consumers=1)
+        engine.start()
+        try:
+            engine.submit(deposit(1, 1, "5.0"))
+            assert wait_for(lambda: engine.stats.processed == 1)
+        finally:
+            engine.stop()
+
+    def test_flush_waits_for_processing(self):
+        engine = StreamingPaymentsEngine(micro_batch_size=1_000_000, max_latency=60, num_consumers=2)
+        engine.start()
+        try:
+            engine.submit([deposit(client_id, client_id, "1.0") for client_id in range(1, 501)])
+            engine.flush()
+            assert engine.stats.processed == 500
+        finally:
+            engine.stop()
+
+    def test_snapshot_is_a_consistent_copy(self):
+        engine = StreamingPaymentsEngine(max_latency=60, num_consumers=2)
+        engine.start()
+        try:
+            engine.submit(deposit(1, 1, "10.0"))
+            snapshot = engine.snapshot()
+            engine.submit(deposit(1, 2, "5.0"))
+            later = engine.snapshot()
+        finally:
+            accounts = engine.stop()
+
+        assert snapshot[1].available == Decimal("10.0")
+        assert later[1].available == Decimal("15.0")
+        assert accounts[1].available == Decimal("15.0")
+
+    def test_latency_recorded_for_each_submission(self):
+        engine = StreamingPaymentsEngine(micro_batch_size=4, num_consumers=2)
+        engine.start()
+        transaction = deposit(1, 1, "1.0")
+        # The same object twice: a duplicate deposit, skipped but still timed
+        engine.submit([transaction, transaction, deposit(2, 2, "1.0")])
+        engine.submit(transaction)
+        engine.stop()
+
+        assert engine.latency_report()["count"] == 4
+        assert engine.stats.processed == 4
+
+    def test_out_of_order_across_micro_batches(self):
+        engine = StreamingPaymentsEngine(micro_batch_size=1, num_consumers=2, dispatch_mode=DispatchMode.SHARDED)
+        engine.start()
+        engine.submit(Transaction(TransactionType.DISPUTE, 1, 1))
+        engine.flush()
+        assert engine.stats.parked == 1
+        engine.submit(deposit(1, 1, "3.0"))
+        accounts = engine.stop()
+
+        assert accounts[1].held == Decimal("3.0")
+
+    def test_lifecycle_errors(self, tmp_path):
+        engine = StreamingPaymentsEngine()
+        with pytest.raises(RuntimeError):
+            engine.submit(deposit(1, 1, "1.0"))
+        engine.start()
+        with pytest.raises(RuntimeError):
+            engine.start()
+        with pytest.raises(RuntimeError):
+            engine.process_file(str(tmp_path / "transactions.csv"))
+        engine.stop()
+        with pytest.raises(RuntimeError):
+            engine.submit(deposit(1, 1, "1.0"))
+        with pytest.raises(ValueError):
+            StreamingPaymentsEngine(journal_dir=str(tmp_path))
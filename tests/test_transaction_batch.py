@@ -0,0 +1,93 @@
+import multiprocessing
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from binary_ingest import NO_AMOUNT
+from transaction_batch import SharedBatchRing, TransactionBatch
+
+
+def make_batch(start: int, count: int) -> TransactionBatch:
+    batch = TransactionBatch()
+    for row in range(start, start + count):
+        batch.append(row % 5, row % 65536, row, NO_AMOUNT if row % 3 == 0 else row * 10_000)
+    return batch
+
+
+def consume(ring: SharedBatchRing, results) -> None:
+    rows = []
+    while True:
+        batch = ring.get()
+        if batch is None:
+            break
+        rows.extend(batch.rows())
+        ring.release()
+    ring.close()
+    results.put(rows)
+
+
+class TestTransactionBatch:
+    def test_rows_iterate_columns(self):
+        batch = make_batch(0, 4)
+
+        assert len(batch) == 4
+        assert list(batch.rows()) == [(0, 0, 0, NO_AMOUNT), (1, 1, 1, 10_000), (2, 2, 2, 20_000), (3, 3, 3, NO_AMOUNT)]
+
+    def test_columns_reject_out_of_range_ids(self):
+        with pytest.raises(OverflowError):
+            TransactionBatch().append(0, 1 << 16, 1, 0)
+
+
+class TestSharedBatchRing:
+    def test_round_trip_in_process(self):
+        ring = SharedBatchRing(multiprocessing.get_context(), slots=2, rows_per_slot=8)
+        try:
+            ring.put(make_batch(0, 8))
+            ring.put(make_batch(8, 3))
+            first = ring.get()
+            assert isinstance(first.amounts, memoryview)
+            assert list(first.rows()) == list(make_batch(0, 8).rows())
+            ring.release()
+            assert list(ring.get().rows()) == list(make_batch(8, 3).rows())
+            ring.release()
+            ring.put_end()
+            assert ring.get() is None
+        finally:
+            ring.close()
+            ring.unlink()
+
+    def test_full_ring_times_out(self):
+        ring = SharedBatchRing(multiprocessing.get_context(), slots=1, rows_per_slot=8)
+        try:
+            assert ring.put(make_batch(0, 1), timeout=0.01)
+            assert not ring.put(make_batch(1, 1), timeout=0.01)
+            with pytest.raises(ValueError):
+                ring.put(make_batch(0, 9))
+        finally:
+            ring.close()
+            ring.unlink()
+
+    def test_worker_process_reads_batches_in_order(self):
+        context = multiprocessing.get_context("spawn")
+        ring = SharedBatchRing(context, slots=3, rows_per_slot=100)
+        results = context.Queue()
+        worker = context.Process(target=consume, args=(ring, results))
+        worker.start()
+        try:
+            expected = []
+            for start in range(0, 2000, 97):
+                batch = make_batch(start, 97)
+                expected.extend(batch.rows())
+                ring.put(batch)
+            ring.put_end()
+            assert results.get(timeout=30) == expected
+            worker.join(timeout=30)
+            assert worker.exitcode == 0
+        finally:
+            if worker.is_alive():
+                worker.terminate()
+            ring.close()
+            ring.unlink()